@@ -1,9 +1,16 @@
 import sys
 import os
+import time
+import traceback
+from multiprocessing import Pool
 from KafNafParserPy import *
 from lxml import etree
 
 
+#parser for CAT files, created once per process and reused for every file
+cat_parser = etree.XMLParser(ns_clean=True)
+
+
 class catMarkable:
     '''class for markable information'''
 
@@ -38,8 +45,7 @@ def collect_markables(catfile):
     my_markables = []
     #go through catfile and collect span + type of each markable
 
-    parser = etree.XMLParser(ns_clean=True)
-    cattree = etree.parse(catfile, parser)
+    cattree = etree.parse(catfile, cat_parser)
     markables = cattree.find('Markables')
     for markable in markables.findall('NAMEDENTITY'):
         etype = markable.get('type')
@@ -52,14 +58,25 @@ def collect_markables(catfile):
 
 
 def create_token_to_term_dict(nafobj):
+    '''
+    Function that maps every token to the term whose span it is in
+    Goes through the term layer once, without creating term and span objects
+    :param nafobj: KafNafParser object
+    :return: dictionary from token identifiers to term identifiers
+    '''
 
     tok2term = {}
 
-    for term in nafobj.get_terms():
-        tspan = term.get_span().get_span_ids()
-        for token in tspan:
+    term_layer = nafobj.root.find('terms')
+    if term_layer is None:
+        return tok2term
+    id_attribute = 'id' if nafobj.get_type() == 'NAF' else 'tid'
+    for term in term_layer.iterfind('term'):
+        term_id = term.get(id_attribute)
+        for target in term.iterfind('span/target'):
+            token = target.get('id')
             if not token in tok2term:
-                tok2term[token] = term.get_id()
+                tok2term[token] = term_id
             else:
                 print(token, 'part of multiple term spans')
     return tok2term
@@ -113,6 +130,98 @@ def convert_file(catfile, nafin, nafout):
     nafobj.dump(nafout)
 
 
+def files_by_name(directory):
+    '''
+    Function that maps the names without extension of the files in a directory to their paths
+    Names that occur more than once are left out
+    '''
+
+    files = {}
+    duplicates = set()
+    for f in sorted(os.listdir(directory)):
+        path = os.path.join(directory, f)
+        if not os.path.isfile(path):
+            continue
+        name = os.path.splitext(f)[0]
+        if name in files:
+            duplicates.add(name)
+        files[name] = path
+    for name in sorted(duplicates):
+        print('Warning: multiple files named', name, 'in', directory)
+        del files[name]
+    return files
+
+
+def pair_files(catdir, nafdir):
+    '''
+    Function that pairs the CAT and NAF files of two directories by their names without extension
+    :return: list of (name, catfile, naffile) and list of files without counterpart
+    '''
+
+    catfiles = files_by_name(catdir)
+    naffiles = files_by_name(nafdir)
+    pairs = []
+    unpaired = []
+    for name in sorted(set(catfiles) | set(naffiles)):
+        if name in catfiles and name in naffiles:
+            pairs.append((name, catfiles[name], naffiles[name]))
+        else:
+            unpaired.append(catfiles.get(name) or naffiles.get(name))
+    return pairs, unpaired
+
+
+def convert_file_timed(arguments):
+    '''
+    Function that converts one pair of files (in a worker) and reports how long it took or why it failed
+    :param arguments: name, catfile, naffile and outfile
+    :return: name, seconds and error message (None if the conversion succeeded)
+    '''
+
+    name, catfile, nafin, nafout = arguments
+    start = time.time()
+    try:
+        convert_file(catfile, nafin, nafout)
+        error = None
+    except Exception:
+        error = traceback.format_exc()
+    return name, time.time() - start, error
+
+
+def convert_directory(catdir, nafdir, outdir, jobs=1):
+    '''
+    Function that adds the entities of all CAT files in a directory to the NAF files with the same name (without extension) in another directory
+    The files are converted by a pool of jobs worker processes, which each import everything once
+    :param outdir: directory of the output files, which get the names of the NAF files
+    :return: number of converted and failed files
+    '''
+
+    pairs, unpaired = pair_files(catdir, nafdir)
+    for f in unpaired:
+        print('Warning: no CAT or NAF file to pair with', f)
+    if not os.path.isdir(outdir):
+        os.makedirs(outdir)
+    tasks = [(name, catfile, naffile, os.path.join(outdir, os.path.basename(naffile))) for name, catfile, naffile in pairs]
+
+    converted = 0
+    failed = 0
+    start = time.time()
+    pool = Pool(jobs) if jobs > 1 else None
+    try:
+        results = pool.imap_unordered(convert_file_timed, tasks) if pool else map(convert_file_timed, tasks)
+        for name, seconds, error in results:
+            if error is None:
+                converted += 1
+                print(name, 'converted in %.2f seconds' % seconds)
+            else:
+                failed += 1
+                print('Error: converting', name, 'failed after %.2f seconds' % seconds)
+                print(error)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    print(converted, 'files converted and', failed, 'failed in %.2f seconds' % (time.time() - start))
+    return converted, failed
 
 
 def main(argv=None):
@@ -122,6 +231,10 @@ def main(argv=None):
 
     if len(argv) < 4:
         print('Usage: python cat2naf_entities.py catfile.xml naffile.naf outfile.naf')
+        print('   or: python cat2naf_entities.py catdir nafdir outdir (jobs)')
+    elif os.path.isdir(argv[1]):
+        jobs = int(argv[4]) if len(argv) > 4 else 1
+        convert_directory(argv[1], argv[2], argv[3], jobs)
     else:
         convert_file(argv[1], argv[2], argv[3])
 
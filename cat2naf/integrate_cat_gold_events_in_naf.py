@@ -17,25 +17,35 @@ def create_tok_to_term_dict(nafobj):
     return tok2term
 
 
-def check_correspondance(events, coreferspan):
-    corefset = set(coreferspan)
+def index_events(events):
+    '''
+    Maps the set of terms of every event to the event, so spans can be matched by a dictionary lookup
+    :param events: list of events, where an event is a list of term identifiers
+    :return: dictionary from frozensets of term identifiers to events
+    '''
+    event_index = {}
     for event in events:
-        evset = set(event)
-        if len(corefset.symmetric_difference(evset)) == 0:
-            return evset
+        event_index.setdefault(frozenset(event), event)
+    return event_index
+
+
+def check_correspondance(event_index, coreferspan):
+    '''
+    Returns the set of terms of the event that has the same terms as the span (in any order) or an empty list
+    '''
+    corefset = frozenset(coreferspan)
+    if corefset in event_index:
+        return corefset
     return []
 
 
 def updated_events(events, found_events):
+    '''
+    Returns the events whose set of terms is not in found_events (a set of frozensets), in their original order
+    '''
     unfound_events = []
     for event in events:
-        evset = set(event)
-        found = False
-        for fevent in found_events:
-            fevset = set(fevent)
-            if len(fevset.symmetric_difference(evset)) == 0:
-                found = True
-        if not found:
+        if not frozenset(event) in found_events:
             unfound_events.append(event)
     return unfound_events
 
@@ -66,8 +76,10 @@ def integrate_catevents_into_naf(nafobj, cattree, nafout):
             terms.append(termId)
         events.append(terms)
 
+    event_index = index_events(events)
+
     #go through coreferences and remove events not in gold
-    found_events = []
+    found_events = set()
     removed = []
     
     coref_count = 1
@@ -78,9 +90,9 @@ def integrate_catevents_into_naf(nafobj, cattree, nafout):
             spans = coref.get_spans()
             for span in spans:
                 my_terms = span.get_span_ids()
-                matching_event = check_correspondance(events, my_terms)
+                matching_event = check_correspondance(event_index, my_terms)
                 if len(matching_event) > 0:
-                    found_events.append(matching_event)
+                    found_events.add(matching_event)
                     span_found = True
                 else:
                     coref.remove_span(span)
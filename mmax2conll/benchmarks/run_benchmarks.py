@@ -0,0 +1,206 @@
+#! /usr/bin/env python3
+"""
+Time and memory-profile the stages of converting synthetic MMAX documents to
+CoNLL.
+
+Every measurement is written as one JSON object per line, e.g.:
+
+    {"benchmark": "mmax2conll", "stage": "read", "tokens": 1000, ...}
+
+Run from the `mmax2conll` directory:
+
+    python benchmarks/run_benchmarks.py -n 1000 100000 1000000 -o bench.jsonl
+"""
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import tempfile
+import tracemalloc
+
+from lxml import etree
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mmax2conll import constants as c  # noqa: E402
+from mmax2conll.main import Main  # noqa: E402
+from mmax2conll.mmax_document_readers import MMAXCorefDocumentReader  # noqa
+from mmax2conll.conll_converters import MMAXCorefConverter  # noqa: E402
+from mmax2conll.conll_writers import CoNLLWriter  # noqa: E402
+
+from synthetic import write_document  # noqa: E402
+
+
+def measure(function, memory=True, repeat=1):
+    """
+    Call `function` `repeat` times and return the last result, the fastest
+    time in seconds and, if `memory`, the peak memory in bytes of an extra
+    call traced with `tracemalloc`.
+    """
+    seconds = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, seconds, peak
+
+
+def stages(words_file, coref_file, sentences_file, output_file,
+           columnar_words=False, use_numpy=False):
+    """
+    Yield `(stage name, function)` pairs for every stage of the conversion of
+    one document. Every function uses the results of the previous stages.
+    """
+    state = {}
+
+    def read():
+        state['document_id'], state['sentences'], state['word_index'] = \
+            Main.read_SoNaR(
+                words_file=words_file,
+                sentences_file=sentences_file,
+                columnar_words=columnar_words,
+            )
+
+    def chains():
+        chains = MMAXCorefDocumentReader(
+            words=state['word_index'],
+        ).extract_coref_sets(etree.parse(coref_file))
+        state['coref_sets'] = list(
+            MMAXCorefConverter.coref_sets_from_MMAX_chains(chains)
+        )
+
+    def converter():
+        return MMAXCorefConverter(
+            state['sentences'],
+            uniqueyfy=True,
+            fill_spans=True,
+            word_index=state['word_index'],
+            use_numpy=use_numpy,
+        )
+
+    def fill_spans():
+        state['filled_sets'], _ = converter().check_and_fill_spans(
+            state['coref_sets']
+        )
+
+    def uniqueyfy():
+        converter().uniqueyfy(state['filled_sets'])
+
+    def add_coref_data():
+        converter().add_data_from_coref_sets(state['coref_sets'])
+
+    def write():
+        Main.write_conll(
+            filename=output_file,
+            writer=CoNLLWriter(columns=c.CONLL_COLUMNS),
+            document_id=state['document_id'],
+            sentences=state['sentences'],
+        )
+
+    yield 'read', read
+    yield 'chains', chains
+    yield 'fill_spans', fill_spans
+    yield 'uniqueyfy', uniqueyfy
+    yield 'add_coref_data', add_coref_data
+    yield 'write', write
+
+
+def run(sizes, memory=True, repeat=1, seed=0, columnar_words=False,
+        use_numpy=False, **chain_kwargs):
+    """
+    Benchmark every stage for a synthetic document of every size in `sizes`.
+
+    Yields a dictionary for every measurement.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        for n_tokens in sizes:
+            name = f'synthetic_{n_tokens}'
+            *files, statistics = write_document(
+                directory,
+                name,
+                n_tokens,
+                seed=seed,
+                **chain_kwargs
+            )
+            output_file = os.path.join(directory, name + '.conll')
+            for stage, function in stages(*files, output_file,
+                                          columnar_words=columnar_words,
+                                          use_numpy=use_numpy):
+                _, seconds, peak = measure(function, memory, repeat)
+                yield dict(
+                    benchmark='mmax2conll',
+                    stage=stage,
+                    columnar_words=columnar_words,
+                    use_numpy=use_numpy,
+                    seconds=seconds,
+                    peak_memory=peak,
+                    python=platform.python_version(),
+                    **statistics,
+                    **chain_kwargs
+                )
+
+
+def main(cmdline_args=None):
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-n', '--tokens', type=int, nargs='+',
+                        default=[1000, 100000],
+                        help="Number of tokens of the synthetic documents")
+    parser.add_argument('-l', '--log-level', default='ERROR',
+                        help="Logging level")
+    parser.add_argument('-o', '--output',
+                        help="Append the results to this file instead of"
+                             " printing them")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="Report the fastest of this many runs")
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help="Do not measure the peak memory usage")
+    parser.add_argument('--columnar-words', action='store_true')
+    parser.add_argument('--use-numpy', action='store_true',
+                        help="Check the spans using NumPy")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mention-density', type=float, default=0.1)
+    parser.add_argument('--chain-size', type=float, default=5)
+    parser.add_argument('--max-span-length', type=int, default=4)
+    parser.add_argument('--gap-fraction', type=float, default=0.05)
+    args = parser.parse_args(cmdline_args)
+    logging.basicConfig(level=args.log_level)
+
+    results = run(
+        args.tokens,
+        memory=args.memory,
+        repeat=args.repeat,
+        seed=args.seed,
+        columnar_words=args.columnar_words,
+        use_numpy=args.use_numpy,
+        mention_density=args.mention_density,
+        chain_size=args.chain_size,
+        max_span_length=args.max_span_length,
+        gap_fraction=args.gap_fraction,
+    )
+    fd = open(args.output, 'a') if args.output else sys.stdout
+    try:
+        for result in results:
+            fd.write(json.dumps(result) + '\n')
+            fd.flush()
+    finally:
+        if fd is not sys.stdout:
+            fd.close()
+
+
+if __name__ == '__main__':
+    main()
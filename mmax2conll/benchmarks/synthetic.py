@@ -0,0 +1,189 @@
+#! /usr/bin/env python3
+"""
+Generate synthetic SoNaR-like MMAX documents of arbitrary size.
+
+Every document consists of a `Basedata/<name>_words.xml` file and
+`Markables/<name>_sentence_level.xml` and `Markables/<name>_np_level.xml`
+files, so a directory created by `write_document` can be converted using
+`config/SoNaR_config.yml`.
+"""
+import os
+import random
+from xml.sax.saxutils import quoteattr
+
+VOCABULARY = (
+    'de het een en van in is dat op te zijn met voor niet aan er om ook als'
+    ' bij door maar nog naar uit wel dan over tot zo kan dit wat al worden'
+    ' jaar Nederland regering mensen huis stad land werk tijd dag kinderen'
+).split()
+
+
+def generate_sentences(n_tokens, rng, min_length=3, max_length=30):
+    """
+    Generate `[(first word index, last word index + 1), ...]` for sentences
+    of random length containing exactly `n_tokens` words.
+    """
+    sentences = []
+    start = 0
+    while start < n_tokens:
+        stop = min(start + rng.randint(min_length, max_length), n_tokens)
+        sentences.append((start, stop))
+        start = stop
+    return sentences
+
+
+def generate_chains(n_tokens, rng, mention_density=0.1, chain_size=5,
+                    max_span_length=4, gap_fraction=0.0):
+    """
+    Generate coreference chains over `n_tokens` words.
+
+    :param mention_density: number of mentions per word
+    :param chain_size:      average number of mentions per chain
+    :param max_span_length: maximum number of words in a mention
+    :param gap_fraction:    fraction of mentions (of at least 3 words) that
+                            have a gap, i.e. are not consecutive
+    :return:                list of chains, where a chain is a list of
+                            mentions and a mention is a list of word indices
+    """
+    n_mentions = int(n_tokens * mention_density)
+    mentions = []
+    for _ in range(n_mentions):
+        length = rng.randint(1, min(max_span_length, n_tokens))
+        start = rng.randrange(n_tokens - length + 1)
+        span = list(range(start, start + length))
+        if length >= 3 and rng.random() < gap_fraction:
+            del span[rng.randrange(1, length - 1)]
+        mentions.append(span)
+
+    n_chains = max(1, round(n_mentions / chain_size)) if mentions else 0
+    chains = [[] for _ in range(n_chains)]
+    for mention in mentions:
+        chains[rng.randrange(n_chains)].append(mention)
+    return [chain for chain in chains if chain]
+
+
+def span_text(indices):
+    """
+    Abbreviate a list of word indices as an MMAX span specification
+    """
+    parts = []
+    first = prev = indices[0]
+    for index in indices[1:] + [None]:
+        if index is not None and index == prev + 1:
+            prev = index
+            continue
+        if first == prev:
+            parts.append(f'word_{first + 1}')
+        else:
+            parts.append(f'word_{first + 1}..word_{prev + 1}')
+        first = prev = index
+    return ','.join(parts)
+
+
+def write_words(filename, n_tokens, rng):
+    with open(filename, 'w') as fd:
+        fd.write(
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            "<!DOCTYPE words  SYSTEM 'words.dtd'><words>\n"
+        )
+        for index in range(n_tokens):
+            word = rng.choice(VOCABULARY)
+            fd.write(f'<word id="word_{index + 1}">{word}</word>\n')
+        fd.write('</words>\n')
+
+
+def write_sentences(filename, sentences):
+    with open(filename, 'w') as fd:
+        fd.write(
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            "<!DOCTYPE markables  SYSTEM 'markables.dtd'>"
+            '<markables xmlns="www.eml.org/NameSpaces/sentence">\n'
+        )
+        for number, (start, stop) in enumerate(sentences):
+            span = span_text(list(range(start, stop)))
+            fd.write(
+                f'<markable id="markable_{number}" mmax_level="sentence"'
+                f' span="{span}"/>\n'
+            )
+        fd.write('</markables>\n')
+
+
+def write_coref(filename, chains):
+    with open(filename, 'w') as fd:
+        fd.write(
+            '<?xml version="1.0" encoding="UTF-8"?>'
+            "<!DOCTYPE markables  SYSTEM 'markables.dtd'>"
+            '<markables xmlns="www.eml.org/NameSpaces/np">\n'
+        )
+        number = 0
+        for chain in chains:
+            ref = 'empty'
+            for mention in chain:
+                number += 1
+                ID = f'markable_{number}'
+                fd.write(
+                    f'<markable id="{ID}" level="reference" mmax_level="np"'
+                    f' ref={quoteattr(ref)} span="{span_text(mention)}"'
+                    ' type="ident"/>\n'
+                )
+                ref = ID
+        fd.write('</markables>\n')
+
+
+def write_document(directory, name, n_tokens, seed=0, **chain_kwargs):
+    """
+    Write a synthetic MMAX document to `directory`, which is created if it
+    does not exist.
+
+    Returns a `(words file, coref file, sentences file, statistics)` tuple.
+    """
+    rng = random.Random(seed)
+    basedata_dir = os.path.join(directory, 'Basedata')
+    markables_dir = os.path.join(directory, 'Markables')
+    os.makedirs(basedata_dir, exist_ok=True)
+    os.makedirs(markables_dir, exist_ok=True)
+
+    words_file = os.path.join(basedata_dir, name + '_words.xml')
+    sentences_file = os.path.join(markables_dir, name + '_sentence_level.xml')
+    coref_file = os.path.join(markables_dir, name + '_np_level.xml')
+
+    sentences = generate_sentences(n_tokens, rng)
+    chains = generate_chains(n_tokens, rng, **chain_kwargs)
+    write_words(words_file, n_tokens, rng)
+    write_sentences(sentences_file, sentences)
+    write_coref(coref_file, chains)
+
+    statistics = {
+        'tokens': n_tokens,
+        'sentences': len(sentences),
+        'mentions': sum(map(len, chains)),
+        'chains': len(chains),
+    }
+    return words_file, coref_file, sentences_file, statistics
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(
+        description="Generate a synthetic SoNaR-like MMAX document"
+    )
+    parser.add_argument('directory')
+    parser.add_argument('-n', '--tokens', type=int, default=1000)
+    parser.add_argument('--name', default='synthetic')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mention-density', type=float, default=0.1)
+    parser.add_argument('--chain-size', type=float, default=5)
+    parser.add_argument('--max-span-length', type=int, default=4)
+    parser.add_argument('--gap-fraction', type=float, default=0.0)
+    args = parser.parse_args()
+    print(write_document(
+        args.directory,
+        args.name,
+        args.tokens,
+        seed=args.seed,
+        mention_density=args.mention_density,
+        chain_size=args.chain_size,
+        max_span_length=args.max_span_length,
+        gap_fraction=args.gap_fraction,
+    )[-1])
@@ -0,0 +1,239 @@
+from collections.abc import Sequence, MutableMapping
+
+
+class ColumnarSentences:
+    """
+    Stores the words of a sequence of sentences as one list per field (a
+    column) instead of as one dictionary per word.
+
+    `offsets[i]` is the index of the first word of sentence `i` and
+    `offsets[-1]` is the total number of words. A value of `None` in a column
+    means that the word does not have that field.
+
+    Iterating over this object yields `ColumnarSentence` views, which behave
+    like lists of word dictionaries, so code that expects lists of word
+    dictionaries keeps working. Code that handles a lot of words should use
+    the columns directly.
+    """
+
+    def __init__(self, columns=None, offsets=None):
+        self.columns = columns if columns is not None else {}
+        self.offsets = offsets if offsets is not None else [0]
+
+    @classmethod
+    def from_sentences(cls, sentences):
+        """
+        Create from a sequence of sentences, where a sentence is a list of
+        word dictionaries.
+        """
+        store = cls()
+        for sentence in sentences:
+            for word in sentence:
+                store.append_word(word)
+            store.offsets.append(store.word_count)
+        return store
+
+    @classmethod
+    def from_words(cls, words):
+        """
+        Create from a collection of word dictionaries, putting all words in a
+        single sentence.
+        """
+        store = cls()
+        for word in words:
+            store.append_word(word)
+        store.offsets.append(store.word_count)
+        return store
+
+    def regroup(self, sentence_items, word_index=None):
+        """
+        Create new `ColumnarSentences` with the words of these sentences split
+        into sentences using the IDs in `sentence_item['span']` of a sequence
+        of sentence items.
+
+        `word_index` is the `.word_index.WordIndex` of the words of these
+        sentences, which is created if it is `None`.
+
+        The columnar equivalent of
+        `.mmax_document_readers.add_sentence_layer_to_words`.
+        """
+        if word_index is not None:
+            indices = word_index.indices
+        else:
+            indices = {ID: index for index, ID in enumerate(self.column('id'))}
+        order = []
+        offsets = [0]
+        for sentence_item in sentence_items:
+            for ID in sentence_item['span']:
+                try:
+                    order.append(indices[ID])
+                except KeyError as e:
+                    raise ValueError(
+                        f"Unknown word ID ({ID!r}) in sentence:"
+                        f" {sentence_item}"
+                    ) from e
+            offsets.append(len(order))
+        del indices
+
+        # Only reorder the columns if the sentences do not simply contain all
+        # words in their original order
+        if len(order) == self.offsets[-1] and \
+           all(i == index for i, index in enumerate(order)):
+            columns = self.columns.copy()
+        else:
+            columns = {
+                name: [column[index] for index in order]
+                for name, column in self.columns.items()
+            }
+        return type(self)(columns, offsets)
+
+    def append_word(self, word):
+        """
+        Add the fields of a word dictionary as the last word of the last
+        sentence.
+
+        !! NB !! Does not update `self.offsets`.
+        """
+        count = self.word_count
+        for key, value in word.items():
+            column = self.columns.get(key)
+            if column is None:
+                column = self.columns[key] = [None] * count
+            column.append(value)
+        count += 1
+        for column in self.columns.values():
+            if len(column) < count:
+                column.append(None)
+
+    @property
+    def word_count(self):
+        """
+        The number of words, including those not yet in a sentence.
+        """
+        return max(map(len, self.columns.values()), default=0)
+
+    def column(self, name):
+        """
+        Get the list of values of a field, creating it if it does not exist.
+        """
+        column = self.columns.get(name)
+        if column is None:
+            column = self.columns[name] = [None] * self.offsets[-1]
+        return column
+
+    def add_word_numbers(self):
+        """
+        Add word numbers in place
+        """
+        self.columns['word_number'] = [
+            number
+            for start, stop in zip(self.offsets, self.offsets[1:])
+            for number in range(stop - start)
+        ]
+
+    def words(self):
+        """
+        Iterate over `ColumnarWord` views of all words in all sentences.
+        """
+        return (ColumnarWord(self, index) for index in range(self.offsets[-1]))
+
+    def to_sentences(self):
+        """
+        Convert to a list of sentences, where a sentence is a list of word
+        dictionaries.
+        """
+        return [list(map(dict, sentence)) for sentence in self]
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("sentence index out of range")
+        return ColumnarSentence(self, index)
+
+    def __iter__(self):
+        return (ColumnarSentence(self, index) for index in range(len(self)))
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_sentences()!r})"
+
+
+class ColumnarSentence(Sequence):
+    """
+    A view on one sentence of `ColumnarSentences` that behaves like a list of
+    word dictionaries.
+    """
+    __slots__ = ('store', 'start', 'stop')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.start = store.offsets[index]
+        self.stop = store.offsets[index + 1]
+
+    def column(self, name):
+        """
+        Get a new list with the values of a field for the words of this
+        sentence.
+        """
+        column = self.store.columns.get(name)
+        if column is None:
+            return [None] * len(self)
+        return column[self.start:self.stop]
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("word index out of range")
+        return ColumnarWord(self.store, self.start + index)
+
+    def __repr__(self):
+        return repr(list(map(dict, self)))
+
+
+class ColumnarWord(MutableMapping):
+    """
+    A view on one word of `ColumnarSentences` that behaves like a word
+    dictionary.
+    """
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        self.store = store
+        self.index = index
+
+    def __getitem__(self, key):
+        column = self.store.columns.get(key)
+        if column is None or column[self.index] is None:
+            raise KeyError(key)
+        return column[self.index]
+
+    def __setitem__(self, key, value):
+        self.store.column(key)[self.index] = value
+
+    def __delitem__(self, key):
+        self[key]
+        self.store.columns[key][self.index] = None
+
+    def __iter__(self):
+        return (
+            key
+            for key, column in self.store.columns.items()
+            if column[self.index] is not None
+        )
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return repr(dict(self))
@@ -1,12 +1,35 @@
 import logging
 import itertools as it
+from operator import itemgetter
 from collections import Counter
 
 from . import constants as c
+from .columnar import ColumnarSentences
+from .word_index import WordIndex, WordSpan
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
 
 logger = logging.getLogger(None if __name__ == '__main__' else __name__)
 
 
+class SortKeyCache(dict):
+    """
+    Maps word IDs to their sort key, calling the sort key function only once
+    for every word ID.
+    """
+
+    def __init__(self, sort_key):
+        super().__init__()
+        self.sort_key = sort_key
+
+    def __missing__(self, ID):
+        key = self[ID] = self.sort_key(ID)
+        return key
+
+
 class CorefConverter:
     """
     Convert coreference information to a format writeable by
@@ -15,15 +38,32 @@ class CorefConverter:
 
     def __init__(self, sentences, uniqueyfy=c.UNIQUEYFY,
                  fill_spans=c.FILL_NON_CONSECUTIVE_COREF_SPANS,
-                 sort_key=c.MMAX_SAFE_POSITION_FROM_ID):
+                 sort_key=c.MMAX_SAFE_POSITION_FROM_ID,
+                 word_index=None,
+                 use_numpy=c.USE_NUMPY):
+        """
+        `word_index` is the `.word_index.WordIndex` of the words of
+        `sentences`, which is created if it is `None`.
+
+        If `use_numpy`, NumPy is used to find the consecutive spans of all
+        reference sets at once, which is faster for documents with a lot of
+        mentions. Raises an ImportError if NumPy is not installed.
+        """
+        if use_numpy and np is None:
+            raise ImportError(
+                "NumPy is needed to check the spans with `use_numpy`"
+            )
+        self.use_numpy = use_numpy
         self.sentences = sentences
         self.should_uniqueyfy = uniqueyfy
         self.should_fill_spans = fill_spans
         self.sort_key = sort_key
-        self.word_ids = [word['id'] for word in it.chain(*sentences)]
-        self.word_indices = dict(
-            (ID, i) for i, ID in enumerate(self.word_ids)
-        )
+        self.sort_keys = SortKeyCache(sort_key)
+        self.word_index = word_index \
+            if word_index is not None \
+            else WordIndex.from_sentences(sentences)
+        self.word_ids = self.word_index.ids
+        self.word_indices = self.word_index.indices
 
     @staticmethod
     def uniqueyfy(sets):
@@ -55,25 +95,21 @@ class CorefConverter:
             for span in (s for s in refcounts.elements() if refcounts[c] > 1):
                 logger.debug(f"Discarding duplicate reference: {span}")
         # Check for spans that are in multiple reference sets
-        extra = sorted((sp, rs) for sp, rs in all_spans.items() if len(rs) > 1)
-        for span, sets in extra:
-            biggest = max(sets)
-            others = sets - {biggest}
-            if all(biggest > refset for refset in others):
-                logger.debug(
-                    "Discarding reference sets that are strictly smaller than"
-                    f" another: {sorted(others)}"
-                )
-                all_refsets -= others
-            else:
-                uncomparable = {
-                    refset - {span}
-                    for refset in sets
-                    if any(
-                        not refset > rs and not rs > refset
-                        for rs in sets
+        extra = sorted(sp for sp, rs in all_spans.items() if len(rs) > 1)
+        is_subset = {}
+        for span in extra:
+            sets = all_spans[span]
+            biggest = CorefConverter.find_strict_superset(sets, is_subset)
+            if biggest is not None:
+                others = sets - {biggest}
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(
+                        "Discarding reference sets that are strictly smaller"
+                        f" than another: {sorted(others)}"
                     )
-                }
+                all_refsets -= others
+            elif logger.isEnabledFor(logging.WARNING):
+                uncomparable = {refset - {span} for refset in sets}
                 logger.warn(
                     "Span in multiple reference sets that are quite different:"
                     f" {span}. Sets: {sorted(map(sorted, uncomparable))}"
@@ -87,6 +123,40 @@ class CorefConverter:
 
         return all_refsets
 
+    @staticmethod
+    def find_strict_superset(refsets, is_subset):
+        """
+        Find the reference set that is a strict superset of all other
+        reference sets in `refsets`, or return `None` if there is none.
+
+        Only such a superset can be strictly larger than all others, so only
+        the subset relations of the other sets with the largest set are
+        checked. `is_subset` is a `{(smaller, larger): bool}` cache of these
+        checks, to share between calls, so every pair of reference sets is
+        compared at most once.
+        """
+        biggest = None
+        size = -1
+        unique = False
+        for refset in refsets:
+            if len(refset) > size:
+                biggest, size, unique = refset, len(refset), True
+            elif len(refset) == size:
+                unique = False
+        if not unique:
+            return None
+
+        for refset in refsets:
+            if refset is biggest:
+                continue
+            key = (refset, biggest)
+            subset = is_subset.get(key)
+            if subset is None:
+                subset = is_subset[key] = refset < biggest
+            if not subset:
+                return None
+        return biggest
+
     def check_and_fill_spans(self, sets):
         """
         Find spans that are not consecutive.
@@ -100,12 +170,31 @@ class CorefConverter:
 
         :return:    list of tuples of word IDs, span: word IDs
         """
+        consecutive = None
+        if self.use_numpy:
+            # Spans of `self.word_index` already know whether they are
+            # consecutive
+            sets = [list(refset) for refset in sets]
+            consecutive = iter(self.find_consecutive_spans([
+                span
+                for refset in sets
+                for span in refset
+                if not self.is_indexed_span(span)
+            ]).tolist())
+
         out = []
         problem_map = {}
         for refset in sets:
             new_refset = []
             out.append(new_refset)
             for span in refset:
+                if self.is_indexed_span(span):
+                    if span.is_consecutive():
+                        new_refset.append(tuple(span))
+                        continue
+                elif consecutive is not None and next(consecutive):
+                    new_refset.append(tuple(span))
+                    continue
                 correct_span = tuple(self.get_correct_span(span))
                 span = tuple(span)
                 if span != correct_span:
@@ -124,6 +213,47 @@ class CorefConverter:
                 new_refset.append(span)
         return out, problem_map
 
+    def is_indexed_span(self, span):
+        """
+        Whether `span` is a `.word_index.WordSpan` of `self.word_index`.
+        """
+        return isinstance(span, WordSpan) and \
+            span.word_index is self.word_index
+
+    def find_consecutive_spans(self, spans):
+        """
+        Check for every span in a list of spans whether it is a consecutive
+        collection of known words, using NumPy.
+
+        Spans that are not are checked again by `check_and_fill_spans`, which
+        also finds out which words are missing or raises the same errors as
+        when NumPy is not used.
+
+        :return:    a NumPy array of booleans, one for every span
+        """
+        indices = self.word_indices
+        lengths = np.fromiter(map(len, spans), dtype=np.intp, count=len(spans))
+        # Unknown words get position -1
+        positions = np.fromiter(
+            map(indices.get, it.chain.from_iterable(spans), it.repeat(-1)),
+            dtype=np.intp,
+            count=int(lengths.sum())
+        )
+        starts = np.zeros(len(spans) + 1, dtype=np.intp)
+        np.cumsum(lengths, out=starts[1:])
+
+        # Count the unknown words and the steps between subsequent words of
+        # size other than 1 up to every position, to count them per span
+        unknown = np.zeros(len(positions) + 1, dtype=np.intp)
+        np.cumsum(positions < 0, out=unknown[1:])
+        gaps = np.zeros(max(len(positions), 1) + 1, dtype=np.intp)
+        np.cumsum(np.diff(positions) != 1, out=gaps[2:])
+
+        last = np.maximum(starts[1:] - 1, 0)
+        return (lengths > 0) & \
+            (unknown[starts[1:]] == unknown[starts[:-1]]) & \
+            (gaps[last + 1] == gaps[np.minimum(starts[:-1] + 1, last + 1)])
+
     def word_id_map_from_coref_sets(self, sets):
         """
         Extract a `{word_id: [(reference ID, position), ...]}` map from a
@@ -150,19 +280,21 @@ class CorefConverter:
         word_id_map = {}
         word_problem_map = {}
 
-        sorted_sets = sorted(
-            map(
-                lambda refset: sorted(
-                    refset,
-                    key=lambda span: tuple(map(self.sort_key, span))
-                ),
-                sets
-            ),
-            key=lambda refset: tuple(map(
-                lambda span: tuple(map(self.sort_key, span)),
-                refset
+        # Compute the key of every span once and sort the spans within every
+        # reference set and then the reference sets by these keys
+        sort_keys = self.sort_keys.__getitem__
+        keyed_sets = []
+        for refset in sets:
+            keyed_refset = sorted(
+                ((tuple(map(sort_keys, span)), span) for span in refset),
+                key=itemgetter(0)
+            )
+            keyed_sets.append((
+                tuple(map(itemgetter(0), keyed_refset)),
+                list(map(itemgetter(1), keyed_refset))
             ))
-        )
+        keyed_sets.sort(key=itemgetter(0))
+        sorted_sets = map(itemgetter(1), keyed_sets)
 
         # Randomly create a reference ID for every reference refset
         for refID, refset in enumerate(sorted_sets):
@@ -227,7 +359,9 @@ class CorefConverter:
 
         !! NB !! Changes data in-place.
 
-        Assumes every word has an ID stored in 'id'.
+        Assumes every word has an ID stored in 'id'. `self.sentences` may also
+        be `.columnar.ColumnarSentences`, in which case the 'coref' and
+        'problem' columns are filled.
         """
         id_map, problem_map = self.word_id_map_from_coref_sets(coref_sets)
 
@@ -245,6 +379,16 @@ class CorefConverter:
                     f" {pos}"
                 )
 
+        if isinstance(self.sentences, ColumnarSentences):
+            coref = self.sentences.column('coref')
+            problem = self.sentences.column('problem')
+            for index, ID in enumerate(self.word_ids):
+                if ID in id_map:
+                    coref[index] = '|'.join(it.starmap(ref_to_str, id_map[ID]))
+                if ID in problem_map:
+                    problem[index] = '|'.join(map(str, problem_map[ID]))
+            return
+
         for sentence in self.sentences:
             for word in sentence:
                 if word['id'] in id_map:
@@ -0,0 +1,272 @@
+import re
+import logging
+
+from . import constants as c
+from .columnar import ColumnarSentences
+
+logger = logging.getLogger(None if __name__ == '__main__' else __name__)
+
+PART_START = re.compile(r'#begin document \((.*)\); part (\d+)$')
+PART_END = '#end document'
+VALUE = re.compile(r'\S+')
+
+
+class CoNLLPart:
+    """
+    The data of one part of a CoNLL file.
+
+    `sentences` is a list of sentences, where every sentence is a list of
+    word dictionaries, or `.columnar.ColumnarSentences`. `chains` maps every
+    coreference chain ID to its mentions, in the order in which the mentions
+    end. A mention is a `(first, last)` tuple of the positions of its first
+    and last word among all words of the part.
+    """
+    __slots__ = ('document_id', 'part_number', 'sentences', 'chains')
+
+    def __init__(self, document_id, part_number, sentences, chains):
+        self.document_id = document_id
+        self.part_number = part_number
+        self.sentences = sentences
+        self.chains = chains
+
+    def __repr__(self):
+        return (
+            f"{type(self).__name__}({self.document_id!r},"
+            f" {self.part_number!r}, {self.sentences!r}, {self.chains!r})"
+        )
+
+
+class CoNLLReader:
+    """
+    Read data in CoNLL format as written by `.conll_writers.CoNLLWriter`.
+
+    `columns` and `min_column_spacing` should be the same as those of the
+    writer. All values are read as strings. Because the columns are right
+    aligned per sentence, empty values are found using the positions of the
+    other values in the same sentence.
+
+    The coreference column is parsed into chains while reading, so a file is
+    read in one pass and only one part is in memory at a time.
+    """
+
+    def __init__(self, columns=c.CONLL_COLUMNS,
+                 min_column_spacing=c.MIN_COLUMN_SPACING,
+                 columnar=False):
+        if min_column_spacing < 1:
+            raise ValueError(
+                "Columns can only be read if `min_column_spacing` is at least"
+                f" 1, but it is {min_column_spacing!r}"
+            )
+        self.columns = columns
+        self.min_column_spacing = min_column_spacing
+        self.columnar = columnar
+
+    def read(self, readable):
+        """
+        Yield a `CoNLLPart` for every part in an iterable of lines, e.g. a
+        file opened for reading.
+        """
+        part = None
+        sentence = []
+        for number, line in enumerate(readable, 1):
+            line = line.rstrip('\r\n')
+            if part is None:
+                match = PART_START.match(line)
+                if match is not None:
+                    part = self.start_part(
+                        match.group(1),
+                        int(match.group(2))
+                    )
+                elif line:
+                    raise ValueError(
+                        f"Line {number} is not part of a document: {line!r}"
+                    )
+            elif line == PART_END:
+                if sentence:
+                    self.add_sentence(part, sentence)
+                    sentence = []
+                yield self.end_part(part)
+                part = None
+            elif line:
+                sentence.append(line)
+            elif sentence:
+                self.add_sentence(part, sentence)
+                sentence = []
+        if part is not None:
+            raise ValueError(
+                f"Part {part['part_number']} of document"
+                f" {part['document_id']!r} does not end"
+            )
+
+    def read_file(self, filename):
+        """
+        Yield a `CoNLLPart` for every part in a CoNLL file.
+        """
+        with open(filename) as fd:
+            yield from self.read(fd)
+
+    def start_part(self, document_id, part_number):
+        """
+        Create the state that `add_sentence` adds to.
+        """
+        return {
+            'document_id': document_id,
+            'part_number': part_number,
+            'sentences': ColumnarSentences() if self.columnar else [],
+            'word_count': 0,
+            'chains': {},
+            'open': {},
+        }
+
+    def end_part(self, part):
+        """
+        Create the `CoNLLPart` from the state of a finished part.
+        """
+        for chain_id, starts in part['open'].items():
+            if starts:
+                raise ValueError(
+                    f"Mention of chain {chain_id} at word {starts[-1]} of"
+                    f" part {part['part_number']} of document"
+                    f" {part['document_id']!r} does not end"
+                )
+        return CoNLLPart(
+            part['document_id'],
+            part['part_number'],
+            part['sentences'],
+            part['chains'],
+        )
+
+    def add_sentence(self, part, lines):
+        """
+        Parse the rows of a sentence and add it to `part`.
+        """
+        values = self.split_rows(part['document_id'], lines)
+        if 'coref' in self.columns:
+            self.add_mentions(
+                part,
+                values[self.columns.index('coref')]
+            )
+        part['word_count'] += len(lines)
+
+        sentences = part['sentences']
+        if self.columnar:
+            count = sentences.offsets[-1]
+            for column, column_values in zip(self.columns, values):
+                sentences.column(column).extend(column_values)
+            for column in sentences.columns.values():
+                if len(column) == count:
+                    column.extend([None] * len(lines))
+            sentences.offsets.append(count + len(lines))
+        else:
+            sentences.append([
+                dict(zip(self.columns, row))
+                for row in zip(*values)
+            ])
+
+    def split_rows(self, document_id, lines):
+        """
+        Get the list of values of every column in the rows of a sentence.
+        """
+        prefix = len(document_id)
+        rows = []
+        for line in lines:
+            if not line.startswith(document_id):
+                raise ValueError(
+                    f"Row of document {document_id!r} does not start with"
+                    f" its document ID: {line!r}"
+                )
+            rows.append(line[prefix:])
+
+        # Fast path: no empty values
+        split = [row.split() for row in rows]
+        if all(len(row) == len(self.columns) for row in split):
+            return [list(column) for column in zip(*split)]
+
+        slices = self.column_slices(rows)
+        return [
+            [row[start:stop].lstrip() for row in rows]
+            if start is not None else [''] * len(rows)
+            for start, stop in slices
+        ]
+
+    def column_slices(self, rows):
+        """
+        Find the `(start, stop)` of the values of every column in the rows of
+        a sentence, or `(None, None)` for columns that are empty in every row.
+
+        Every column is `self.min_column_spacing` characters wider than its
+        longest value, so the start of the longest value of a column is also
+        the start of the column plus the spacing.
+        """
+        starts = {}
+        for row in rows:
+            for match in VALUE.finditer(row):
+                stop = match.end()
+                start = starts.get(stop)
+                if start is None or match.start() < start:
+                    starts[stop] = match.start()
+
+        spacing = self.min_column_spacing
+        slices = []
+        position = 0
+        for stop in sorted(starts):
+            start = starts[stop]
+            empty, remainder = divmod(start - spacing - position, spacing)
+            if remainder or empty < 0:
+                raise ValueError(f"Cannot find the columns of: {rows!r}")
+            slices.extend([(None, None)] * empty)
+            slices.append((position, stop))
+            position = stop
+        slices.extend([(None, None)] * (len(self.columns) - len(slices)))
+        if len(slices) != len(self.columns):
+            raise ValueError(
+                f"Expected {len(self.columns)} columns in: {rows!r}"
+            )
+        return slices
+
+    @staticmethod
+    def add_mentions(part, values):
+        """
+        Add the mentions that end in the coreference values of a sentence to
+        the chains of `part`.
+
+        A mention that starts at a word is pushed on the stack of its chain
+        and the latest mention on that stack ends at the first word that
+        ends a mention of that chain.
+        """
+        chains = part['chains']
+        open_mentions = part['open']
+        position = part['word_count']
+        for position, value in enumerate(values, position):
+            if value == '-' or not value:
+                continue
+            for item in value.split('|'):
+                try:
+                    if item[0] == '(' and item[-1] == ')':
+                        chain_id = int(item[1:-1])
+                        chains.setdefault(chain_id, []).append(
+                            (position, position)
+                        )
+                    elif item[0] == '(':
+                        open_mentions.setdefault(int(item[1:]), []).append(
+                            position
+                        )
+                    elif item[-1] == ')':
+                        chain_id = int(item[:-1])
+                        start = open_mentions.get(chain_id)
+                        if not start:
+                            raise ValueError(
+                                f"Mention of chain {chain_id} ends at word"
+                                f" {position}, but does not start"
+                            )
+                        chains.setdefault(chain_id, []).append(
+                            (start.pop(), position)
+                        )
+                    else:
+                        raise ValueError(f"Invalid coreference: {value!r}")
+                except (IndexError, ValueError) as e:
+                    raise ValueError(
+                        f"{e.args[0] if e.args else 'Invalid coreference'}"
+                        f" in part {part['part_number']} of document"
+                        f" {part['document_id']!r}"
+                    ) from e
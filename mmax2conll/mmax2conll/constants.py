@@ -1,7 +1,11 @@
 # Config defaults
 DEFAULT_CONFIG_FILE = './default_config.yml'
 MIN_COLUMN_SPACING = 3
+CONLL_BUFFERING = 'sentence'
 VALIDATE_XML = True
+STREAM_WORDS_XML = True
+COLUMNAR_WORDS = False
+USE_NUMPY = False
 UNIQUEYFY = True
 FILL_NON_CONSECUTIVE_COREF_SPANS = False
 AUTO_USE_MED_ITEM_READER = False
@@ -20,7 +24,15 @@ MARKABLES_DIR = 'Markables'
 COREF_FILES_EXTENSION = '_np_level.xml'             # for SoNaR
 SENTENCES_FILES_EXTENSION = '_sentence_level.xml'   # for SoNaR
 LOG_ON_ERROR = False
+JOBS = 1
+MANIFEST_FILE = None
+MANIFEST_SAVE_INTERVAL = 10  # seconds
 DIRS_TO_IGNORE = {'Configuration'}
+PARTIAL_FILE_SUFFIX = '.part'
+HASH_CHUNK_SIZE = 1 << 20
+SHARDS = 1
+INDEX_SUFFIX = '.index'
+OUTPUT_BUFFER_SIZE = 1 << 20
 
 CONLL_COLUMNS = [
     'part_number',
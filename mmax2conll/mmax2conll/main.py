@@ -1,8 +1,10 @@
 #! /usr/bin/env python3
 
+import io
 import os
+import pickle
 import logging
-import itertools as it
+import multiprocessing
 
 from lxml import etree
 
@@ -19,11 +21,53 @@ from mmax2conll.mmax_document_readers import (
     MMAXCorefDocumentReader,
 )
 from mmax2conll.mmax_item_readers import COREAMedWordReader
+from mmax2conll.columnar import ColumnarSentences
+from mmax2conll.word_index import WordIndex
 from mmax2conll.conll_converters import MMAXCorefConverter
-from mmax2conll.conll_writers import CoNLLWriter
+from mmax2conll.conll_writers import CoNLLWriter, ConcatenatedOutput
+from mmax2conll.manifest import Manifest, hash_config
 
 logger = logging.getLogger(None if __name__ == '__main__' else __name__)
 
+# Keyword arguments for `single_main`, set once per worker process by
+# `_init_worker`
+_worker_kwargs = {}
+
+
+def _init_worker(main, kwargs):
+    """
+    Store the class and keyword arguments used by `_convert_in_worker`.
+
+    These are inherited by the forked worker processes instead of being
+    pickled, because the configured filters are lambdas.
+    """
+    _worker_kwargs['main'] = main
+    _worker_kwargs['kwargs'] = kwargs
+
+
+def _convert_in_worker(files):
+    """
+    Call `single_main` with `files` as positional arguments in a worker
+    process.
+
+    Returns a `(result, exception)` pair instead of raising the exception,
+    so the parent process can decide whether to log or re-raise it.
+    Exceptions that cannot be pickled (e.g. `lxml.etree.XMLSyntaxError`) are
+    replaced by an `Exception` with the same arguments.
+    """
+    try:
+        result = _worker_kwargs['main'].single_main(
+            *files,
+            **_worker_kwargs['kwargs']
+        )
+    except Exception as e:
+        try:
+            pickle.dumps(e)
+        except Exception:
+            e = Exception(*e.args)
+        return None, e
+    return result, None
+
 
 class Main:
     @classmethod
@@ -59,46 +103,104 @@ class Main:
                 )
 
     @classmethod
-    def super_dir_main(cls, directories, output_dir,
+    def super_dir_main(cls, directories, output_dir=None,
                        basedata_dir=c.WORDS_DIR,
                        markables_dir=c.MARKABLES_DIR,
                        dirs_to_ignore=c.DIRS_TO_IGNORE,
                        allow_overwriting=c.ALLOW_OVERWRITING,
+                       manifest_file=c.MANIFEST_FILE,
+                       config_hash=None,
+                       output_file=None,
+                       shards=c.SHARDS,
                        **kwargs):
+        """
+        Batch convert all data directories found in `directories`.
+
+        If `output_file` is given, all documents are written to that file, or
+        to `shards` files, using a `.conll_writers.ConcatenatedOutput` instead
+        of to one file per document in `output_dir`.
+
+        Unless `manifest_file` is `None`, the converted documents are recorded
+        in a `.manifest.Manifest` saved as `manifest_file` and documents whose
+        input files and configuration did not change since they were
+        recorded are skipped. `config_hash` identifies the configuration and
+        is calculated from the other arguments if it is `None`.
+        """
         logger.debug(f"output_dir: {output_dir}")
-        for directory in directories:
-            data_dirs = sorted(cls.find_data_dirs(
-                directory=directory,
-                basedata_dir=basedata_dir,
-                markables_dir=markables_dir,
-                dirs_to_ignore=dirs_to_ignore
-            ))
-            for data_dir in data_dirs:
-                cur_output_dir = os.path.join(
-                    output_dir,
-                    data_dir[len(directory):]
+        logger.debug(f"output_file: {output_file}")
+        manifest = None
+        if manifest_file is not None:
+            if output_file is not None:
+                raise ValueError(
+                    "A manifest cannot be used when concatenating the output"
                 )
-                if not allow_overwriting and os.path.exists(cur_output_dir):
-                    logger.warn(
-                        f"Merging output converted from {data_dir} into"
-                        f" {cur_output_dir}"
-                    )
-                else:
-                    logger.debug(f"Creating: {cur_output_dir}")
-                    os.makedirs(cur_output_dir, exist_ok=True)
-                    logger.info(
-                        f"Saving data converted from {data_dir} in"
-                        f" {cur_output_dir}"
-                    )
-
-                cls.dir_main(
-                    input_dir=data_dir,
-                    output_dir=cur_output_dir,
+            manifest = Manifest.load(manifest_file)
+            if config_hash is None:
+                config_hash = hash_config(dict(
+                    kwargs,
                     basedata_dir=basedata_dir,
                     markables_dir=markables_dir,
-                    allow_overwriting=allow_overwriting,
-                    **kwargs
-                )
+                ))
+        output = None
+        if output_file is not None:
+            output = ConcatenatedOutput(output_file, shards)
+        try:
+            for directory in directories:
+                data_dirs = sorted(cls.find_data_dirs(
+                    directory=directory,
+                    basedata_dir=basedata_dir,
+                    markables_dir=markables_dir,
+                    dirs_to_ignore=dirs_to_ignore
+                ))
+                for data_dir in data_dirs:
+                    cur_output_dir = None
+                    if output is None:
+                        cur_output_dir = cls.create_output_dir(
+                            data_dir,
+                            os.path.join(
+                                output_dir,
+                                data_dir[len(directory):]
+                            ),
+                            allow_overwriting
+                        )
+
+                    cls.dir_main(
+                        input_dir=data_dir,
+                        output_dir=cur_output_dir,
+                        basedata_dir=basedata_dir,
+                        markables_dir=markables_dir,
+                        allow_overwriting=allow_overwriting,
+                        manifest=manifest,
+                        config_hash=config_hash,
+                        output=output,
+                        **kwargs
+                    )
+        except BaseException:
+            if output is not None:
+                output.close(discard=True)
+            raise
+        if output is not None:
+            output.close()
+
+    @classmethod
+    def create_output_dir(cls, data_dir, output_dir, allow_overwriting):
+        """
+        Create the directory to save the data converted from `data_dir` in.
+
+        Returns `output_dir`.
+        """
+        if not allow_overwriting and os.path.exists(output_dir):
+            logger.warn(
+                f"Merging output converted from {data_dir} into"
+                f" {output_dir}"
+            )
+        else:
+            logger.debug(f"Creating: {output_dir}")
+            os.makedirs(output_dir, exist_ok=True)
+            logger.info(
+                f"Saving data converted from {data_dir} in {output_dir}"
+            )
+        return output_dir
 
     @classmethod
     def dir_main(cls, input_dir, output_dir,
@@ -110,10 +212,24 @@ class Main:
                  coref_files_extension=c.COREF_FILES_EXTENSION,
                  sentences_files_extension=c.SENTENCES_FILES_EXTENSION,
                  log_on_error=c.LOG_ON_ERROR,
+                 jobs=c.JOBS,
+                 manifest=None,
+                 config_hash=None,
+                 output=None,
                  **kwargs):
         """
         Batch convert all files in a directory containing a `basedata_dir` and
         `markables_dir` directory as direct children.
+
+        Converts `jobs` documents in parallel if `jobs > 1`.
+
+        If a `.conll_writers.ConcatenatedOutput` is given as `output`, the
+        documents are added to it in the order of their names instead of
+        being written to `output_dir`.
+
+        If a `.manifest.Manifest` is given, documents that are up to date
+        according to it are skipped, outputs recorded in it may be replaced
+        and converted documents are recorded in it.
         """
         basedata_dir = os.path.join(input_dir, basedata_dir)
         markables_dir = os.path.join(input_dir, markables_dir)
@@ -192,6 +308,7 @@ class Main:
                     )
                 )
 
+        documents = []
         for name in sorted(all_files):
             words_file = os.path.join(basedata_dir, name) + \
                 words_files_extension
@@ -204,23 +321,62 @@ class Main:
                 else os.path.join(markables_dir, name) \
                 + sentences_files_extension
 
+            if output is not None:
+                documents.append(
+                    (name, (None, words_file, coref_file, sentences_file))
+                )
+                continue
+
             output_file = os.path.join(output_dir, name) + conll_extension
 
+            input_files = [words_file, coref_file]
+            if sentences_file is not None:
+                input_files.append(sentences_file)
+            if manifest is not None and manifest.is_up_to_date(
+                output_file,
+                input_files,
+                config_hash
+            ):
+                logger.info(
+                    f"Skipping {name} from {input_dir}: it did not change"
+                    " since it was converted"
+                )
+                continue
+
             if os.path.exists(output_file):
                 if allow_overwriting:
                     logger.warn(f"Overwriting {output_file}")
+                elif manifest is not None and manifest.is_managed(output_file):
+                    logger.info(
+                        f"Converting {name} from {input_dir} again, because"
+                        " its input or the configuration changed"
+                    )
                 else:
                     raise IOError(f"Will not overwrite: {output_file}")
-            try:
-                cls.single_main(
-                    output_file,
-                    words_file,
-                    coref_file,
-                    sentences_file,
-                    words_files_extension=words_files_extension,
-                    **kwargs
-                )
-            except Exception as e:
+            documents.append(
+                (name, (output_file, words_file, coref_file, sentences_file))
+            )
+
+        kwargs.update(words_files_extension=words_files_extension)
+        results = cls.convert_documents(
+            [files for _, files in documents],
+            jobs,
+            **kwargs
+        )
+        try:
+            for (name, files), (result, e) in zip(documents, results):
+                if e is None:
+                    if output is not None:
+                        output.add(*result)
+                    if manifest is not None:
+                        output_file, *input_files = files
+                        manifest.record(
+                            output_file,
+                            [f for f in input_files if f is not None],
+                            config_hash
+                        )
+                        manifest.checkpoint()
+                    continue
                 if log_on_error:
                     logger.error(
                         f"{name} from {input_dir} is skipped: " + e.args[0]
@@ -231,6 +387,62 @@ class Main:
                         e.args[0],
                     ) + e.args[1:]
                     raise e
+        finally:
+            # Stop the worker processes now instead of when the exception is
+            # garbage collected
+            results.close()
+            if manifest is not None:
+                manifest.save()
+
+    @classmethod
+    def convert_documents(cls, documents, jobs=c.JOBS, **kwargs):
+        """
+        Call `single_main` for every tuple of positional arguments in
+        `documents`, using a pool of `jobs` processes if `jobs > 1`.
+
+        Yields a `(result, exception)` pair for every document, in the same
+        order as `documents`, so the output is the same as that of a serial
+        run. `result` is what `single_main` returned and `exception` is the
+        exception it raised or `None`.
+
+        The workers do not write output files themselves, but return their
+        output to this process, which writes it when the result of the
+        document is yielded. So if the caller stops at a document that
+        failed, no output of later documents is written, as in a serial run.
+
+        !! NB !! The worker processes are forked, because the filters in
+                 `kwargs` cannot be pickled.
+        """
+        if jobs <= 1 or len(documents) <= 1:
+            for files in documents:
+                try:
+                    result = cls.single_main(*files, **kwargs)
+                except Exception as e:
+                    yield None, e
+                else:
+                    yield result, None
+            return
+
+        context = multiprocessing.get_context('fork')
+        with context.Pool(
+            min(jobs, len(documents)),
+            initializer=_init_worker,
+            initargs=(cls, kwargs)
+        ) as pool:
+            results = pool.imap(
+                _convert_in_worker,
+                [(None, *files[1:]) for files in documents]
+            )
+            for files, (result, e) in zip(documents, results):
+                output_file = files[0]
+                if e is None and output_file is not None:
+                    try:
+                        cls.write_text(output_file, result[1])
+                    except Exception as write_error:
+                        yield None, write_error
+                        continue
+                    result = None
+                yield result, e
 
     @classmethod
     def single_main(
@@ -241,6 +453,9 @@ class Main:
            sentences_file=None,
            words_files_extension=c.WORDS_FILES_EXTENSION,
            validate_xml=c.VALIDATE_XML,
+           stream_words_xml=c.STREAM_WORDS_XML,
+           columnar_words=c.COLUMNAR_WORDS,
+           use_numpy=c.USE_NUMPY,
            uniqueyfy=c.UNIQUEYFY,
            fill_non_consecutive_coref_spans=c.FILL_NON_CONSECUTIVE_COREF_SPANS,
            auto_use_Med_item_reader=c.AUTO_USE_MED_ITEM_READER,
@@ -251,28 +466,37 @@ class Main:
            on_missing=c.CONLL_ON_MISSING,
            coref_filter=c.MMAX_COREF_FILTER,
            sentence_filter=c.SENTENCE_DEFAULT_FILTER):
+        """
+        Convert one document to CoNLL.
+
+        If `output_file` is `None`, nothing is written and a
+        `(document ID, CoNLL output)` pair is returned instead.
+        """
         # Read sentences
         if sentences_file is None:
-            document_id, sentences = cls.read_COREA(
+            document_id, sentences, word_index = cls.read_COREA(
                 filename=words_file,
                 extension=words_files_extension,
                 validate_xml=validate_xml,
                 on_missing_document_ID=on_missing['document_id'],
-                warn_on_auto_use_Med_item_reader=warn_on_auto_use_Med_item_reader   # noqa
+                warn_on_auto_use_Med_item_reader=warn_on_auto_use_Med_item_reader,  # noqa
+                columnar_words=columnar_words
             )
         else:
-            document_id, sentences = cls.read_SoNaR(
+            document_id, sentences, word_index = cls.read_SoNaR(
                 words_file=words_file,
                 sentences_file=sentences_file,
                 validate_xml=validate_xml,
+                stream_words_xml=stream_words_xml,
                 words_files_extension=words_files_extension,
-                on_missing_document_ID=on_missing['document_id']
+                on_missing_document_ID=on_missing['document_id'],
+                columnar_words=columnar_words
             )
 
         # Read in coreference data
         logger.debug(f"Read coreference data of {document_id}")
         coref_chains = MMAXCorefDocumentReader(
-            words=it.chain(*sentences),
+            words=word_index,
             validate=validate_xml,
             item_filter=coref_filter,
         ).extract_coref_sets(
@@ -284,19 +508,28 @@ class Main:
             sentences,
             uniqueyfy=uniqueyfy,
             fill_spans=fill_non_consecutive_coref_spans,
+            word_index=word_index,
+            use_numpy=use_numpy,
         ).add_data_from_MMAX_chains(coref_chains)
 
         sentences = filter(sentence_filter, sentences)
 
         # Save the data to CoNLL
+        writer = CoNLLWriter(
+            defaults=conll_defaults,
+            min_column_spacing=min_column_spacing,
+            on_missing=on_missing,
+            columns=conll_columns,
+        )
+        if output_file is None:
+            return document_id, cls.format_conll(
+                writer=writer,
+                document_id=document_id,
+                sentences=sentences
+            )
         cls.write_conll(
             filename=output_file,
-            writer=CoNLLWriter(
-                defaults=conll_defaults,
-                min_column_spacing=min_column_spacing,
-                on_missing=on_missing,
-                columns=conll_columns,
-            ),
+            writer=writer,
             document_id=document_id,
             sentences=sentences
         )
@@ -304,13 +537,21 @@ class Main:
     @classmethod
     def read_SoNaR(cls, words_file, sentences_file,
                    validate_xml=c.VALIDATE_XML,
+                   stream_words_xml=c.STREAM_WORDS_XML,
                    words_files_extension=c.WORDS_FILES_EXTENSION,
-                   on_missing_document_ID=c.CONLL_ON_MISSING['document_id']):
+                   on_missing_document_ID=c.CONLL_ON_MISSING['document_id'],
+                   columnar_words=c.COLUMNAR_WORDS):
         """
-        Read sentences and document ID from a words_file and sentences file
-        from SoNaR.
+        Read sentences, document ID and the `WordIndex` of the words of the
+        sentences from a words_file and sentences file from SoNaR.
 
         Extracts the document ID using the file basename.
+
+        If `stream_words_xml`, the words file is parsed incrementally instead
+        of building the whole XML-tree first.
+
+        If `columnar_words`, the sentences are returned as
+        `ColumnarSentences` instead of a list of lists of word dictionaries.
         """
         # Read document ID
         document_id = document_ID_from_filename(
@@ -321,24 +562,41 @@ class Main:
 
         # Read words
         logger.debug(f"Read words of {document_id}")
-        words = list(SoNaRWordsDocumentReader(
-            validate=validate_xml
-        ).extract_items(
-            etree.parse(words_file)
-        ))
+        reader = SoNaRWordsDocumentReader(validate=validate_xml)
+        if stream_words_xml:
+            words = reader.iterparse_items(words_file)
+        else:
+            words = reader.extract_items(etree.parse(words_file))
+        if columnar_words:
+            words = ColumnarSentences.from_words(words)
+        else:
+            words = list(words)
+        del reader
+        word_index = WordIndex.from_words(words)
 
         logger.debug(f"Read sentences of {document_id}")
         # Add sentence data
         sentence_items = SoNaRSentencesDocumentReader(
-            words,
+            word_index,
             validate=validate_xml
         ).extract_items(etree.parse(sentences_file))
-        sentences = add_sentence_layer_to_words(words, sentence_items)
+        if columnar_words:
+            sentences = words.regroup(sentence_items, word_index)
+        else:
+            sentences = add_sentence_layer_to_words(
+                words,
+                sentence_items,
+                word_index
+            )
         del words, sentence_items
 
+        # The sentences may skip or reorder words if they are not validated
+        if not word_index.matches(sentences):
+            word_index = WordIndex.from_sentences(sentences)
+
         add_word_numbers(sentences)
 
-        return document_id, sentences
+        return document_id, sentences, word_index
 
     @classmethod
     def read_COREA(
@@ -347,14 +605,19 @@ class Main:
             extension=c.WORDS_FILES_EXTENSION,
             validate_xml=c.VALIDATE_XML,
             on_missing_document_ID=c.CONLL_ON_MISSING['document_id'],
-            warn_on_auto_use_Med_item_reader=c.WARN_ON_AUTO_USE_MED_ITEM_READER
+            warn_on_auto_use_Med_item_reader=c.WARN_ON_AUTO_USE_MED_ITEM_READER,  # noqa
+            columnar_words=c.COLUMNAR_WORDS
             ):
         """
-        Read sentences and document ID from a words_file from COREA.
+        Read sentences, document ID and the `WordIndex` of the words of the
+        sentences from a words_file from COREA.
 
         First tries to figure out the document ID using the xml and falls back
         on finding a document ID using the file basename.
 
+        If `columnar_words`, the sentences are returned as
+        `ColumnarSentences` instead of a list of lists of word dictionaries.
+
         See Ch. 7 of Essential Speech and Language Technology for Dutch
         COREA: Coreference Resolution for Extracting Answers for Dutch
         https://link.springer.com/book/10.1007/978-3-642-30910-6
@@ -377,7 +640,10 @@ class Main:
             reader.item_reader = COREAMedWordReader()
 
         logger.debug(f"Read words and sentences of {document_id}")
-        return document_id, reader.extract_sentences(xml)
+        sentences = reader.extract_sentences(xml)
+        if columnar_words:
+            sentences = ColumnarSentences.from_sentences(sentences)
+        return document_id, sentences, WordIndex.from_sentences(sentences)
 
     @classmethod
     def check_document_id(cls, document_id, filename,
@@ -403,14 +669,60 @@ class Main:
     def write_conll(cls, filename, writer, document_id, sentences):
         """
         Write sentence data to a file in CoNLL format.
+
+        The data is first written to a temporary file that then replaces
+        `filename`, so an interrupted conversion does not leave a partial
+        output file behind.
+        """
+        cls.write_atomically(
+            filename,
+            lambda fd: writer.write(fd, document_id, sentences)
+        )
+
+    @classmethod
+    def write_text(cls, filename, text):
+        """
+        Write CoNLL output returned by `format_conll` to a file, in the same
+        way as `write_conll`.
         """
-        with open(filename, 'w') as fd:
+        cls.write_atomically(filename, lambda fd: fd.write(text))
+
+    @classmethod
+    def write_atomically(cls, filename, write):
+        """
+        Call `write` with a temporary file opened for writing that replaces
+        `filename` when `write` returns.
+        """
+        temporary = filename + c.PARTIAL_FILE_SUFFIX
+        try:
+            with open(temporary, 'w') as fd:
+                write(fd)
+            os.replace(temporary, filename)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    @classmethod
+    def format_conll(cls, writer, document_id, sentences):
+        """
+        Get sentence data in CoNLL format as a string.
+        """
+        with io.StringIO() as fd:
             writer.write(fd, document_id, sentences)
+            return fd.getvalue()
 
     @classmethod
-    def can_output_to(cls, output, config, batch):
+    def can_output_to(cls, output, config, batch, manifest_file=None):
+        """
+        Check whether the specified output location is legal.
+
+        An existing output folder is also allowed if `manifest_file` exists,
+        because the conversion is then resumed.
+        """
         if os.path.exists(output):
-            if not config['allow_overwriting']:
+            resume = batch and manifest_file is not None and \
+                os.path.exists(manifest_file)
+            if not config['allow_overwriting'] and not resume:
                 thing = "folder" if batch else "file"
                 raise ValueError(
                     "The configuration specifies overwriting is not allowed,"
@@ -451,6 +763,10 @@ class Main:
                     'sentences_files_extension',
                     'log_on_error',
                     'dirs_to_ignore'
+                 ], optional_args_from_config=[
+                    'stream_words_xml',
+                    'columnar_words',
+                    'use_numpy',
                  ]):
         from argparse import ArgumentParser, RawDescriptionHelpFormatter
 
@@ -467,6 +783,17 @@ class Main:
 
         python -m mmax2conll <config file> <output folder> -d <input folder> [-d <input folder> ...]
 
+    To convert multiple documents in parallel, add `-j <number of processes>`.
+
+    To write all documents to one file instead, add `--concatenate` and pass an
+    output file instead of an output folder. Add `--shards <number of files>` to
+    split the output into that many files of roughly equal size. The byte offset
+    of every part is saved in `<output file>.index`.
+
+    To be able to resume or update a batch conversion, add `-m <manifest file>`.
+    The converted documents are then recorded in the manifest and running the
+    same command again only converts the documents that are new or changed, or
+    were converted using a different configuration.
 
     To only convert one pair (or triple) of files, run:
 
@@ -492,6 +819,21 @@ class Main:
         parser.add_argument('-d', '--directory', action='append',
                             dest='directories', type=directory_exists,
                             help="Directory to batch convert files from")
+        parser.add_argument('-j', '--jobs', type=int, default=c.JOBS,
+                            help="Number of documents to convert in parallel"
+                                 " when batch converting")
+        parser.add_argument('-m', '--manifest', dest='manifest_file',
+                            default=c.MANIFEST_FILE,
+                            help="Record the documents converted from folders"
+                                 " in this file and skip the documents that"
+                                 " did not change since they were recorded")
+        parser.add_argument('--concatenate', action='store_true',
+                            help="Write all documents converted from folders"
+                                 " to the output file instead of to one file"
+                                 " per document in the output folder")
+        parser.add_argument('--shards', type=int, default=c.SHARDS,
+                            help="Split the concatenated output into this"
+                                 " many files")
         parser.add_argument('config', help="YAML configuration file",
                             type=file_exists)
         parser.add_argument('output',
@@ -522,8 +864,20 @@ class Main:
 
         # Verify that the command line arguments are legal
         # AND remove the ones not needed
+        concatenate = args.pop('concatenate')
+        if not concatenate and args['shards'] != c.SHARDS:
+            parser.error("Only concatenated output can be split into shards.")
         if batch:
-            args['output_dir'] = output
+            if concatenate:
+                args['output_file'] = output
+                if args['manifest_file'] is not None:
+                    parser.error(
+                        "A manifest cannot be used when concatenating the"
+                        " output."
+                    )
+            else:
+                args['output_dir'] = output
+                del args['shards']
             if args.pop('words_file') is not None or \
                args.pop('coref_file') is not None:
                 parser.error(
@@ -532,7 +886,15 @@ class Main:
                 )
             args.pop('sentences_file')
         else:
+            if concatenate:
+                parser.error(
+                    "Only the output of batch conversions can be"
+                    " concatenated."
+                )
             del args['directories']
+            del args['jobs']
+            del args['manifest_file']
+            del args['shards']
             args['output_file'] = output
             if args['words_file'] is None or args['coref_file'] is None:
                 parser.error(
@@ -544,12 +906,21 @@ class Main:
         # Read configuration
         config_file = args.pop('config')
         config = cls.read_config(config_file)
+        if batch:
+            args['config_hash'] = hash_config(config)
 
         # Read common keys
         args.update(
             cls.keys_from_config(config, args_from_config, config_file)
         )
 
+        # Read optional keys
+        args.update(
+            (key, config[key])
+            for key in optional_args_from_config
+            if key in config
+        )
+
         coref_type_filter = c.MMAX_TYPE_FILTERS[
             args.pop('coref_type_filter')
         ]
@@ -573,7 +944,16 @@ class Main:
             )
 
         # Verify the output location
-        cls.can_output_to(output, config, batch)
+        if concatenate:
+            outputs = ConcatenatedOutput.shard_filenames(
+                output,
+                args['shards']
+            )
+            outputs.append(output + c.INDEX_SUFFIX)
+            for filename in outputs:
+                cls.can_output_to(filename, config, False)
+        else:
+            cls.can_output_to(output, config, batch, args.get('manifest_file'))
 
         return batch, args
 
@@ -3,8 +3,12 @@ import logging
 from os import path
 import itertools as it
 
+from lxml import etree
+
 from . import constants as c
 from .util import ValidationError
+from .columnar import ColumnarSentences
+from .word_index import WordIndex, WordSpan
 from .mmax_item_readers import (
     SoNaRWordReader,
     COREAWordReader,
@@ -35,13 +39,25 @@ def document_ID_from_filename(filename, extension):
     return None
 
 
-def add_sentence_layer_to_words(words, sentence_items):
+def add_sentence_layer_to_words(words, sentence_items, word_index=None):
     """
     Splits a collection of words into a sequence of sentences using information
     from a sequence of sentence items.
 
+    If `word_index` is the `.word_index.WordIndex` of `words`, `words` must be
+    a list and the index is used to look up the words.
+
     Returns a list of lists of words
     """
+    if word_index is not None:
+        indices = word_index.indices
+        return [
+            [
+                words[index] if index is not None else None
+                for index in map(indices.get, sentence_item['span'])
+            ]
+            for sentence_item in sentence_items
+        ]
     words = {word['id']: word for word in words}
     return [
         [words.get(ID) for ID in sentence_item['span']]
@@ -53,6 +69,9 @@ def add_word_numbers(sentences):
     """
     Add word numbers in place
     """
+    if isinstance(sentences, ColumnarSentences):
+        sentences.add_word_numbers()
+        return
     for sentence in sentences:
         for number, word in enumerate(sentence):
             word['word_number'] = number
@@ -82,8 +101,50 @@ class XMLItemReader:
          - the tag of the child elements
         """
         root = xml.getroot()
+        rm_ns = self.get_rm_ns(root)
+        if self.validate:
+            self.validate_root_tag(root, rm_ns)
+
+        children = root.getchildren()
+        if self.validate:
+            for child in children:
+                self.validate_child_tag(child, rm_ns)
+        return children
+
+    def iterparse_child_elements(self, source):
+        """
+        Incrementally parse `source` (a filename or file object) and yield the
+        XML-elements of the direct children of the root without building the
+        whole tree. Validates the same things as `get_child_elements`.
 
-        # Create `rm_ns` function to remove the name space
+        !! NB !! Every child element is cleared and removed from the tree when
+                 the next one is requested, so read it before requesting the
+                 next one.
+        """
+        depth = 0
+        for event, element in etree.iterparse(source, events=('start', 'end')):
+            if event == 'start':
+                if depth == 0:
+                    rm_ns = self.get_rm_ns(element)
+                    if self.validate:
+                        self.validate_root_tag(element, rm_ns)
+                depth += 1
+                continue
+
+            depth -= 1
+            if depth == 1:
+                if self.validate:
+                    self.validate_child_tag(element, rm_ns)
+                yield element
+                element.clear()
+                while element.getprevious() is not None:
+                    del element.getparent()[0]
+
+    def get_rm_ns(self, root):
+        """
+        Create a function that removes the default name space of `root` from
+        a tag if `self.validate`.
+        """
         if self.validate and None in root.nsmap:
             ns = root.nsmap[None]
             nslen = len(ns)
@@ -97,26 +158,30 @@ class XMLItemReader:
         else:
             def rm_ns(tag):
                 return tag
+        return rm_ns
 
-        if self.validate:
-            if rm_ns(root.tag) != self.expected_root_tag:
-                raise ValidationError(
-                    f"The root element did not have the expected tag"
-                    f" {self.expected_root_tag!r}. Found: {root.tag!r} and"
-                    f" using: {rm_ns(root.tag)!r}"
-                )
+    def validate_root_tag(self, root, rm_ns):
+        """
+        Validate the tag of the root element
+        """
+        if rm_ns(root.tag) != self.expected_root_tag:
+            raise ValidationError(
+                f"The root element did not have the expected tag"
+                f" {self.expected_root_tag!r}. Found: {root.tag!r} and"
+                f" using: {rm_ns(root.tag)!r}"
+            )
 
-        children = root.getchildren()
-        if self.validate:
-            for child in children:
-                if rm_ns(child.tag) != self.expected_child_tag:
-                    raise ValidationError(
-                        f"One of the children did not have the expected tag"
-                        f" {self.expected_child_tag!r}."
-                        f" Found: {child.tag!r} and"
-                        f" using: {rm_ns(child.tag)!r}"
-                    )
-        return children
+    def validate_child_tag(self, child, rm_ns):
+        """
+        Validate the tag of a child element
+        """
+        if rm_ns(child.tag) != self.expected_child_tag:
+            raise ValidationError(
+                f"One of the children did not have the expected tag"
+                f" {self.expected_child_tag!r}."
+                f" Found: {child.tag!r} and"
+                f" using: {rm_ns(child.tag)!r}"
+            )
 
     def extract_all_items(self, xml):
         """
@@ -135,6 +200,27 @@ class XMLItemReader:
         """
         return filter(self.item_filter, self.extract_all_items(xml))
 
+    def iterparse_all_items(self, source):
+        """
+        Incrementally extract all information for every item from `source` (a
+        filename or file object).
+
+        Returns an iterator of things returned by `self.item_reader.read`
+        """
+        return map(
+            self.item_reader.read,
+            self.iterparse_child_elements(source)
+        )
+
+    def iterparse_items(self, source):
+        """
+        Incrementally extract all information for every item from `source` (a
+        filename or file object), filtering items using `self.item_filter`.
+
+        Returns an iterator of things returned by `self.item_reader.read`
+        """
+        return filter(self.item_filter, self.iterparse_all_items(source))
+
 
 class SoNaRWordsDocumentReader(XMLItemReader):
     """
@@ -183,6 +269,9 @@ class SoNaRSentencesDocumentReader(XMLItemReader):
      - the span of a all sentences are consecutive within a sentence
      - the spans of a all sentences are consecutive between sentences
 
+    `words` is either a `.word_index.WordIndex`, an iterable of word
+    dictionaries or `.columnar.ColumnarSentences`.
+
     See
     https://ivdnt.org/downloads/taalmaterialen/tstc-sonar-corpus
     for (a description of) the SoNaR Corpus
@@ -198,15 +287,14 @@ class SoNaRSentencesDocumentReader(XMLItemReader):
                  expected_child_tag=c.MMAX_MARKABLE_TAG,
                  expected_root_tag=c.MMAX_MARKABLES_TAG,
                  item_filter=c.MMAX_SENTENCES_FILTER):
-        self.word_ids = [word['id'] for word in words]
-        self.word_indices = dict(
-            (ID, i) for i, ID in enumerate(self.word_ids)
-        )
+        self.word_index = WordIndex.from_words(words)
+        self.word_ids = self.word_index.ids
+        self.word_indices = self.word_index.indices
 
         # Default item_reader
         item_reader = item_reader \
             if item_reader is not None \
-            else MMAXMarkableReader(self.word_ids)
+            else MMAXMarkableReader(self.word_index)
         super(SoNaRSentencesDocumentReader, self).__init__(
             item_reader=item_reader,
             validate=validate,
@@ -251,9 +339,9 @@ class SoNaRSentencesDocumentReader(XMLItemReader):
                     " abbreviation must appear in the words before the"
                     f" last ID: {span}"
                 )
-            correct_span = self.word_ids[first:last + 1]
 
-            if span != correct_span:
+            if not self.is_consecutive(span, first, last):
+                correct_span = self.word_ids[first:last + 1]
                 raise ValidationError(
                     f"The span of this sentence should be {correct_span}:"
                     f" {item!r}"
@@ -267,6 +355,17 @@ class SoNaRSentencesDocumentReader(XMLItemReader):
             else:
                 prev_last_id = span[-1]
 
+    def is_consecutive(self, span, first, last):
+        """
+        Check whether `span` contains exactly the words from position `first`
+        up to and including position `last`.
+
+        Does not expand spans from `self.word_index`.
+        """
+        if isinstance(span, WordSpan) and span.word_index is self.word_index:
+            return span.is_consecutive()
+        return span == self.word_ids[first:last + 1]
+
 
 class COREAWordsDocumentReader(XMLItemReader):
     """
@@ -534,6 +633,9 @@ class MMAXCorefDocumentReader(XMLItemReader):
     """
     Reads and (optionally) validates data from a MMAX markables XML-tree.
 
+    `words` is either a `.word_index.WordIndex`, an iterable of word
+    dictionaries or `.columnar.ColumnarSentences`.
+
     Things that are verified if `validate=True`:
      - the tag of the root element is as expected
      - the tag of all the word elements is as expected
@@ -548,10 +650,9 @@ class MMAXCorefDocumentReader(XMLItemReader):
                  expected_child_tag=c.MMAX_MARKABLE_TAG,
                  expected_root_tag=c.MMAX_MARKABLES_TAG,
                  item_filter=c.MMAX_COREF_FILTER):
-                # Default item_reader
-        item_reader = item_reader \
-            if item_reader is not None \
-            else MMAXCorefReader(word['id'] for word in words)
+        # Default item_reader
+        if item_reader is None:
+            item_reader = MMAXCorefReader(WordIndex.from_words(words))
         super(MMAXCorefDocumentReader, self).__init__(
             item_reader=item_reader,
             validate=validate,
@@ -1,6 +1,7 @@
 import re
 
 from . import constants as c
+from .word_index import WordIndex, WordSpan
 
 
 class SoNaRWordReader:
@@ -153,10 +154,15 @@ class MMAXMarkableReader:
                  id_attr=c.MMAX_MARKABLE_ID_ATTRIBUTE,
                  span_attr=c.MMAX_SPAN_ATTRIBUTE,
                  mmax_level_attr=c.MMAX_LEVEL_ATTRIBUTE):
-        self.referred_ids = list(referred_ids)
-        self.referred_indices = dict(
-            (ID, i) for i, ID in enumerate(self.referred_ids)
-        )
+        """
+        `referred_ids` is either a `.word_index.WordIndex` or an iterable of
+        the IDs of the words of the document.
+        """
+        self.word_index = referred_ids \
+            if isinstance(referred_ids, WordIndex) \
+            else WordIndex(referred_ids)
+        self.referred_ids = self.word_index.ids
+        self.referred_indices = self.word_index.indices
         self.id_attr = id_attr
         self.span_attr = span_attr
         self.mmax_level_attr = mmax_level_attr
@@ -178,8 +184,13 @@ class MMAXMarkableReader:
         """
         Expand and split a possibly abbreviated span specification:
             span="word_1..word_5,word_7"
+
+        Returns a `.word_index.WordSpan`, which stores the ranges of positions
+        instead of all IDs. Returns a list of IDs if the span contains a
+        single ID that is not in `self.word_index`.
         """
         parts = []
+        all_known = True
         for part in text.split(','):
             split = part.split('..')
 
@@ -205,11 +216,28 @@ class MMAXMarkableReader:
                         " abbreviation must appear in the words before the"
                         f" second ID: {text}"
                     )
-                new_parts = self.referred_ids[first:last + 1]
+                parts.append((first, last))
+            else:
+                index = self.referred_indices.get(part)
+                if index is None:
+                    all_known = False
+                    parts.append(part)
+                else:
+                    parts.append((index, index))
+
+        if all_known:
+            span = WordSpan(self.word_index, [])
+            for first, last in parts:
+                span.append_range(first, last)
+            return span
+
+        span = []
+        for part in parts:
+            if isinstance(part, tuple):
+                span.extend(self.referred_ids[part[0]:part[1] + 1])
             else:
-                new_parts = split
-            parts.extend(new_parts)
-        return parts
+                span.append(part)
+        return span
 
     def extract_mmax_level(self, xml):
         """
@@ -0,0 +1,136 @@
+import itertools as it
+from collections.abc import Sequence
+
+from .columnar import ColumnarSentences
+
+
+class WordIndex:
+    """
+    Maps the IDs of the words of a document to their position and back.
+
+    Create one per document and share it between the readers and the
+    converter, so the index is only built once.
+    """
+
+    def __init__(self, ids):
+        self.ids = ids if isinstance(ids, list) else list(ids)
+        self.indices = {ID: index for index, ID in enumerate(self.ids)}
+
+    @classmethod
+    def from_words(cls, words):
+        """
+        Get the index of `words`, which is either a `WordIndex`,
+        `.columnar.ColumnarSentences` or an iterable of word dictionaries.
+        """
+        if isinstance(words, cls):
+            return words
+        if isinstance(words, ColumnarSentences):
+            return cls(words.column('id'))
+        return cls(word['id'] for word in words)
+
+    @classmethod
+    def from_sentences(cls, sentences):
+        """
+        Get the index of the words of a sequence of sentences, which is either
+        `.columnar.ColumnarSentences` or a sequence of lists of word
+        dictionaries.
+        """
+        if isinstance(sentences, ColumnarSentences):
+            return cls(sentences.column('id'))
+        return cls(word['id'] for word in it.chain(*sentences))
+
+    def matches(self, sentences):
+        """
+        Check whether this is the index of the words of `sentences`, i.e.
+        whether the sentences contain exactly these words in this order.
+        """
+        if isinstance(sentences, ColumnarSentences):
+            return sentences.column('id') == self.ids
+        count = 0
+        for sentence in sentences:
+            for word in sentence:
+                if count >= len(self.ids) or word['id'] != self.ids[count]:
+                    return False
+                count += 1
+        return count == len(self.ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, ID):
+        return ID in self.indices
+
+
+class WordSpan(Sequence):
+    """
+    A lazy sequence of word IDs, stored as ranges of positions in a
+    `WordIndex` instead of as a list of IDs.
+
+    Compares equal to any list or tuple containing the same IDs.
+    """
+    __slots__ = ('word_index', 'ranges')
+
+    def __init__(self, word_index, ranges):
+        self.word_index = word_index
+        self.ranges = ranges
+
+    def append_range(self, first, last):
+        """
+        Append the words at the positions `first` up to and including `last`.
+        """
+        if self.ranges and self.ranges[-1][1] == first:
+            self.ranges[-1] = (self.ranges[-1][0], last + 1)
+        else:
+            self.ranges.append((first, last + 1))
+
+    @property
+    def first_index(self):
+        return self.ranges[0][0]
+
+    @property
+    def last_index(self):
+        return self.ranges[-1][1] - 1
+
+    def is_consecutive(self):
+        """
+        Whether this span contains all words from its first to its last word.
+        """
+        return len(self.ranges) == 1
+
+    def __len__(self):
+        return sum(stop - start for start, stop in self.ranges)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(self)[index]
+        if index < 0:
+            index += len(self)
+        if index >= 0:
+            for start, stop in self.ranges:
+                if index < stop - start:
+                    return self.word_index.ids[start + index]
+                index -= stop - start
+        raise IndexError("span index out of range")
+
+    def __iter__(self):
+        ids = self.word_index.ids
+        for start, stop in self.ranges:
+            yield from map(ids.__getitem__, range(start, stop))
+
+    def __eq__(self, other):
+        if isinstance(other, WordSpan) and \
+           other.word_index is self.word_index:
+            return other.ranges == self.ranges
+        if isinstance(other, (WordSpan, list, tuple)):
+            return len(other) == len(self) and \
+                all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
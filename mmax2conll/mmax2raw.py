@@ -3,8 +3,6 @@
 import os
 import logging
 
-from lxml import etree
-
 import mmax2conll.constants as c
 from mmax2conll.util import file_exists, directory_exists
 
@@ -87,9 +85,7 @@ class Main(CoNLLMain):
         logger.debug(f"Read words from {filename}")
         words = SoNaRWordsDocumentReader(
             validate=validate_xml
-        ).extract_items(
-            etree.parse(filename)
-        )
+        ).iterparse_items(filename)
         return words
 
     @classmethod
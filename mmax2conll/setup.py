@@ -18,6 +18,9 @@ setup(
         "lxml>=4.2.1",
         "pyaml>=17.12.1",
     ],
+    extras_require={
+        'numpy': ['numpy'],
+    },
     classifiers=[
         'Intended Audience :: Developers',
         'License :: OSI Approved :: Apache Software License',
@@ -46,3 +46,12 @@ def sonar_fill_spans_config(config_dir):
 @pytest.fixture
 def sonar_problem_only_config(config_dir):
     return os.path.join(config_dir, 'SoNaR_problem_only_config.yml')
+
+
+@pytest.fixture
+def sonar_words_file(sonar_dir):
+    return os.path.join(
+        sonar_dir,
+        'Basedata',
+        'WR-P-E-E-0000000018_words.xml'
+    )
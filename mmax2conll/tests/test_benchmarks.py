@@ -0,0 +1,31 @@
+import sys
+import json
+import subprocess
+
+
+def test_run_benchmarks():
+    result = subprocess.run(
+        [
+            sys.executable,
+            '../benchmarks/run_benchmarks.py',
+            '-n', '200',
+            '--no-memory',
+        ],
+        check=True,
+        stdout=subprocess.PIPE,
+    )
+    measurements = [
+        json.loads(line)
+        for line in result.stdout.decode().splitlines()
+    ]
+    assert [m['stage'] for m in measurements] == [
+        'read',
+        'chains',
+        'fill_spans',
+        'uniqueyfy',
+        'add_coref_data',
+        'write',
+    ]
+    assert all(m['benchmark'] == 'mmax2conll' for m in measurements)
+    assert all(m['tokens'] == 200 for m in measurements)
+    assert all(m['seconds'] >= 0 for m in measurements)
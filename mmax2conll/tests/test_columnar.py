@@ -0,0 +1,66 @@
+import io
+
+from mmax2conll.columnar import ColumnarSentences
+from mmax2conll.conll_converters import CorefConverter
+from mmax2conll.conll_writers import CoNLLWriter
+from mmax2conll.mmax_document_readers import add_word_numbers
+
+
+def make_sentences():
+    return [
+        [
+            {'id': 'word_1', 'word': 'Dit', 'part_number': '1'},
+            {'id': 'word_2', 'word': 'is'},
+            {'id': 'word_3', 'word': 'een'},
+            {'id': 'word_4', 'word': 'zin'},
+        ],
+        [
+            {'id': 'word_5', 'word': 'Dit', 'part_number': '1'},
+            {'id': 'word_6', 'word': 'ook'},
+        ],
+    ]
+
+
+def test_round_trip():
+    sentences = make_sentences()
+    store = ColumnarSentences.from_sentences(sentences)
+    assert store.offsets == [0, 4, 6]
+    assert store.to_sentences() == sentences
+    assert len(store) == 2
+    assert store[1][0]['word'] == 'Dit'
+    assert store[1][1].get('part_number') is None
+    assert 'part_number' not in store[1][1]
+
+
+def test_regroup():
+    sentences = make_sentences()
+    words = ColumnarSentences.from_words(w for s in sentences for w in s)
+    assert len(words) == 1
+    regrouped = words.regroup([
+        {'span': ['word_5', 'word_6']},
+        {'span': ['word_1', 'word_2', 'word_3', 'word_4']},
+    ])
+    assert regrouped.to_sentences() == sentences[::-1]
+
+
+def test_add_data_and_write():
+    coref_sets = [
+        [['word_1'], ['word_5']],
+        [['word_3', 'word_4'], ['word_6']],
+        [['word_2', 'word_4']],
+    ]
+    writer = CoNLLWriter(columns=['part_number', 'word_number', 'word',
+                                  'problem', 'coref'])
+
+    outputs = []
+    for store in [make_sentences(),
+                  ColumnarSentences.from_sentences(make_sentences())]:
+        add_word_numbers(store)
+        CorefConverter(store, fill_spans=True).add_data_from_coref_sets(
+            coref_sets
+        )
+        fd = io.StringIO()
+        writer.write(fd, 'doc', store)
+        outputs.append(fd.getvalue())
+    assert outputs[0] == outputs[1]
+    assert '(1' in outputs[0]
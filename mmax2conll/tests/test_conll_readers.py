@@ -0,0 +1,77 @@
+import io
+
+import pytest
+
+from mmax2conll.conll_writers import CoNLLWriter
+from mmax2conll.conll_readers import CoNLLReader
+
+COLUMNS = ['part_number', 'word_number', 'word', 'problem', 'coref']
+
+
+def make_sentences():
+    return [
+        [
+            {'part_number': 0, 'word_number': 0, 'word': 'Jan',
+             'coref': '(0|(1'},
+            {'part_number': 0, 'word_number': 1, 'word': 'zelf',
+             'coref': '0)', 'problem': '0'},
+            {'part_number': 0, 'word_number': 2, 'word': 'en'},
+        ],
+        [
+            {'part_number': 0, 'word_number': 0, 'word': 'hij',
+             'coref': '(0)|1)'},
+        ],
+        [
+            {'part_number': 2, 'word_number': 0, 'word': 'Een',
+             'coref': '(2'},
+            {'part_number': 2, 'word_number': 1, 'word': 'zin',
+             'coref': '(2)|2)'},
+        ],
+    ]
+
+
+def write(sentences, document_id='doc'):
+    fd = io.StringIO()
+    CoNLLWriter(columns=COLUMNS).write(fd, document_id, sentences)
+    return fd.getvalue()
+
+
+@pytest.mark.parametrize('columnar', [False, True])
+def test_round_trip(columnar):
+    output = write(make_sentences()) + write(make_sentences(), 'doc2')
+    parts = list(CoNLLReader(COLUMNS, columnar=columnar).read(
+        io.StringIO(output)
+    ))
+    assert [(p.document_id, p.part_number) for p in parts] == [
+        ('doc', 0), ('doc', 1), ('doc', 2),
+        ('doc2', 0), ('doc2', 1), ('doc2', 2),
+    ]
+    # Writing the read sentences again gives the same output
+    assert write([
+        sentence for part in parts[:3] for sentence in part.sentences
+    ]) == write(make_sentences())
+
+    sentences = parts[0].sentences
+    if columnar:
+        sentences = sentences.to_sentences()
+    assert sentences[0][2] == {
+        'part_number': '0', 'word_number': '2', 'word': 'en',
+        'problem': '', 'coref': '-',
+    }
+
+
+def test_chains():
+    parts = list(CoNLLReader(COLUMNS).read(
+        io.StringIO(write(make_sentences()))
+    ))
+    assert parts[0].chains == {0: [(0, 1), (3, 3)], 1: [(0, 3)]}
+    assert parts[1].chains == {}
+    assert parts[2].chains == {2: [(1, 1), (0, 1)]}
+
+
+@pytest.mark.parametrize('coref', ['(0', '0)', '(x)', '(0)|'])
+def test_invalid_chains(coref):
+    sentences = [[{'part_number': 0, 'word_number': 0, 'word': 'a',
+                   'coref': coref}]]
+    with pytest.raises(ValueError):
+        list(CoNLLReader(COLUMNS).read(io.StringIO(write(sentences))))
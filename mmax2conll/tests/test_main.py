@@ -1,7 +1,10 @@
 import os
 import shutil
+import multiprocessing
 import logging
 
+import pytest
+
 from mmax2conll.main import Main
 
 logger = logging.getLogger(None if __name__ == '__main__' else __name__)
@@ -113,3 +116,165 @@ def test_sonar(caplog, sonar_dir, sonar_config):
             shutil.rmtree(output_dir)
     for record in caplog.records:
         assert record.levelno <= logging.INFO
+
+
+def copy_sonar_documents(sonar_dir, input_dir, copies):
+    """
+    Make a data directory with `copies` copies of the SoNaR document, named
+    WR-P-E-E-0000000008, WR-P-E-E-0000000018, WR-P-E-E-0000000028, etc.
+    """
+    for subdir in ['Basedata', 'Markables']:
+        os.makedirs(input_dir / subdir)
+        for filename in os.listdir(os.path.join(sonar_dir, subdir)):
+            for copy in range(copies):
+                shutil.copy(
+                    os.path.join(sonar_dir, subdir, filename),
+                    input_dir / subdir / filename.replace('18', f'{copy}8')
+                )
+
+
+def test_sonar_jobs(caplog, tmp_path, sonar_dir, sonar_config):
+    caplog.set_level(logging.DEBUG)
+    input_dir = tmp_path / 'input'
+    copy_sonar_documents(sonar_dir, input_dir, 3)
+
+    serial_dir = str(tmp_path / 'serial')
+    parallel_dir = str(tmp_path / 'parallel')
+    Main.main([sonar_config, serial_dir, "-d", str(input_dir)])
+    Main.main([sonar_config, parallel_dir, "-d", str(input_dir), "-j", "2"])
+
+    filenames = sorted(os.listdir(serial_dir))
+    assert len(filenames) == 3
+    assert sorted(os.listdir(parallel_dir)) == filenames
+    for filename in filenames:
+        with open(os.path.join(serial_dir, filename)) as fd:
+            serial = fd.read()
+        with open(os.path.join(parallel_dir, filename)) as fd:
+            assert fd.read() == serial
+    for record in caplog.records:
+        assert record.levelno <= logging.INFO
+
+
+def raise_on_error_config(tmp_path, sonar_config):
+    """
+    Write a copy of the SoNaR configuration with `log_on_error: false`.
+    """
+    with open(sonar_config) as fd:
+        config = fd.read().replace('log_on_error: true', 'log_on_error: false')
+    config_file = str(tmp_path / 'config.yml')
+    with open(config_file, 'w') as fd:
+        fd.write(config)
+    return config_file
+
+
+def test_sonar_jobs_error(tmp_path, sonar_dir, sonar_config):
+    input_dir = tmp_path / 'input'
+    copy_sonar_documents(sonar_dir, input_dir, 6)
+    words_file = input_dir / 'Basedata' / 'WR-P-E-E-0000000018_words.xml'
+    with open(words_file, 'w') as fd:
+        fd.write('<broken')
+    config = raise_on_error_config(tmp_path, sonar_config)
+
+    serial_dir = str(tmp_path / 'serial')
+    parallel_dir = str(tmp_path / 'parallel')
+    with pytest.raises(Exception):
+        Main.main([config, serial_dir, "-d", str(input_dir)])
+    with pytest.raises(Exception) as error:
+        Main.main([config, parallel_dir, "-d", str(input_dir), "-j", "3"])
+    # The workers are stopped, although the exception is still referenced
+    assert error.value is not None
+    assert multiprocessing.active_children() == []
+
+    assert os.listdir(serial_dir) == ['WR-P-E-E-0000000008.conll']
+    assert os.listdir(parallel_dir) == os.listdir(serial_dir)
+
+
+def test_sonar_jobs_resume(tmp_path, sonar_dir, sonar_config):
+    input_dir = tmp_path / 'input'
+    copy_sonar_documents(sonar_dir, input_dir, 6)
+    words_file = input_dir / 'Basedata' / 'WR-P-E-E-0000000018_words.xml'
+    with open(words_file, 'w') as fd:
+        fd.write('<broken')
+    config = raise_on_error_config(tmp_path, sonar_config)
+    output_dir = str(tmp_path / 'output')
+    args = [config, output_dir, "-d", str(input_dir), "-j", "3",
+            "-m", str(tmp_path / 'manifest.json')]
+    with pytest.raises(Exception):
+        Main.main(args)
+
+    # Fix the broken document and resume
+    shutil.copy(
+        os.path.join(sonar_dir, 'Basedata', 'WR-P-E-E-0000000018_words.xml'),
+        words_file
+    )
+    Main.main(args)
+
+    serial_dir = str(tmp_path / 'serial')
+    Main.main([config, serial_dir, "-d", str(input_dir)])
+    filenames = sorted(os.listdir(serial_dir))
+    assert len(filenames) == 6
+    assert sorted(os.listdir(output_dir)) == filenames
+    for filename in filenames:
+        with open(os.path.join(serial_dir, filename)) as fd:
+            serial = fd.read()
+        with open(os.path.join(output_dir, filename)) as fd:
+            assert fd.read() == serial
+
+
+def test_sonar_concatenate(tmp_path, sonar_dir, sonar_config):
+    input_dir = tmp_path / 'input'
+    copy_sonar_documents(sonar_dir, input_dir, 3)
+
+    output_dir = str(tmp_path / 'output')
+    output_file = str(tmp_path / 'corpus.conll')
+    Main.main([sonar_config, output_dir, "-d", str(input_dir)])
+    Main.main([sonar_config, output_file, "-d", str(input_dir),
+               "--concatenate", "--shards", "2"])
+
+    with open(output_file + '.index') as fd:
+        index = [line.split('\t') for line in fd]
+    assert [shard for _, _, shard, _, _ in index] == [
+        'corpus.000.conll', 'corpus.001.conll', 'corpus.000.conll'
+    ]
+    for ID, _, shard, offset, size in index:
+        with open(os.path.join(output_dir, ID + '.conll'), 'rb') as fd:
+            expected = fd.read()
+        with open(tmp_path / shard, 'rb') as fd:
+            fd.seek(int(offset))
+            assert fd.read(int(size)) == expected
+
+
+def test_sonar_resume(caplog, tmp_path, sonar_dir, sonar_config):
+    caplog.set_level(logging.INFO)
+    input_dir = tmp_path / 'input'
+    shutil.copytree(sonar_dir, input_dir)
+    output_dir = str(tmp_path / 'output')
+    args = [sonar_config, output_dir, "-d", str(input_dir),
+            "-m", str(tmp_path / 'manifest.json')]
+    Main.main(args)
+
+    output_file = os.path.join(output_dir, 'WR-P-E-E-0000000018.conll')
+    with open(output_file) as fd:
+        output = fd.read()
+    mtime = os.stat(output_file).st_mtime_ns
+
+    # Nothing changed, so nothing is converted
+    caplog.clear()
+    Main.main(args)
+    assert os.stat(output_file).st_mtime_ns == mtime
+    assert any('Skipping' in r.getMessage() for r in caplog.records)
+
+    # Only touching an input file does not change its contents
+    words_file = input_dir / 'Basedata' / 'WR-P-E-E-0000000018_words.xml'
+    os.utime(words_file)
+    Main.main(args)
+    assert os.stat(output_file).st_mtime_ns == mtime
+
+    # A changed input is converted again
+    with open(words_file, 'a') as fd:
+        fd.write('\n')
+    caplog.clear()
+    Main.main(args)
+    assert any('again' in r.getMessage() for r in caplog.records)
+    with open(output_file) as fd:
+        assert fd.read() == output
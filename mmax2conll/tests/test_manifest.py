@@ -0,0 +1,39 @@
+import os
+
+from mmax2conll.manifest import Manifest, hash_config
+
+
+def test_hash_config():
+    config = {'uniqueyfy': True, 'dirs_to_ignore': {'b', 'a'}}
+    assert hash_config(config) == hash_config(dict(config))
+    assert hash_config(config) != hash_config(dict(config, uniqueyfy=False))
+    assert hash_config({'filter': len}) == hash_config({'filter': len})
+
+
+def test_record_and_load(tmp_path):
+    input_file = tmp_path / 'input.xml'
+    input_file.write_text('<words/>')
+    output_file = tmp_path / 'output' / 'output.conll'
+    os.makedirs(output_file.parent)
+    output_file.write_text('#begin document\n')
+
+    manifest = Manifest(str(tmp_path / 'output' / '.manifest.json'))
+    assert not manifest.is_up_to_date(output_file, [input_file], 'config')
+    manifest.record(output_file, [input_file], 'config')
+    manifest.save()
+
+    manifest = Manifest.load(manifest.filename)
+    assert list(manifest.documents) == ['output.conll']
+    assert manifest.is_up_to_date(output_file, [input_file], 'config')
+    assert not manifest.is_up_to_date(output_file, [input_file], 'other')
+    assert manifest.is_managed(output_file)
+
+    # Same contents, different modification time
+    os.utime(input_file, ns=(0, 0))
+    assert manifest.is_up_to_date(output_file, [input_file], 'config')
+
+    input_file.write_text('<words></words>')
+    assert not manifest.is_up_to_date(output_file, [input_file], 'config')
+
+    output_file.write_text('changed by hand\n')
+    assert not manifest.is_managed(output_file)
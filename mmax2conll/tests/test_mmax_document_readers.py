@@ -0,0 +1,30 @@
+import pytest
+from lxml import etree
+
+from mmax2conll.util import ValidationError
+from mmax2conll.mmax_document_readers import SoNaRWordsDocumentReader
+
+
+def test_iterparse_items(sonar_words_file):
+    reader = SoNaRWordsDocumentReader()
+    expected = list(reader.extract_items(etree.parse(sonar_words_file)))
+    assert list(reader.iterparse_items(sonar_words_file)) == expected
+
+
+def test_iterparse_items_filter(sonar_words_file):
+    reader = SoNaRWordsDocumentReader(
+        item_filter=lambda i: i['word'].istitle()
+    )
+    expected = list(reader.extract_items(etree.parse(sonar_words_file)))
+    assert expected
+    assert list(reader.iterparse_items(sonar_words_file)) == expected
+
+
+def test_iterparse_items_validation(sonar_words_file):
+    reader = SoNaRWordsDocumentReader(expected_root_tag='markables')
+    with pytest.raises(ValidationError):
+        list(reader.iterparse_items(sonar_words_file))
+
+    reader = SoNaRWordsDocumentReader(expected_child_tag='markable')
+    with pytest.raises(ValidationError):
+        list(reader.iterparse_items(sonar_words_file))
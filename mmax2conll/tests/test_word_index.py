@@ -0,0 +1,46 @@
+import pytest
+
+from mmax2conll.mmax_item_readers import MMAXMarkableReader
+from mmax2conll.word_index import WordIndex, WordSpan
+
+
+@pytest.fixture
+def word_index():
+    return WordIndex(f'word_{i}' for i in range(1, 11))
+
+
+def test_span_from_text(word_index):
+    reader = MMAXMarkableReader(word_index)
+    assert reader.word_index is word_index
+
+    span = reader.span_from_text('word_2..word_5')
+    assert isinstance(span, WordSpan)
+    assert span.is_consecutive()
+    assert span == ['word_2', 'word_3', 'word_4', 'word_5']
+    assert len(span) == 4
+    assert span[-1] == 'word_5'
+
+    span = reader.span_from_text('word_2..word_3,word_4,word_7')
+    assert span.ranges == [(1, 4), (6, 7)]
+    assert not span.is_consecutive()
+    assert list(span) == ['word_2', 'word_3', 'word_4', 'word_7']
+
+
+def test_span_from_text_unknown_id(word_index):
+    reader = MMAXMarkableReader(word_index)
+    assert reader.span_from_text('word_1..word_2,word_X') == \
+        ['word_1', 'word_2', 'word_X']
+    with pytest.raises(ValueError):
+        reader.span_from_text('word_1..word_X')
+    with pytest.raises(ValueError):
+        reader.span_from_text('word_3..word_1')
+
+
+def test_matches(word_index):
+    sentences = [
+        [{'id': f'word_{i}'} for i in range(1, 4)],
+        [{'id': f'word_{i}'} for i in range(4, 11)],
+    ]
+    assert word_index.matches(sentences)
+    assert not word_index.matches(sentences[1:])
+    assert not word_index.matches(sentences[::-1])
@@ -0,0 +1,122 @@
+#! /usr/bin/env python3
+"""
+Time `CorefConverter.uniqueyfy` on documents with thousands of mentions in a
+few giant chains.
+
+Every chain shares most of its mentions with the next one, which is either a
+strict superset of it (`nested`) or not (`overlapping`), so nearly every
+mention is in multiple reference sets. Every measurement is written as one
+JSON object per line, like `run_benchmarks.py` does.
+
+Run from the `naf2conll` directory:
+
+    python benchmarks/giant_chains.py -m 1000 10000 100000
+"""
+import os
+import sys
+import json
+import random
+import logging
+import platform
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from naf2conll.conll_converters import CorefConverter  # noqa: E402
+
+from run_benchmarks import measure  # noqa: E402
+
+
+def giant_chains(n_mentions, n_chains=4, nested=True, seed=0):
+    """
+    Generate `n_chains` reference sets with `n_mentions` mentions in total.
+
+    If `nested`, every chain contains all mentions of the previous chain,
+    otherwise every chain shares all but one of its mentions with the
+    previous chain.
+    """
+    rng = random.Random(seed)
+    size = max(2, n_mentions // n_chains)
+    mentions = [
+        tuple(f'w{i}' for i in range(start, start + rng.randint(1, 4)))
+        for start in range(0, 5 * (size + n_chains), 5)
+    ]
+    chains = []
+    for number in range(n_chains):
+        if nested:
+            chain = mentions[:size + number]
+        else:
+            chain = mentions[number:size + number]
+        chain = list(chain)
+        rng.shuffle(chain)
+        chains.append(chain)
+    return chains
+
+
+def run(sizes, n_chains=4, memory=True, repeat=1, seed=0):
+    """
+    Benchmark `uniqueyfy` for every number of mentions in `sizes`.
+
+    Yields a dictionary for every measurement.
+    """
+    for n_mentions in sizes:
+        for nested in (True, False):
+            chains = giant_chains(n_mentions, n_chains, nested, seed)
+            kept, seconds, peak = measure(
+                lambda: CorefConverter.uniqueyfy(chains),
+                memory,
+                repeat
+            )
+            yield dict(
+                benchmark='naf2conll',
+                stage='uniqueyfy',
+                chains='nested' if nested else 'overlapping',
+                mentions=sum(map(len, chains)),
+                kept_chains=len(kept),
+                seconds=seconds,
+                peak_memory=peak,
+                python=platform.python_version(),
+            )
+
+
+def main(cmdline_args=None):
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-m', '--mentions', type=int, nargs='+',
+                        default=[1000, 10000],
+                        help="Number of mentions of the synthetic documents")
+    parser.add_argument('-c', '--chains', type=int, default=4,
+                        help="Number of chains")
+    parser.add_argument('-l', '--log-level', default='ERROR',
+                        help="Logging level")
+    parser.add_argument('-o', '--output',
+                        help="Append the results to this file instead of"
+                             " printing them")
+    parser.add_argument('--repeat', type=int, default=1,
+                        help="Report the fastest of this many runs")
+    parser.add_argument('--no-memory', dest='memory', action='store_false',
+                        help="Do not measure the peak memory usage")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(cmdline_args)
+    logging.basicConfig(level=args.log_level)
+
+    results = run(
+        args.mentions,
+        n_chains=args.chains,
+        memory=args.memory,
+        repeat=args.repeat,
+        seed=args.seed,
+    )
+    fd = open(args.output, 'a') if args.output else sys.stdout
+    try:
+        for result in results:
+            fd.write(json.dumps(result) + '\n')
+            fd.flush()
+    finally:
+        if fd is not sys.stdout:
+            fd.close()
+
+
+if __name__ == '__main__':
+    main()
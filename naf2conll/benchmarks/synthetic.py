@@ -0,0 +1,171 @@
+#! /usr/bin/env python3
+"""
+Generate synthetic NAF documents of arbitrary size.
+
+Every document has a text layer, a terms layer with one term per token, a
+dependency layer (to make the file as heavy as the output of a real parser)
+and a coreference layer, so it can be converted using
+`config/default_config.yml`.
+"""
+import os
+import random
+from xml.sax.saxutils import escape
+
+VOCABULARY = (
+    'de het een en van in is dat op te zijn met voor niet aan er om ook als'
+    ' bij door maar nog naar uit wel dan over tot zo kan dit wat al worden'
+    ' jaar Nederland regering mensen huis stad land werk tijd dag kinderen'
+).split()
+
+
+def generate_sentences(n_tokens, rng, min_length=3, max_length=30):
+    """
+    Generate `[(first token index, last token index + 1), ...]` for sentences
+    of random length containing exactly `n_tokens` tokens.
+    """
+    sentences = []
+    start = 0
+    while start < n_tokens:
+        stop = min(start + rng.randint(min_length, max_length), n_tokens)
+        sentences.append((start, stop))
+        start = stop
+    return sentences
+
+
+def generate_chains(n_tokens, rng, mention_density=0.1, chain_size=5,
+                    max_span_length=4, gap_fraction=0.0):
+    """
+    Generate coreference chains over `n_tokens` tokens.
+
+    :param mention_density: number of mentions per token
+    :param chain_size:      average number of mentions per chain
+    :param max_span_length: maximum number of tokens in a mention
+    :param gap_fraction:    fraction of mentions (of at least 3 tokens) that
+                            have a gap, i.e. are not consecutive
+    :return:                list of chains, where a chain is a list of
+                            mentions and a mention is a list of token indices
+    """
+    n_mentions = int(n_tokens * mention_density)
+    mentions = []
+    for _ in range(n_mentions):
+        length = rng.randint(1, min(max_span_length, n_tokens))
+        start = rng.randrange(n_tokens - length + 1)
+        span = list(range(start, start + length))
+        if length >= 3 and rng.random() < gap_fraction:
+            del span[rng.randrange(1, length - 1)]
+        mentions.append(span)
+
+    n_chains = max(1, round(n_mentions / chain_size)) if mentions else 0
+    chains = [[] for _ in range(n_chains)]
+    for mention in mentions:
+        chains[rng.randrange(n_chains)].append(mention)
+    return [chain for chain in chains if chain]
+
+
+def write_naf(filename, sentences, chains, rng, deps=True):
+    """
+    Write a NAF file with one term `t_<i>` for every token `w<i + 1>`.
+    """
+    words = [
+        rng.choice(VOCABULARY)
+        for _ in range(sentences[-1][1] if sentences else 0)
+    ]
+    with open(filename, 'w') as fd:
+        fd.write(
+            "<?xml version='1.0' encoding='UTF-8'?>\n"
+            '<NAF xml:lang="nl" version="3.0">\n'
+        )
+        fd.write(f'  <raw>{escape(" ".join(words))}</raw>\n  <text>\n')
+        offset = 0
+        for number, (start, stop) in enumerate(sentences, 1):
+            for index in range(start, stop):
+                word = words[index]
+                fd.write(
+                    f'    <wf id="w{index + 1}" offset="{offset}"'
+                    f' length="{len(word)}" sent="{number}" para="1">'
+                    f'{escape(word)}</wf>\n'
+                )
+                offset += len(word) + 1
+        fd.write('  </text>\n  <terms>\n')
+        for index, word in enumerate(words):
+            fd.write(
+                f'    <term id="t_{index}" type="open"'
+                f' lemma="{escape(word)}" pos="noun">\n'
+                f'      <span>\n'
+                f'        <target id="w{index + 1}"/>\n'
+                f'      </span>\n'
+                f'    </term>\n'
+            )
+        fd.write('  </terms>\n')
+        if deps:
+            fd.write('  <deps>\n')
+            for start, stop in sentences:
+                for index in range(start + 1, stop):
+                    fd.write(
+                        f'    <dep from="t_{start}" to="t_{index}"'
+                        ' rfunc="hd/mod"/>\n'
+                    )
+            fd.write('  </deps>\n')
+        fd.write('  <coreferences>\n')
+        for number, chain in enumerate(chains, 1):
+            fd.write(f'    <coref id="co{number}" type="entity">\n')
+            for mention in chain:
+                fd.write('      <span>\n')
+                for index in mention:
+                    fd.write(f'        <target id="t_{index}"/>\n')
+                fd.write('      </span>\n')
+            fd.write('    </coref>\n')
+        fd.write('  </coreferences>\n</NAF>\n')
+
+
+def write_document(directory, name, n_tokens, seed=0, deps=True,
+                   **chain_kwargs):
+    """
+    Write a synthetic NAF document to `directory`, which is created if it
+    does not exist.
+
+    Returns a `(NAF file, statistics)` tuple.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    naf_file = os.path.join(directory, name + '.naf')
+
+    sentences = generate_sentences(n_tokens, rng)
+    chains = generate_chains(n_tokens, rng, **chain_kwargs)
+    write_naf(naf_file, sentences, chains, rng, deps=deps)
+
+    statistics = {
+        'tokens': n_tokens,
+        'sentences': len(sentences),
+        'mentions': sum(map(len, chains)),
+        'chains': len(chains),
+    }
+    return naf_file, statistics
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(description="Generate a synthetic NAF document")
+    parser.add_argument('directory')
+    parser.add_argument('-n', '--tokens', type=int, default=1000)
+    parser.add_argument('--name', default='synthetic')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-deps', dest='deps', action='store_false',
+                        help="Do not write a dependency layer")
+    parser.add_argument('--mention-density', type=float, default=0.1)
+    parser.add_argument('--chain-size', type=float, default=5)
+    parser.add_argument('--max-span-length', type=int, default=4)
+    parser.add_argument('--gap-fraction', type=float, default=0.0)
+    args = parser.parse_args()
+    print(write_document(
+        args.directory,
+        args.name,
+        args.tokens,
+        seed=args.seed,
+        deps=args.deps,
+        mention_density=args.mention_density,
+        chain_size=args.chain_size,
+        max_span_length=args.max_span_length,
+        gap_fraction=args.gap_fraction,
+    )[-1])
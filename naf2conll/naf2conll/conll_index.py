@@ -0,0 +1,267 @@
+#! /usr/bin/env python3
+import os
+import re
+import mmap
+import logging
+
+from . import constants as c
+
+logger = logging.getLogger(None if __name__ == '__main__' else __name__)
+
+PART_START = re.compile(
+    rb'^#begin document \((.*)\); part (\d+)\r?$',
+    re.MULTILINE
+)
+PART_END = re.compile(rb'^#end document\r?(?:\n|\Z)', re.MULTILINE)
+END_LINE = b'#end document'
+
+
+class CoNLLIndex:
+    """
+    Maps the document ID and part number of every part in one or more CoNLL
+    files to the file, byte offset and number of bytes of that part, from
+    the `#begin document` line up to and including the `#end document`
+    line.
+
+    An index is saved as a tab separated file with the line
+
+        [document ID]\\t[part number]\\t[file name]\\t[byte offset]\\t[size]
+
+    for every part, in the order of the parts in the files. File names are
+    relative to the directory of the index file. The index of `corpus.conll`
+    is usually saved as `corpus.conll` + `c.INDEX_SUFFIX`.
+
+    Every entry is a `(document ID, part number, file name, byte offset,
+    size)` tuple.
+    """
+
+    def __init__(self, entries=None):
+        self.entries = entries if entries is not None else []
+        self._locations = None
+
+    @staticmethod
+    def parts_in(data, filename, offset=0):
+        """
+        Get the entries of all parts in `data`, the bytes at `offset` in
+        `filename`.
+        """
+        entries = []
+        for match in PART_START.finditer(data):
+            end = PART_END.search(data, match.end())
+            if end is None:
+                raise ValueError(
+                    f"Part {int(match.group(2))} of document"
+                    f" {match.group(1).decode()!r} in {filename} does not end"
+                )
+            end = end.end()
+            entries.append((
+                match.group(1).decode(),
+                int(match.group(2)),
+                filename,
+                offset + match.start(),
+                end - match.start(),
+            ))
+        return entries
+
+    @classmethod
+    def build(cls, filenames, directory=None):
+        """
+        Create the index of the CoNLL files `filenames`.
+
+        The file names in the index are relative to `directory`, which is the
+        directory of the first file if it is `None`.
+
+        Reads the files line by line, so they are never in memory completely.
+        """
+        if directory is None:
+            directory = os.path.dirname(filenames[0])
+        directory = directory or os.curdir
+        entries = []
+        for filename in filenames:
+            name = os.path.relpath(filename, directory)
+            with open(filename, 'rb') as fd:
+                offset = 0
+                start = None
+                for line in fd:
+                    match = PART_START.match(line.rstrip(b'\n'))
+                    if match is not None:
+                        start = match
+                        start_offset = offset
+                    elif line.rstrip(b'\r\n') == END_LINE and \
+                            start is not None:
+                        entries.append((
+                            start.group(1).decode(),
+                            int(start.group(2)),
+                            name,
+                            start_offset,
+                            offset + len(line) - start_offset,
+                        ))
+                        start = None
+                    offset += len(line)
+            if start is not None:
+                raise ValueError(
+                    f"Part {int(start.group(2))} of document"
+                    f" {start.group(1).decode()!r} in {filename} does not end"
+                )
+        return cls(entries)
+
+    @classmethod
+    def load(cls, index_file):
+        """
+        Read an index saved using `save`.
+        """
+        entries = []
+        with open(index_file) as fd:
+            for line in fd:
+                document_id, part_number, filename, offset, size = \
+                    line.rstrip('\n').rsplit('\t', 4)
+                entries.append((
+                    document_id,
+                    int(part_number),
+                    filename,
+                    int(offset),
+                    int(size),
+                ))
+        return cls(entries)
+
+    def save(self, index_file):
+        """
+        Save this index as a tab separated file.
+        """
+        with open(index_file, 'w') as fd:
+            for entry in self.entries:
+                fd.write('\t'.join(map(str, entry)) + '\n')
+
+    def extend(self, entries):
+        """
+        Add entries to the end of this index.
+        """
+        self.entries.extend(entries)
+        self._locations = None
+
+    def locate(self, document_id, part_number=0):
+        """
+        Get the `(file name, byte offset, size)` of a part.
+
+        Raises a `KeyError` if the part is not in this index.
+        """
+        if self._locations is None:
+            self._locations = {}
+            for document, part, filename, offset, size in self.entries:
+                self._locations.setdefault(
+                    (document, part),
+                    (filename, offset, size)
+                )
+        return self._locations[document_id, part_number]
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+
+class MappedCoNLLReader:
+    """
+    Reads single parts from CoNLL files using an index and memory maps, so
+    only the pages containing a part are read from disk.
+
+    Use `open` to create a reader for a CoNLL file and its index file, and
+    close it (or use it as a context manager) when done.
+    """
+
+    def __init__(self, index, directory='.'):
+        self.index = index
+        self.directory = directory
+        self.files = {}
+
+    @classmethod
+    def open(cls, filename, index_file=None):
+        """
+        Create a reader for the CoNLL file `filename`, or for all the files
+        in `index_file`.
+
+        `index_file` defaults to `filename` + `c.INDEX_SUFFIX`. If that file
+        does not exist, the index of `filename` is built first.
+        """
+        if index_file is None:
+            index_file = filename + c.INDEX_SUFFIX
+        if os.path.exists(index_file):
+            index = CoNLLIndex.load(index_file)
+            return cls(index, os.path.dirname(index_file))
+        logger.info(f"Indexing {filename}")
+        return cls(
+            CoNLLIndex.build([filename]),
+            os.path.dirname(filename)
+        )
+
+    def mapped(self, filename):
+        """
+        Get the memory map of a file in the index.
+        """
+        data = self.files.get(filename)
+        if data is None:
+            with open(os.path.join(self.directory, filename), 'rb') as fd:
+                data = self.files[filename] = mmap.mmap(
+                    fd.fileno(),
+                    0,
+                    access=mmap.ACCESS_READ
+                )
+        return data
+
+    def read_part(self, document_id, part_number=0):
+        """
+        Get the text of a part, including its `#begin document` and
+        `#end document` lines.
+        """
+        filename, offset, size = self.index.locate(document_id, part_number)
+        return self.mapped(filename)[offset:offset + size].decode()
+
+    def part_rows(self, document_id, part_number=0):
+        """
+        Get the rows of a part as a list of sentences, where every sentence
+        is a list of rows and every row is a list of the values in its
+        columns, starting with the document ID.
+        """
+        sentences = []
+        sentence = []
+        for line in self.read_part(document_id, part_number).splitlines():
+            if line.startswith('#'):
+                continue
+            if line:
+                sentence.append(line.split())
+            elif sentence:
+                sentences.append(sentence)
+                sentence = []
+        if sentence:
+            sentences.append(sentence)
+        return sentences
+
+    def close(self):
+        for data in self.files.values():
+            data.close()
+        self.files.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+if __name__ == '__main__':
+    from argparse import ArgumentParser
+
+    parser = ArgumentParser(
+        description="Create the index of the parts in CoNLL files"
+    )
+    parser.add_argument('conll_files', nargs='+')
+    parser.add_argument('-o', '--output',
+                        help="Index file. Defaults to the first file + "
+                             f"{c.INDEX_SUFFIX!r}")
+    args = parser.parse_args()
+    index_file = args.output or args.conll_files[0] + c.INDEX_SUFFIX
+    CoNLLIndex.build(
+        args.conll_files,
+        os.path.dirname(index_file)
+    ).save(index_file)
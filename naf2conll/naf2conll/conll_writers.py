@@ -1,6 +1,8 @@
+import os
 import logging
 
 from . import constants as c
+from .conll_index import CoNLLIndex
 
 logger = logging.getLogger(None if __name__ == '__main__' else __name__)
 
@@ -79,15 +81,34 @@ class CoNLLWriter:
         parse = join(column 6 of row for row in sentence)
     ```
 
+    # Buffering
+    `buffering` determines how much output is formatted before it is passed
+    to `writeable.write`:
+
+     - `'word'`: every value is written separately
+     - `'sentence'`: every sentence is formatted into one string
+     - `'part'`: every part is formatted into one string
+
+    The output is the same for all of them.
+
     [CoNLL-2012]: http://conll.cemantix.org/2012/data.html
     [LDC2011T03]: https://catalog.ldc.upenn.edu/LDC2011T03
 
     """
 
+    BUFFERING_MODES = ('word', 'sentence', 'part')
+
     def __init__(self, defaults=c.CONLL_DEFAULTS,
                  min_column_spacing=c.MIN_COLUMN_SPACING,
                  on_missing=c.CONLL_ON_MISSING,
-                 columns=c.CONLL_COLUMNS):
+                 columns=c.CONLL_COLUMNS,
+                 buffering=c.CONLL_BUFFERING):
+        if buffering not in self.BUFFERING_MODES:
+            raise ValueError(
+                "`buffering` should be either 'word', 'sentence' or 'part',"
+                f" but it is {buffering!r}"
+            )
+        self.buffering = buffering
         self.min_column_spacing = min_column_spacing
         self.defaults = defaults
         self.on_missing = on_missing
@@ -103,6 +124,9 @@ class CoNLLWriter:
         Assumes all words in a sentence have the same `part_number`.
         Does not validate any other values.
         """
+        if self.buffering == 'part':
+            output, writeable = writeable, PartBuffer()
+
         prev_part = 0
         self.write_part_start(writeable, document_id, prev_part)
         for sentence in sentences:
@@ -128,6 +152,8 @@ class CoNLLWriter:
                 while prev_part != current_part:
                     # First end the previous part
                     self.write_part_end(writeable)
+                    if self.buffering == 'part':
+                        writeable.flush_to(output)
                     prev_part += 1
                     # Now start the new part
                     self.write_part_start(writeable, document_id, prev_part)
@@ -135,6 +161,8 @@ class CoNLLWriter:
             self.write_sentence(writeable, document_id, sentence)
 
         self.write_part_end(writeable)
+        if self.buffering == 'part':
+            writeable.flush_to(output)
 
     @staticmethod
     def write_part_start(writeable, document_id, part_number):
@@ -159,12 +187,43 @@ class CoNLLWriter:
         Take the specified action when something is missing.
         """
         self.clean_sentence(sentence)
+        if self.buffering != 'word':
+            values = [
+                [word[column] for word in sentence]
+                for column in self.columns
+            ]
+            writeable.write(self.format_rows(
+                document_id,
+                values,
+                list(map(self.get_max_length, values))
+            ))
+            return
+
         column_sizes = self.get_column_sizes(sentence)
         for word in sentence:
             self.write_word(writeable, document_id, word, column_sizes)
         # Sentences are delimited by a newline.
         writeable.write('\n')
 
+    def format_rows(self, document_id, columns, column_sizes):
+        """
+        Format the rows of a sentence, including the empty line that ends the
+        sentence, as one string.
+
+        :param columns:         a list of string values for every column in
+                                `self.columns`
+        :param column_sizes:    the size of every column in `self.columns`
+        """
+        spacing = self.min_column_spacing * ' '
+        # Right align every value using printf-style formatting, which is
+        # the fastest way to fill in a template
+        row_format = document_id.replace('%', '%%') + ''.join(
+            f'{spacing}%{size}s' for size in column_sizes
+        )
+        rows = [row_format % row for row in zip(*columns)]
+        rows.append('\n')
+        return '\n'.join(rows)
+
     def write_word(self, writeable, document_id, word, column_sizes):
         """
         Write a row for a word
@@ -199,7 +258,8 @@ class CoNLLWriter:
         for word in sentence:
             for column in self.columns:
                 value = word[column]
-                word[column] = str(value) if value is not None else ''
+                if type(value) is not str:
+                    word[column] = str(value) if value is not None else ''
 
     def add_missing_data_to_sentence(self, sentence):
         """
@@ -256,4 +316,117 @@ class CoNLLWriter:
         """
         Get the length of the largest element
         """
-        return max(len(s) for s in iterable)
+        return max(map(len, iterable))
+
+
+class PartBuffer(list):
+    """
+    Collects everything written to it until it is flushed, so a whole part
+    can be written at once.
+    """
+    write = list.append
+
+    def flush_to(self, writeable):
+        """
+        Write the collected strings to `writeable` in one call and clear
+        this buffer.
+        """
+        writeable.write(''.join(self))
+        self.clear()
+
+
+class ConcatenatedOutput:
+    """
+    Writes the CoNLL output of many documents to one file, or to `shards`
+    files of roughly equal size, together with an index of the documents.
+
+    Every document is appended to the shard that is the smallest so far, so
+    the output only depends on the order in which the documents are added.
+    The shards of `corpus.conll` are called `corpus.000.conll`,
+    `corpus.001.conll`, etc.
+
+    The `.conll_index.CoNLLIndex` of the parts of all documents is saved as
+    `filename + c.INDEX_SUFFIX`.
+
+    Everything is written to temporary files that replace the output files
+    when this object is closed, unless it is closed because of an exception.
+    """
+
+    def __init__(self, filename, shards=c.SHARDS,
+                 buffer_size=c.OUTPUT_BUFFER_SIZE):
+        if shards < 1:
+            raise ValueError(
+                f"`shards` should be at least 1, but it is {shards!r}"
+            )
+        self.index_file = filename + c.INDEX_SUFFIX
+        self.shard_files = self.shard_filenames(filename, shards)
+        self.names = list(map(os.path.basename, self.shard_files))
+        self.sizes = [0] * shards
+        self.index = CoNLLIndex()
+        self.fds = []
+        try:
+            for shard_file in self.shard_files:
+                self.fds.append(open(
+                    shard_file + c.PARTIAL_FILE_SUFFIX,
+                    'wb',
+                    buffering=buffer_size
+                ))
+        except Exception:
+            self.close(discard=True)
+            raise
+
+    @staticmethod
+    def shard_filenames(filename, shards=c.SHARDS):
+        """
+        Get the names of the files the output is split into.
+        """
+        if shards == 1:
+            return [filename]
+        root, extension = os.path.splitext(filename)
+        return [f'{root}.{shard:03}{extension}' for shard in range(shards)]
+
+    def add(self, document_id, text):
+        """
+        Append the CoNLL output of a document to the smallest shard.
+        """
+        data = text.encode()
+        shard = self.sizes.index(min(self.sizes))
+        self.index.extend(CoNLLIndex.parts_in(
+            data,
+            self.names[shard],
+            self.sizes[shard]
+        ))
+        self.fds[shard].write(data)
+        self.sizes[shard] += len(data)
+
+    def close(self, discard=False):
+        """
+        Write the index and replace the output files by the temporary files.
+
+        If `discard`, only remove the temporary files.
+        """
+        for fd in self.fds:
+            fd.close()
+        self.fds = []
+        temporary_index = self.index_file + c.PARTIAL_FILE_SUFFIX
+        temporaries = [
+            shard_file + c.PARTIAL_FILE_SUFFIX
+            for shard_file in self.shard_files
+        ]
+        try:
+            if not discard:
+                self.index.save(temporary_index)
+                for shard_file, temporary in zip(self.shard_files,
+                                                 temporaries):
+                    os.replace(temporary, shard_file)
+                os.replace(temporary_index, self.index_file)
+        finally:
+            for temporary in temporaries + [temporary_index]:
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(discard=exc_type is not None)
@@ -1,13 +1,16 @@
 #  ---- Configuration defaults ---- start
 # Data processing
 VALIDATE = True
+STREAM_NAF = True
 UNIQUEYFY = False
 FILL_NON_CONSECUTIVE_COREF_SPANS = False
+USE_NUMPY = False
 SENTENCE_FILTER = 'none'
 
 # Reporting
 ALLOW_OVERWRITING = False
 LOG_ON_ERROR = True
+JOBS = 1
 
 # NAF
 NAF_EXTENSION = '.naf'
@@ -16,6 +19,7 @@ DIRS_TO_IGNORE = []
 # CoNLL
 CONLL_EXTENSION = '.conll'
 MIN_COLUMN_SPACING = 3
+CONLL_BUFFERING = 'sentence'
 
 CONLL_COLUMNS = [
     # 'part_number',
@@ -65,6 +69,14 @@ CONLL_DEFAULTS = {
 }
 #  ---- Configuration defaults ---- end
 
+MANIFEST_FILE = None
+MANIFEST_SAVE_INTERVAL = 10  # seconds
+PARTIAL_FILE_SUFFIX = '.part'
+HASH_CHUNK_SIZE = 1 << 20
+SHARDS = 1
+INDEX_SUFFIX = '.index'
+OUTPUT_BUFFER_SIZE = 1 << 20
+
 SENTENCE_START_NUMBER = 1
 
 SENTENCE_FILTERS = {
@@ -1,9 +1,12 @@
 #! /usr/bin/env python3
 
+import io
 import os
+import time
+import pickle
 import logging
-
-from KafNafParserPy import KafNafParser
+import multiprocessing
+from collections import Counter
 
 from . import constants as c
 from .util import (
@@ -12,12 +15,54 @@ from .util import (
     document_ID_from_filename,
     add_word_numbers,
 )
-from .naf_readers import NAFReader
+from .naf_readers import NAFReader, NAFStreamReader
 from .conll_converters import CorefConverter
-from .conll_writers import CoNLLWriter
+from .conll_writers import CoNLLWriter, ConcatenatedOutput
+from .manifest import Manifest, hash_config
 
 logger = logging.getLogger(None if __name__ == '__main__' else __name__)
 
+# Keyword arguments for `single_main`, set once per worker process by
+# `_init_worker`
+_worker_kwargs = {}
+
+
+def _init_worker(main, kwargs):
+    """
+    Store the class and keyword arguments used by `_convert_in_worker`,
+    including the reader and writer that this worker process reuses for all
+    its documents.
+
+    The keyword arguments are inherited by the forked worker processes
+    instead of being pickled, because the configured filters are lambdas.
+    """
+    _worker_kwargs['main'] = main
+    _worker_kwargs['kwargs'] = main.with_reader_and_writer(kwargs)
+
+
+def _convert_in_worker(files):
+    """
+    Call `single_main` with `files` as positional arguments in a worker
+    process.
+
+    Returns a `(result, exception)` pair instead of raising the exception,
+    so the parent process can decide whether to log or re-raise it.
+    Exceptions that cannot be pickled (e.g. `lxml.etree.XMLSyntaxError`) are
+    replaced by an `Exception` with the same arguments.
+    """
+    try:
+        result = _worker_kwargs['main'].single_main(
+            *files,
+            **_worker_kwargs['kwargs']
+        )
+    except Exception as e:
+        try:
+            pickle.dumps(e)
+        except Exception:
+            e = Exception(*e.args)
+        return None, e
+    return result, None
+
 
 class Main:
     @classmethod
@@ -39,43 +84,124 @@ class Main:
                 yield subdir
 
     @classmethod
-    def super_dir_main(cls, directories, output_dir,
+    def super_dir_main(cls, directories, output_dir=None,
                        naf_extension=c.NAF_EXTENSION,
                        dirs_to_ignore=c.DIRS_TO_IGNORE,
                        allow_overwriting=c.ALLOW_OVERWRITING,
+                       manifest_file=c.MANIFEST_FILE,
+                       config_hash=None,
+                       output_file=None,
+                       shards=c.SHARDS,
                        **kwargs):
+        """
+        Batch convert all directories containing NAF files found in
+        `directories`.
+
+        If `output_file` is given, all documents are written to that file, or
+        to `shards` files, using a `.conll_writers.ConcatenatedOutput` instead
+        of to one file per document in `output_dir`.
+
+        Unless `manifest_file` is `None`, the converted documents are recorded
+        in a `.manifest.Manifest` saved as `manifest_file` and documents whose
+        input file and configuration did not change since they were
+        recorded are skipped. `config_hash` identifies the configuration and
+        is calculated from the other arguments if it is `None`.
+
+        Logs the number of converted documents and the throughput when done.
+        """
         logger.debug(f"output_dir: {output_dir}")
-        for directory in directories:
-            data_dirs = sorted(cls.find_data_dirs(
-                directory=directory,
-                naf_extension=naf_extension,
-                dirs_to_ignore=dirs_to_ignore
-            ))
-            for data_dir in data_dirs:
-                cur_output_dir = os.path.join(
-                    output_dir,
-                    data_dir[len(directory):]
+        logger.debug(f"output_file: {output_file}")
+        start = time.perf_counter()
+        counts = Counter()
+        manifest = None
+        if manifest_file is not None:
+            if output_file is not None:
+                raise ValueError(
+                    "A manifest cannot be used when concatenating the output"
                 )
-                if not allow_overwriting and os.path.exists(cur_output_dir):
-                    logger.warn(
-                        f"Merging output converted from {data_dir} into"
-                        f" {cur_output_dir}"
-                    )
-                else:
-                    logger.debug(f"Creating: {cur_output_dir}")
-                    os.makedirs(cur_output_dir, exist_ok=True)
-                    logger.info(
-                        f"Saving data converted from {data_dir} in"
-                        f" {cur_output_dir}"
+            manifest = Manifest.load(manifest_file)
+            if config_hash is None:
+                config_hash = hash_config(dict(
+                    kwargs,
+                    naf_extension=naf_extension,
+                ))
+        output = None
+        if output_file is not None:
+            output = ConcatenatedOutput(output_file, shards)
+        try:
+            for directory in directories:
+                data_dirs = sorted(cls.find_data_dirs(
+                    directory=directory,
+                    naf_extension=naf_extension,
+                    dirs_to_ignore=dirs_to_ignore
+                ))
+                for data_dir in data_dirs:
+                    cur_output_dir = None
+                    if output is None:
+                        cur_output_dir = cls.create_output_dir(
+                            data_dir,
+                            os.path.join(
+                                output_dir,
+                                data_dir[len(directory):]
+                            ),
+                            allow_overwriting
+                        )
+
+                    counts += cls.dir_main(
+                        input_dir=data_dir,
+                        output_dir=cur_output_dir,
+                        naf_extension=naf_extension,
+                        allow_overwriting=allow_overwriting,
+                        manifest=manifest,
+                        config_hash=config_hash,
+                        output=output,
+                        **kwargs
                     )
+        except BaseException:
+            if output is not None:
+                output.close(discard=True)
+            raise
+        if output is not None:
+            output.close()
+        cls.log_throughput(counts, time.perf_counter() - start)
 
-                cls.dir_main(
-                    input_dir=data_dir,
-                    output_dir=cur_output_dir,
-                    naf_extension=naf_extension,
-                    allow_overwriting=allow_overwriting,
-                    **kwargs
-                )
+    @staticmethod
+    def create_output_dir(data_dir, output_dir, allow_overwriting):
+        """
+        Create the directory to save the data converted from `data_dir` in.
+
+        Returns `output_dir`.
+        """
+        if not allow_overwriting and os.path.exists(output_dir):
+            logger.warn(
+                f"Merging output converted from {data_dir} into"
+                f" {output_dir}"
+            )
+        else:
+            logger.debug(f"Creating: {output_dir}")
+            os.makedirs(output_dir, exist_ok=True)
+            logger.info(
+                f"Saving data converted from {data_dir} in {output_dir}"
+            )
+        return output_dir
+
+    @staticmethod
+    def log_throughput(counts, seconds):
+        """
+        Log a summary of a batch conversion that took `seconds` seconds.
+
+        `counts` contains the number of `converted`, `failed` and `skipped`
+        documents and the number of `bytes` of the converted NAF files.
+        """
+        seconds = max(seconds, 1e-9)
+        megabytes = counts['bytes'] / 1e6
+        logger.info(
+            f"Converted {counts['converted']} documents ({megabytes:.1f} MB)"
+            f" in {seconds:.1f} seconds: {counts['converted'] / seconds:.2f}"
+            f" documents/s, {megabytes / seconds:.2f} MB/s."
+            f" {counts['failed']} documents failed and {counts['skipped']}"
+            " were skipped."
+        )
 
     @classmethod
     def dir_main(cls, input_dir, output_dir,
@@ -83,9 +209,27 @@ class Main:
                  conll_extension=c.CONLL_EXTENSION,
                  naf_extension=c.NAF_EXTENSION,
                  log_on_error=c.LOG_ON_ERROR,
+                 jobs=c.JOBS,
+                 manifest=None,
+                 config_hash=None,
+                 output=None,
                  **kwargs):
         """
         Batch convert all NAF files in `input_dir`.
+
+        Converts `jobs` documents in parallel if `jobs > 1`.
+
+        If a `.conll_writers.ConcatenatedOutput` is given as `output`, the
+        documents are added to it in the order of their file names instead of
+        being written to `output_dir`.
+
+        If a `.manifest.Manifest` is given, documents that are up to date
+        according to it are skipped, outputs recorded in it may be replaced
+        and converted documents are recorded in it.
+
+        Returns a `collections.Counter` with the number of `converted`,
+        `failed` and `skipped` documents and the number of `bytes` of the
+        converted NAF files.
         """
         files = sorted(
             filename
@@ -93,29 +237,66 @@ class Main:
             if filename.endswith(naf_extension)
         )
 
+        counts = Counter()
+        documents = []
         for name in files:
             naf_file = os.path.join(input_dir, name)
+            if output is not None:
+                documents.append((name, (None, naf_file)))
+                continue
             output_file = os.path.join(
                 output_dir,
                 name[:-len(naf_extension)]
             ) + conll_extension
 
+            if manifest is not None and manifest.is_up_to_date(
+                output_file,
+                [naf_file],
+                config_hash
+            ):
+                logger.info(
+                    f"Skipping {name} from {input_dir}: it did not change"
+                    " since it was converted"
+                )
+                counts['skipped'] += 1
+                continue
+
             if os.path.exists(output_file):
                 if allow_overwriting:
                     logger.warn(f"Overwriting {output_file}")
+                elif manifest is not None and manifest.is_managed(output_file):
+                    logger.info(
+                        f"Converting {name} from {input_dir} again, because"
+                        " its input or the configuration changed"
+                    )
                 else:
                     raise IOError(f"Will not overwrite: {output_file}")
-            try:
-                cls.single_main(
-                    output_file,
-                    naf_file,
-                    **kwargs
-                )
-            except Exception as e:
+            documents.append((name, (output_file, naf_file)))
+
+        kwargs.update(naf_extension=naf_extension)
+        results = cls.convert_documents(
+            [files for _, files in documents],
+            jobs,
+            **kwargs
+        )
+        try:
+            for (name, (output_file, naf_file)), (result, e) in zip(
+                documents,
+                results
+            ):
+                if e is None:
+                    counts['converted'] += 1
+                    counts['bytes'] += os.path.getsize(naf_file)
+                    if output is not None:
+                        output.add(*result)
+                    if manifest is not None:
+                        manifest.record(output_file, [naf_file], config_hash)
+                        manifest.checkpoint()
+                    continue
+                counts['failed'] += 1
                 if log_on_error:
                     logger.error(
-                        f"{name} from {input_dir} is skipped: "
-                        + e.args[0]
+                        f"{name} from {input_dir} is skipped: " + e.args[0]
                     )
                 else:
                     e.args = (
@@ -123,6 +304,118 @@ class Main:
                         e.args[0],
                     ) + e.args[1:]
                     raise e
+        finally:
+            # Stop the worker processes now instead of when the exception is
+            # garbage collected
+            results.close()
+            if manifest is not None:
+                manifest.save()
+        return counts
+
+    @classmethod
+    def convert_documents(cls, documents, jobs=c.JOBS, **kwargs):
+        """
+        Call `single_main` for every tuple of positional arguments in
+        `documents`, using a pool of `jobs` processes if `jobs > 1`.
+
+        The reader and writer are created once per process and reused for all
+        documents that process converts.
+
+        Yields a `(result, exception)` pair for every document, in the same
+        order as `documents`, so the output is the same as that of a serial
+        run. `result` is what `single_main` returned and `exception` is the
+        exception it raised or `None`.
+
+        The workers do not write output files themselves, but return their
+        output to this process, which writes it when the result of the
+        document is yielded. So if the caller stops at a document that
+        failed, no output of later documents is written, as in a serial run.
+
+        !! NB !! The worker processes are forked, because the filters in
+                 `kwargs` cannot be pickled.
+        """
+        if jobs <= 1 or len(documents) <= 1:
+            kwargs = cls.with_reader_and_writer(kwargs)
+            for files in documents:
+                try:
+                    result = cls.single_main(*files, **kwargs)
+                except Exception as e:
+                    yield None, e
+                else:
+                    yield result, None
+            return
+
+        context = multiprocessing.get_context('fork')
+        with context.Pool(
+            min(jobs, len(documents)),
+            initializer=_init_worker,
+            initargs=(cls, kwargs)
+        ) as pool:
+            results = pool.imap(
+                _convert_in_worker,
+                [(None, *files[1:]) for files in documents]
+            )
+            for files, (result, e) in zip(documents, results):
+                output_file = files[0]
+                if e is None and output_file is not None:
+                    try:
+                        cls.write_text(output_file, result[1])
+                    except Exception as write_error:
+                        yield None, write_error
+                        continue
+                    result = None
+                yield result, e
+
+    @classmethod
+    def with_reader_and_writer(cls, kwargs):
+        """
+        Replace the reader and writer options in the keyword arguments of
+        `single_main` by a reader and a writer created using them.
+
+        Returns a new dictionary.
+        """
+        kwargs = dict(kwargs)
+        reader_kwargs = {
+            key: kwargs.pop(key)
+            for key in ('validate', 'stream_naf')
+            if key in kwargs
+        }
+        writer_kwargs = {
+            key: kwargs.pop(key)
+            for key in ('conll_columns', 'conll_defaults',
+                        'min_column_spacing')
+            if key in kwargs
+        }
+        # `single_main` also uses `on_missing` itself
+        if 'on_missing' in kwargs:
+            writer_kwargs['on_missing'] = kwargs['on_missing']
+        kwargs['reader'] = cls.create_reader(**reader_kwargs)
+        kwargs['writer'] = cls.create_writer(**writer_kwargs)
+        return kwargs
+
+    @staticmethod
+    def create_reader(validate=c.VALIDATE, stream_naf=c.STREAM_NAF):
+        """
+        Create the reader `single_main` uses to read NAF files.
+        """
+        if stream_naf:
+            return NAFStreamReader(validate=validate)
+        return NAFReader(validate=validate)
+
+    @staticmethod
+    def create_writer(conll_columns=c.CONLL_COLUMNS,
+                      conll_defaults=c.CONLL_DEFAULTS,
+                      min_column_spacing=c.MIN_COLUMN_SPACING,
+                      on_missing=c.CONLL_ON_MISSING):
+        """
+        Create the writer `single_main` uses to write CoNLL files.
+        """
+        return CoNLLWriter(
+            defaults=conll_defaults,
+            min_column_spacing=min_column_spacing,
+            on_missing=on_missing,
+            columns=conll_columns
+        )
 
     @classmethod
     def single_main(
@@ -131,14 +424,29 @@ class Main:
            naf_file,
            naf_extension=c.NAF_EXTENSION,
            validate=c.VALIDATE,
+           stream_naf=c.STREAM_NAF,
            uniqueyfy=c.UNIQUEYFY,
            fill_non_consecutive_coref_spans=c.FILL_NON_CONSECUTIVE_COREF_SPANS,
+           use_numpy=c.USE_NUMPY,
            sentence_filter=c.SENTENCE_DEFAULT_FILTER,
            conll_columns=c.CONLL_COLUMNS,
            conll_defaults=c.CONLL_DEFAULTS,
            min_column_spacing=c.MIN_COLUMN_SPACING,
            on_missing=c.CONLL_ON_MISSING,
+           reader=None,
+           writer=None,
            ):
+        """
+        Convert one NAF file to CoNLL.
+
+        If `output_file` is `None`, nothing is written and a
+        `(document ID, CoNLL output)` pair is returned instead.
+
+        `reader` and `writer` are created from the other arguments if they
+        are `None`. Pass them to reuse them for several documents, in which
+        case `validate`, `stream_naf`, `conll_columns`, `conll_defaults` and
+        `min_column_spacing` are ignored.
+        """
         # Read document ID
         document_id = document_ID_from_filename(
             naf_file,
@@ -147,8 +455,9 @@ class Main:
         cls.check_document_id(document_id, naf_file, on_missing['document_id'])
 
         # Read data
-        reader = NAFReader(validate=validate)
-        nafobj = KafNafParser(naf_file)
+        if reader is None:
+            reader = cls.create_reader(validate, stream_naf)
+        nafobj = reader.parse(naf_file)
         sentences = reader.extract_sentences(nafobj)
         coref_sets = reader.extract_coref_sets(nafobj)
         del reader, nafobj
@@ -159,6 +468,7 @@ class Main:
             sentences,
             uniqueyfy=uniqueyfy,
             fill_spans=fill_non_consecutive_coref_spans,
+            use_numpy=use_numpy,
         ).add_data_from_coref_sets(
             coref_sets
         )
@@ -167,14 +477,22 @@ class Main:
         sentences = filter(sentence_filter, sentences)
 
         # Save the data to CoNLL
+        if writer is None:
+            writer = cls.create_writer(
+                conll_columns,
+                conll_defaults,
+                min_column_spacing,
+                on_missing
+            )
+        if output_file is None:
+            return document_id, cls.format_conll(
+                writer=writer,
+                document_id=document_id,
+                sentences=sentences
+            )
         cls.write_conll(
             filename=output_file,
-            writer=CoNLLWriter(
-                defaults=conll_defaults,
-                min_column_spacing=min_column_spacing,
-                on_missing=on_missing,
-                columns=conll_columns
-            ),
+            writer=writer,
             document_id=document_id,
             sentences=sentences
         )
@@ -199,16 +517,55 @@ class Main:
                     f" {on_missing!r}"
                 )
 
-    @staticmethod
-    def write_conll(filename, writer, document_id, sentences):
+    @classmethod
+    def write_conll(cls, filename, writer, document_id, sentences):
         """
         Write sentence data to a file in CoNLL format.
+
+        The data is first written to a temporary file that then replaces
+        `filename`, so an interrupted conversion does not leave a partial
+        output file behind.
+        """
+        cls.write_atomically(
+            filename,
+            lambda fd: writer.write(fd, document_id, sentences)
+        )
+
+    @classmethod
+    def write_text(cls, filename, text):
         """
-        with open(filename, 'w') as fd:
+        Write CoNLL output returned by `format_conll` to a file, in the same
+        way as `write_conll`.
+        """
+        cls.write_atomically(filename, lambda fd: fd.write(text))
+
+    @staticmethod
+    def write_atomically(filename, write):
+        """
+        Call `write` with a temporary file opened for writing that replaces
+        `filename` when `write` returns.
+        """
+        temporary = filename + c.PARTIAL_FILE_SUFFIX
+        try:
+            with open(temporary, 'w') as fd:
+                write(fd)
+            os.replace(temporary, filename)
+        finally:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+    @staticmethod
+    def format_conll(writer, document_id, sentences):
+        """
+        Get sentence data in CoNLL format as a string.
+        """
+        with io.StringIO() as fd:
             writer.write(fd, document_id, sentences)
+            return fd.getvalue()
 
     @staticmethod
-    def can_output_to(output, batch, allow_overwriting=None):
+    def can_output_to(output, batch, allow_overwriting=None,
+                      manifest_file=None):
         """
         Check whether the specified output location is legal.
 
@@ -221,12 +578,17 @@ class Main:
         :param allow_overwriting:   whether to allow overwriting existing
                                     files or directories. Defaults to
                                     c.ALLOW_OVERWRITING if `None`.
+        :param manifest_file:       the manifest file. An existing output
+                                    folder is allowed if it exists, because
+                                    the conversion is then resumed.
         """
         if allow_overwriting is None:
             allow_overwriting = c.ALLOW_OVERWRITING
 
         if os.path.exists(output):
-            if not allow_overwriting:
+            resume = batch and manifest_file is not None and \
+                os.path.exists(manifest_file)
+            if not allow_overwriting and not resume:
                 thing = "folder" if batch else "file"
                 raise ValueError(
                     "The configuration specifies overwriting is not allowed,"
@@ -259,6 +621,9 @@ class Main:
                     'conll_extension',
                     'log_on_error',
                     'dirs_to_ignore'
+                 ], optional_args_from_config=[
+                    'stream_naf',
+                    'use_numpy',
                  ]):
         from argparse import ArgumentParser, RawDescriptionHelpFormatter
 
@@ -288,6 +653,16 @@ class Main:
         python -m naf2conll <output.conll> <naf file>
 
 
+    To write all documents to one file instead, add `--concatenate` and pass an
+    output file instead of an output folder. Add `--shards <number of files>` to
+    split the output into that many files of roughly equal size. The byte offset
+    of every part is saved in `<output file>.index`.
+
+    To be able to resume or update a batch conversion, add `-m <manifest file>`.
+    The converted documents are then recorded in the manifest and running the
+    same command again only converts the documents that are new or changed, or
+    were converted using a different configuration.
+
     When passing folders for batch processing using -d, the output is saved using
     the same path relative to the output folder as the original folder has relative
     to the folder passed using `-d`.
@@ -308,6 +683,21 @@ class Main:
                             help="Directory to batch convert files from")
         parser.add_argument('-c', '--config', help="YAML configuration file",
                             type=file_exists)
+        parser.add_argument('-m', '--manifest', dest='manifest_file',
+                            default=c.MANIFEST_FILE,
+                            help="Record the documents converted from folders"
+                                 " in this file and skip the documents that"
+                                 " did not change since they were recorded")
+        parser.add_argument('-j', '--jobs', type=int, default=c.JOBS,
+                            help="Number of documents to convert in parallel"
+                                 " when batch converting")
+        parser.add_argument('--concatenate', action='store_true',
+                            help="Write all documents converted from folders"
+                                 " to the output file instead of to one file"
+                                 " per document in the output folder")
+        parser.add_argument('--shards', type=int, default=c.SHARDS,
+                            help="Split the concatenated output into this"
+                                 " many files")
         parser.add_argument('output',
                             help="Where to save the CoNLL output")
         parser.add_argument('naf_file', type=file_exists, nargs='?',
@@ -324,15 +714,35 @@ class Main:
 
         # Verify that the command line arguments are legal
         # AND remove the ones not needed
+        concatenate = args.pop('concatenate')
+        if not concatenate and args['shards'] != c.SHARDS:
+            parser.error("Only concatenated output can be split into shards.")
         if batch:
-            args['output_dir'] = output
+            if concatenate:
+                args['output_file'] = output
+                if args['manifest_file'] is not None:
+                    parser.error(
+                        "A manifest cannot be used when concatenating the"
+                        " output."
+                    )
+            else:
+                args['output_dir'] = output
+                del args['shards']
             if args.pop('naf_file') is not None:
                 parser.error(
                     "Please either specify a number of directories or the"
                     " necessary files to use as input, but not both."
                 )
         else:
+            if concatenate:
+                parser.error(
+                    "Only the output of batch conversions can be"
+                    " concatenated."
+                )
             del args['directories']
+            del args['manifest_file']
+            del args['jobs']
+            del args['shards']
             args['output_file'] = output
             if args['naf_file'] is None:
                 parser.error(
@@ -345,22 +755,52 @@ class Main:
             args_from_config.extend(batch_args_from_config)
             del batch_args_from_config
 
-        cls.process_config(args, args_from_config)
+        cls.process_config(
+            args,
+            args_from_config,
+            batch,
+            optional_args_from_config
+        )
 
         # Verify the output location
-        cls.can_output_to(output, batch, args.get('allow_overwriting', None))
+        if concatenate:
+            outputs = ConcatenatedOutput.shard_filenames(
+                output,
+                args['shards']
+            )
+            outputs.append(output + c.INDEX_SUFFIX)
+            for filename in outputs:
+                cls.can_output_to(
+                    filename,
+                    False,
+                    args.get('allow_overwriting', None)
+                )
+        else:
+            cls.can_output_to(
+                output,
+                batch,
+                args.get('allow_overwriting', None),
+                args.get('manifest_file', None)
+            )
 
         return batch, args
 
     @classmethod
-    def process_config(cls, args, args_from_config):
+    def process_config(cls, args, args_from_config, batch=False,
+                       optional_args_from_config=()):
         """
         Read arguments from configuration file if a configuration file is given
         in the `config` key of `args`.
 
+        The keys in `optional_args_from_config` are only read if they are in
+        the configuration file.
+
+        If `batch`, also adds the hash of the configuration as `config_hash`.
+
         Changes `args` in place.
         """
         filename = args.pop('config', None)
+        config = None
         if filename is not None:
             # Read configuration
             config = cls.read_config(filename)
@@ -370,9 +810,18 @@ class Main:
                 cls.keys_from_config(config, args_from_config, filename)
             )
 
+            # Read optional keys
+            args.update(
+                (key, config[key])
+                for key in optional_args_from_config
+                if key in config
+            )
+
             args['sentence_filter'] = c.SENTENCE_FILTERS[
                 args['sentence_filter']
             ]
+        if batch:
+            args['config_hash'] = hash_config(config)
 
     @staticmethod
     def keys_from_config(config, keys, filename):
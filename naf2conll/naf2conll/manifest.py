@@ -0,0 +1,204 @@
+import os
+import json
+import time
+import hashlib
+import logging
+
+from . import constants as c
+
+logger = logging.getLogger(None if __name__ == '__main__' else __name__)
+
+
+def hash_file(filename, chunk_size=c.HASH_CHUNK_SIZE):
+    """
+    Get the SHA-256 hash of the contents of a file as a hexadecimal string.
+    """
+    sha = hashlib.sha256()
+    with open(filename, 'rb') as fd:
+        for chunk in iter(lambda: fd.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def hash_config(config):
+    """
+    Get the SHA-256 hash of a configuration, i.e. a dictionary of options.
+
+    Functions (e.g. filters) are represented by their qualified name.
+    """
+    def describe(value):
+        if callable(value):
+            return getattr(value, '__module__', '') + '.' + \
+                getattr(value, '__qualname__', repr(value))
+        if isinstance(value, (set, frozenset)):
+            return sorted(value, key=repr)
+        return repr(value)
+
+    return hashlib.sha256(
+        json.dumps(config, sort_keys=True, default=describe).encode()
+    ).hexdigest()
+
+
+class Manifest:
+    """
+    Keeps track of the documents that have been converted, so a batch
+    conversion can be resumed or repeated without converting unchanged
+    documents again.
+
+    The manifest is a JSON file. For every output file, relative to the
+    directory of the manifest, it stores the hash of the configuration and
+    the path, size, modification time and content hash of every input file
+    and of the output file:
+
+        {
+            "version": 1,
+            "documents": {
+                "path/to/output.conll": {
+                    "config_hash": "...",
+                    "inputs": [
+                        {"path": ..., "size": ..., "mtime_ns": ...,
+                         "sha256": ...},
+                        ...
+                    ],
+                    "output": {"path": ..., "size": ..., "mtime_ns": ...,
+                               "sha256": ...}
+                },
+                ...
+            }
+        }
+
+    Files are only hashed again if their size is the same, but their
+    modification time is not.
+    """
+    VERSION = 1
+
+    def __init__(self, filename, documents=None,
+                 save_interval=c.MANIFEST_SAVE_INTERVAL):
+        self.filename = filename
+        self.documents = documents if documents is not None else {}
+        self.save_interval = save_interval
+        self.last_saved = time.monotonic()
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Read a manifest from `filename` or create an empty one if it does not
+        exist.
+        """
+        if not os.path.exists(filename):
+            return cls(filename)
+        with open(filename) as fd:
+            data = json.load(fd)
+        if data.get('version') != cls.VERSION:
+            raise ValueError(
+                f"Unsupported manifest version in {filename}:"
+                f" {data.get('version')!r}"
+            )
+        return cls(filename, data['documents'])
+
+    def save(self):
+        """
+        Write the manifest to `self.filename`.
+
+        The file is replaced atomically, so it is never left half-written.
+        """
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = self.filename + c.PARTIAL_FILE_SUFFIX
+        with open(temporary, 'w') as fd:
+            json.dump(
+                {'version': self.VERSION, 'documents': self.documents},
+                fd,
+                indent=1,
+                sort_keys=True
+            )
+        os.replace(temporary, self.filename)
+        self.last_saved = time.monotonic()
+
+    def checkpoint(self):
+        """
+        Save the manifest if it was not saved in the last
+        `self.save_interval` seconds.
+        """
+        if time.monotonic() - self.last_saved >= self.save_interval:
+            self.save()
+
+    def key(self, output_file):
+        """
+        Get the key of an output file in `self.documents`
+        """
+        return os.path.relpath(
+            os.path.abspath(output_file),
+            os.path.dirname(os.path.abspath(self.filename))
+        )
+
+    @staticmethod
+    def file_info(filename):
+        """
+        Get the path, size, modification time and content hash of a file
+        """
+        stat = os.stat(filename)
+        return {
+            'path': os.path.abspath(filename),
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'sha256': hash_file(filename),
+        }
+
+    @staticmethod
+    def file_matches(filename, info):
+        """
+        Check whether a file still has the contents described by `info`.
+
+        Updates the modification time in `info` if only that changed.
+        """
+        if os.path.abspath(filename) != info['path']:
+            return False
+        try:
+            stat = os.stat(filename)
+        except OSError:
+            return False
+        if stat.st_size != info['size']:
+            return False
+        if stat.st_mtime_ns == info['mtime_ns']:
+            return True
+        if hash_file(filename) != info['sha256']:
+            return False
+        info['mtime_ns'] = stat.st_mtime_ns
+        return True
+
+    def is_up_to_date(self, output_file, input_files, config_hash):
+        """
+        Check whether `output_file` was converted from exactly these input
+        files using the same configuration and has not changed since.
+        """
+        entry = self.documents.get(self.key(output_file))
+        if entry is None or entry['config_hash'] != config_hash:
+            return False
+        if len(entry['inputs']) != len(input_files):
+            return False
+        return self.file_matches(output_file, entry['output']) and all(
+            self.file_matches(filename, info)
+            for filename, info in zip(input_files, entry['inputs'])
+        )
+
+    def is_managed(self, output_file):
+        """
+        Check whether `output_file` was written by a conversion recorded in
+        this manifest and has not changed since, so it may be replaced.
+        """
+        entry = self.documents.get(self.key(output_file))
+        return entry is not None and \
+            self.file_matches(output_file, entry['output'])
+
+    def record(self, output_file, input_files, config_hash):
+        """
+        Record that `output_file` was converted from `input_files` using the
+        configuration with hash `config_hash`.
+        """
+        self.documents[self.key(output_file)] = {
+            'config_hash': config_hash,
+            'inputs': [self.file_info(filename) for filename in input_files],
+            'output': self.file_info(output_file),
+        }
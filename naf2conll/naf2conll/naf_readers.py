@@ -1,9 +1,28 @@
 import itertools as it
+from operator import itemgetter
 
-from KafNafParserPy import Cterm
+from lxml import etree
+from KafNafParserPy import KafNafParser
 
 from . import constants as c
-from .util import split_on_numbering
+from .util import number_runs
+
+
+class TermIndex(dict):
+    """
+    Maps term IDs to tuples of the IDs of their tokens.
+
+    The tokens of a term are only looked up, using `get_token_ids(term ID)`,
+    the first time the term is used.
+    """
+
+    def __init__(self, get_token_ids):
+        super().__init__()
+        self.get_token_ids = get_token_ids
+
+    def __missing__(self, ID):
+        token_ids = self[ID] = tuple(self.get_token_ids(ID))
+        return token_ids
 
 
 class NAFReader:
@@ -12,6 +31,13 @@ class NAFReader:
         self.validate = validate
         self.sentence_start_number = sentence_start_number
 
+    @staticmethod
+    def parse(source):
+        """
+        Parse a NAF file into the object the other methods read from.
+        """
+        return KafNafParser(source)
+
     @staticmethod
     def extract_words(nafobj):
         return (
@@ -23,14 +49,38 @@ class NAFReader:
             for token in nafobj.get_tokens()
         )
 
+    @staticmethod
+    def extract_tokens(nafobj):
+        """
+        Get a list of `(token ID, text, sentence)` tuples, where the sentence
+        is the unconverted `sent` attribute.
+        """
+        return [
+            (token.get_id(), token.get_text(), token.get_sent())
+            for token in nafobj.get_tokens()
+        ]
+
     def extract_sentences(self, nafobj):
-        words = self.extract_words(nafobj)
-        return split_on_numbering(
-            words,
-            lambda w: w['sentence'],
+        """
+        Extract the words of every sentence.
+
+        The sentence boundaries are found by comparing the `sent` attributes
+        of all tokens at once, so only one attribute per sentence is
+        converted to a number.
+        """
+        tokens = self.extract_tokens(nafobj)
+        runs = number_runs(
+            list(map(itemgetter(2), tokens)),
             self.validate,
             self.sentence_start_number
         )
+        return [
+            [
+                {'id': ID, 'word': text, 'sentence': number}
+                for ID, text, _ in tokens[start:stop]
+            ]
+            for start, stop, number in runs
+        ]
 
     @classmethod
     def extract_coref_sets(cls, nafobj):
@@ -40,29 +90,177 @@ class NAFReader:
         A coreference set is a list of spans referring to the same thing
         A span is a list of word IDs
         """
+        term_index = cls.term_index(nafobj)
         # Return an iterator of [ [word ID, word Id, ...], ...]
         return (
             # One reference "set" is a list of spans
             [
                 # One span is a list of word IDs
                 list(cls.token_ids_from_term_ids(
-                    refspan.get_span_ids(),
-                    nafobj
+                    cls.span_ids(refspan.get_node()),
+                    nafobj,
+                    term_index
                 ))
                 for refspan in ref.get_spans()
             ]
             for ref in nafobj.get_corefs()
         )
 
+    @classmethod
+    def term_index(cls, nafobj):
+        """
+        Get the `TermIndex` of the terms of a document.
+        """
+        def token_ids(ID):
+            term = nafobj.get_term(ID).get_node()
+            return cls.span_ids(term.find('span'))
+
+        return TermIndex(token_ids)
+
     @staticmethod
-    def token_ids_from_term_ids(term_ids, nafobj):
+    def span_ids(span):
+        """
+        Get the IDs of the targets of a span element or an empty list if
+        `span` is `None`.
+        """
+        if span is None:
+            return []
+        return [target.get('id') for target in span.iterchildren('target')]
+
+    @classmethod
+    def token_ids_from_term_ids(cls, term_ids, nafobj, term_index=None):
         """
         Get a token IDs, given a list of term IDs
+
+        `term_index` is the `TermIndex` of the terms of `nafobj`, which is
+        created if it is `None`. Share one between the calls for the same
+        document, so the tokens of every term are only looked up once.
+        """
+        if term_index is None:
+            term_index = cls.term_index(nafobj)
+        return it.chain.from_iterable(map(term_index.__getitem__, term_ids))
+
+
+class NAFLayers:
+    """
+    The parts of the text, terms and coreferences layers of a NAF (or KAF)
+    document that are needed to convert it to CoNLL:
+
+     - `tokens`: a list of `(token ID, text, sentence)` tuples
+     - `terms`: a `{term ID: term element}` map
+     - `corefs`: a list of coreferences, where a coreference is a list of
+       spans and a span is a list of term IDs
+    """
+    __slots__ = ('tokens', 'terms', 'corefs')
+
+    def __init__(self):
+        self.tokens = []
+        self.terms = {}
+        self.corefs = []
+
+
+class NAFStreamReader(NAFReader):
+    """
+    Reads the same sentences and coreference sets as `NAFReader`, but from
+    `NAFLayers` read incrementally by `NAFStreamReader.parse` instead of from
+    a `KafNafParser` object. Other layers are skipped, so no Python objects
+    are created for them.
+    """
+    # {document type: {layer tag: ID attribute of its items}}
+    ID_ATTRIBUTES = {
+        'NAF': {'text': 'id', 'terms': 'id'},
+        'KAF': {'text': 'wid', 'terms': 'tid'},
+    }
+
+    @classmethod
+    def parse(cls, source):
+        """
+        Incrementally read `NAFLayers` from `source` (a filename or file
+        object).
+
+        Like `KafNafParser`, only the first text, terms and coreferences
+        layers that are children of the root element are used. Stops reading
+        as soon as these three layers are read.
+        """
+        layers = NAFLayers()
+        done = set()
+        context = etree.iterparse(
+            source,
+            events=('end',),
+            tag=('text', 'terms', 'coreferences'),
+            remove_blank_text=True,
+        )
+        for _, layer in context:
+            root = layer.getparent()
+            if root is None or root.getparent() is not None or \
+               layer.tag in done:
+                continue
+            done.add(layer.tag)
+
+            ID = cls.ID_ATTRIBUTES.get(root.tag, {}).get(layer.tag, 'id')
+            if layer.tag == 'text':
+                layers.tokens = [
+                    (wf.get(ID), wf.text, wf.get('sent'))
+                    for wf in layer.iterchildren('wf')
+                ]
+            elif layer.tag == 'terms':
+                # The spans of the terms are only read when they are needed
+                layers.terms = {
+                    term.get(ID): term
+                    for term in layer.iterchildren('term')
+                }
+            else:
+                layers.corefs = [
+                    list(map(cls.span_ids, coref.iterchildren('span')))
+                    for coref in layer.iterchildren('coref')
+                ]
+
+            if len(done) == 3:
+                break
+            # Free the memory of the layers before this one. The term
+            # elements are kept alive by `layers.terms`.
+            while layer.getprevious() is not None:
+                del root[0]
+        del context
+        return layers
+
+    @staticmethod
+    def extract_words(layers):
+        return (
+            {
+                'id': ID,
+                'word': text,
+                'sentence': int(sentence),
+            }
+            for ID, text, sentence in layers.tokens
+        )
+
+    @staticmethod
+    def extract_tokens(layers):
+        return layers.tokens
+
+    @classmethod
+    def extract_coref_sets(cls, layers):
         """
-        return it.chain(*map(           # Flatten
-            Cterm.get_span_ids,         # Get token IDs
-            map(
-                nafobj.get_term,        # Get term object
-                term_ids
-            )
-        ))
+        Extract coreference sets.
+
+        A coreference set is a list of spans referring to the same thing
+        A span is a list of word IDs
+        """
+        term_index = cls.term_index(layers)
+        return (
+            [
+                list(cls.token_ids_from_term_ids(span, layers, term_index))
+                for span in coref
+            ]
+            for coref in layers.corefs
+        )
+
+    @classmethod
+    def term_index(cls, layers):
+        """
+        Get the `TermIndex` of the terms of `NAFLayers`.
+        """
+        return TermIndex(
+            lambda ID: cls.span_ids(layers.terms[ID].find('span'))
+        )
@@ -1,5 +1,7 @@
 import os
 import re
+import operator
+import itertools as it
 from argparse import ArgumentTypeError
 
 from . import constants as c
@@ -102,3 +104,50 @@ def split_on_numbering(sequence, get_number, validate=c.VALIDATE,
         prev_number = current_number
 
     return new_outer
+
+
+def number_runs(numbers, validate=c.VALIDATE, start_number=0):
+    """
+    Find the runs of equal numbers in a list of numbers, or of strings of
+    numbers (e.g. XML attributes).
+
+    Returns a list of `(start, stop, number)` tuples, such that
+    `numbers[start:stop]` are all equal to `number`. Only the first number
+    of every run of equal values is converted to an `int`.
+
+    Validates the same as `split_on_numbering` if `validate` is truthy.
+    """
+    if not numbers:
+        return []
+    # Compare all neighbours at once instead of one element at a time
+    starts = [0]
+    starts.extend(it.compress(
+        range(1, len(numbers)),
+        map(operator.ne, numbers[1:], numbers[:-1])
+    ))
+    values = [int(numbers[start]) for start in starts]
+
+    if validate and values[0] != start_number:
+        raise ValidationError(
+            "The first number of the sequence must be `start_number`"
+            f" ({start_number}), found: {values[0]}"
+        )
+
+    runs = []
+    stops = starts[1:] + [len(numbers)]
+    prev_number = None
+    for start, stop, number in zip(starts, stops, values):
+        # Different strings can still be the same number, e.g. '1' and '01'
+        if number == prev_number:
+            runs[-1] = (runs[-1][0], stop, number)
+            continue
+        if validate and prev_number is not None and \
+           number != prev_number + 1:
+            raise ValidationError(
+                f"The number of an element ({number}) must either"
+                " be equal to, or exactly one greater than the number of"
+                f" the previous element ({prev_number})."
+            )
+        runs.append((start, stop, number))
+        prev_number = number
+    return runs
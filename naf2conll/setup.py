@@ -18,6 +18,9 @@ setup(
         "KafNafParserPy>=1.88",
         "pyaml>=17.12.1",
     ],
+    extras_require={
+        'numpy': ['numpy'],
+    },
     classifiers=[
         'Intended Audience :: Developers',
         'Intended Audience :: Science/Research',
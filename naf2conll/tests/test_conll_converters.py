@@ -0,0 +1,94 @@
+import logging
+
+import pytest
+
+from naf2conll.conll_converters import CorefConverter
+
+
+def test_uniqueyfy_subsets(caplog):
+    caplog.set_level(logging.DEBUG)
+    small = [('w1',), ('w2', 'w3')]
+    big = small + [('w5',)]
+    other = [('w7',), ('w8',)]
+    kept = CorefConverter.uniqueyfy([small, big, [], other, list(other)])
+    assert kept == {frozenset(big), frozenset(other)}
+    messages = [r.getMessage() for r in caplog.records]
+    assert "Discarding empty reference set" in messages
+    assert f"Discarding duplicate reference set: {other}" in messages
+    assert messages.count(
+        "Discarding reference sets that are strictly smaller than another:"
+        f" {[frozenset(small)]}"
+    ) == 2
+    assert not any(r.levelno >= logging.WARNING for r in caplog.records)
+
+
+def test_uniqueyfy_overlapping(caplog):
+    caplog.set_level(logging.WARNING)
+    one = [('w1',), ('w2',), ('w3',)]
+    two = [('w3',), ('w4',)]
+    three = [('w3',), ('w4',), ('w5',)]
+    kept = CorefConverter.uniqueyfy([one, two, three])
+    # The second set is a strict subset of the third, the first is different
+    assert kept == {frozenset(one), frozenset(three)}
+    assert [r.getMessage() for r in caplog.records] == [
+        "Span in multiple reference sets that are quite different: ('w3',)."
+        " Sets: [[('w1',), ('w2',)], [('w4',)], [('w4',), ('w5',)]]"
+    ]
+
+
+def check_spans(sets, use_numpy, fill_spans=True):
+    sentences = [[{'id': f'w{i}'} for i in range(8)]]
+    converter = CorefConverter(
+        sentences,
+        fill_spans=fill_spans,
+        use_numpy=use_numpy,
+    )
+    return converter.check_and_fill_spans(iter(sets))
+
+
+@pytest.mark.parametrize('use_numpy', [False, True])
+def test_check_and_fill_spans(use_numpy):
+    if use_numpy:
+        pytest.importorskip('numpy')
+    sets = [
+        [['w0', 'w1'], ['w3']],
+        [['w2', 'w4', 'w5']],
+        [['w6', 'w7']],
+    ]
+    out, problem_map = check_spans([[]] + sets, use_numpy)
+    assert out == [
+        [],
+        [('w0', 'w1'), ('w3',)],
+        [('w2', 'w3', 'w4', 'w5')],
+        [('w6', 'w7')],
+    ]
+    assert problem_map == {('w2', 'w3', 'w4', 'w5'): ['w3']}
+
+    with pytest.raises(ValueError, match="must be consecutive"):
+        check_spans(sets, use_numpy, fill_spans=False)
+    with pytest.raises(ValueError, match="Illegal span specification"):
+        check_spans([[['w3', 'w2']]], use_numpy)
+    with pytest.raises(KeyError):
+        check_spans([[['w1', 'w9']]], use_numpy)
+
+
+def test_word_id_map_sort_keys():
+    sentences = [[{'id': f'word_{i}'} for i in range(1, 11)]]
+    calls = []
+
+    def sort_key(ID):
+        calls.append(ID)
+        return int(ID.split('_')[-1])
+
+    converter = CorefConverter(sentences, sort_key=sort_key)
+    word_id_map, _ = converter.word_id_map_from_coref_sets([
+        [('word_9', 'word_10'), ('word_2',)],
+        [('word_1',), ('word_10',)],
+    ])
+    assert word_id_map == {
+        'word_1': [(0, 'singleton')],
+        'word_10': [(0, 'singleton'), (1, 'end')],
+        'word_2': [(1, 'singleton')],
+        'word_9': [(1, 'start')],
+    }
+    assert sorted(calls) == ['word_1', 'word_10', 'word_2', 'word_9']
@@ -0,0 +1,97 @@
+import io
+
+import pytest
+
+from naf2conll.conll_writers import CoNLLWriter
+from naf2conll.conll_index import CoNLLIndex, MappedCoNLLReader
+
+
+def write_corpus(filename):
+    """
+    Write three documents with three parts each to `filename`.
+    """
+    writer = CoNLLWriter(columns=['part_number', 'word_number', 'word'])
+    fd = io.StringIO()
+    for document in range(3):
+        writer.write(fd, f'doc/{document}', [
+            [{'part_number': 0, 'word_number': 0, 'word': 'één'}],
+            [{'part_number': 2, 'word_number': 0, 'word': f'{document}'},
+             {'part_number': 2, 'word_number': 1, 'word': 'twee'}],
+        ])
+    with open(filename, 'w', encoding='utf-8') as out:
+        out.write(fd.getvalue())
+    return fd.getvalue()
+
+
+def test_build_and_load(tmp_path):
+    filename = str(tmp_path / 'corpus.conll')
+    with open(filename, 'wb') as fd:
+        fd.write(b'junk\n')
+    data = write_corpus(str(tmp_path / 'data.conll')).encode()
+    with open(filename, 'ab') as fd:
+        fd.write(data)
+
+    index = CoNLLIndex.build([filename])
+    assert [(ID, part) for ID, part, *_ in index] == [
+        (f'doc/{document}', part)
+        for document in range(3)
+        for part in range(3)
+    ]
+    assert index.entries == CoNLLIndex.parts_in(data, 'corpus.conll', 5)
+
+    index.save(filename + '.index')
+    assert CoNLLIndex.load(filename + '.index').entries == index.entries
+    assert index.locate('doc/1', 2)[0] == 'corpus.conll'
+    with pytest.raises(KeyError):
+        index.locate('doc/1', 3)
+
+
+@pytest.mark.parametrize('newline', ['\r\n', None])
+def test_build_line_endings(tmp_path, newline):
+    filename = str(tmp_path / 'corpus.conll')
+    data = write_corpus(filename)
+    if newline is None:
+        # No newline after the last line
+        data = data[:-1]
+    else:
+        data = data.replace('\n', newline)
+    data = data.encode()
+    with open(filename, 'wb') as fd:
+        fd.write(data)
+
+    index = CoNLLIndex.build([filename])
+    assert len(index) == 9
+    assert index.entries == CoNLLIndex.parts_in(data, 'corpus.conll')
+    last_entry = index.entries[-1]
+    assert last_entry[3] + last_entry[4] == len(data)
+
+
+def test_build_part_does_not_end(tmp_path):
+    filename = str(tmp_path / 'corpus.conll')
+    data = write_corpus(filename)
+    with open(filename, 'w', encoding='utf-8') as fd:
+        fd.write(data[:-len('#end document\n')])
+
+    with pytest.raises(ValueError):
+        CoNLLIndex.build([filename])
+    with pytest.raises(ValueError):
+        CoNLLIndex.parts_in(data[:-len('#end document\n')].encode(),
+                            'corpus.conll')
+
+
+@pytest.mark.parametrize('save_index', [True, False])
+def test_mapped_reader(tmp_path, save_index):
+    filename = str(tmp_path / 'corpus.conll')
+    write_corpus(filename)
+    if save_index:
+        CoNLLIndex.build([filename]).save(filename + '.index')
+
+    with MappedCoNLLReader.open(filename) as reader:
+        assert reader.read_part('doc/1', 1) == \
+            '#begin document (doc/1); part 001\n#end document\n'
+        assert reader.part_rows('doc/1', 0) == [
+            [['doc/1', '0', '0', 'één']],
+        ]
+        assert reader.part_rows('doc/2', 2) == [
+            [['doc/2', '2', '0', '2'], ['doc/2', '2', '1', 'twee']],
+        ]
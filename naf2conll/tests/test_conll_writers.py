@@ -0,0 +1,80 @@
+import io
+import os
+
+import pytest
+
+from naf2conll.conll_writers import CoNLLWriter, ConcatenatedOutput
+from naf2conll.conll_index import CoNLLIndex
+
+
+def make_sentences():
+    return [
+        [
+            {'part_number': 0, 'word_number': 0, 'word': '100%'},
+            {'part_number': 0, 'word_number': 1, 'word': 'is', 'coref': '(1)'},
+        ],
+        [
+            {'part_number': 2, 'word_number': 0, 'word': 'Een'},
+            {'part_number': 2, 'word_number': 1, 'word': 'tweede'},
+            {'part_number': 2, 'word_number': 2, 'word': 'zin'},
+        ],
+    ]
+
+
+def write(buffering):
+    writer = CoNLLWriter(
+        columns=['part_number', 'word_number', 'word', 'coref'],
+        buffering=buffering,
+    )
+    fd = io.StringIO()
+    writer.write(fd, 'doc%s', make_sentences())
+    return fd.getvalue()
+
+
+@pytest.mark.parametrize('buffering', ['sentence', 'part'])
+def test_buffering_output(buffering):
+    assert write(buffering) == write('word')
+
+
+def test_invalid_buffering():
+    with pytest.raises(ValueError):
+        CoNLLWriter(buffering='line')
+
+
+def test_concatenated_output(tmp_path):
+    filename = str(tmp_path / 'corpus.conll')
+    texts = [write('sentence').replace('doc%s', f'doc{i}') for i in range(5)]
+    with ConcatenatedOutput(filename, shards=2, buffer_size=16) as output:
+        for i, text in enumerate(texts):
+            output.add(f'doc{i}', text)
+    assert sorted(os.listdir(tmp_path)) == [
+        'corpus.000.conll',
+        'corpus.001.conll',
+        'corpus.conll.index',
+    ]
+
+    # Every document has three parts
+    index = CoNLLIndex.load(filename + '.index')
+    assert [(ID, part) for ID, part, *_ in index] == [
+        (f'doc{i}', part) for i in range(5) for part in range(3)
+    ]
+    for i, text in enumerate(texts):
+        parts = b''
+        for ID, _, shard_file, offset, size in index:
+            if ID == f'doc{i}':
+                with open(tmp_path / shard_file, 'rb') as fd:
+                    fd.seek(offset)
+                    parts += fd.read(size)
+        assert parts.decode() == text
+    # Both shards are about the same size
+    sizes = [os.path.getsize(tmp_path / f'corpus.00{i}.conll') for i in [0, 1]]
+    assert abs(sizes[0] - sizes[1]) <= max(map(len, texts))
+
+
+def test_concatenated_output_error(tmp_path):
+    filename = str(tmp_path / 'corpus.conll')
+    with pytest.raises(KeyError):
+        with ConcatenatedOutput(filename) as output:
+            output.add('doc', write('sentence'))
+            raise KeyError
+    assert os.listdir(tmp_path) == []
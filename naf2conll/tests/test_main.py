@@ -1,8 +1,12 @@
 import os
 import sys
 import logging
+import shutil
+import multiprocessing
 import subprocess
 
+import pytest
+
 from naf2conll.main import Main
 
 logger = logging.getLogger(None if __name__ == '__main__' else __name__)
@@ -139,3 +143,138 @@ def test_not_fill_spans(caplog, naffile_not_consec_coref):
         if os.path.exists(output_file):
             os.remove(output_file)
     assert res.returncode != 0
+
+
+def test_resume(caplog, tmp_path, naffile_coref, naffile_no_coref,
+                fill_spans_config):
+    caplog.set_level(logging.INFO)
+    input_dir = tmp_path / 'input'
+    os.makedirs(input_dir)
+    shutil.copy(naffile_coref, input_dir)
+    output_dir = str(tmp_path / 'output')
+    manifest_file = str(tmp_path / 'manifest.json')
+    args = [output_dir, '-d', str(input_dir), '-m', manifest_file,
+            '-c', fill_spans_config]
+    Main.main(args)
+
+    output_file = os.path.join(output_dir, 'coref.conll')
+    mtime = os.stat(output_file).st_mtime_ns
+
+    # Only the new document is converted
+    shutil.copy(naffile_no_coref, input_dir)
+    caplog.clear()
+    Main.main(args)
+    assert os.stat(output_file).st_mtime_ns == mtime
+    assert os.path.exists(os.path.join(output_dir, 'no_coref.conll'))
+    assert any('Skipping coref.naf' in r.getMessage() for r in caplog.records)
+
+    # A different configuration converts everything again
+    caplog.clear()
+    Main.main(args[:-1] + ['../config/problem_only_config.yml'])
+    assert not any('Skipping' in r.getMessage() for r in caplog.records)
+
+
+def test_jobs(caplog, tmp_path, resources_dir, fill_spans_config):
+    caplog.set_level(logging.INFO)
+    input_dir = tmp_path / 'input'
+    os.makedirs(input_dir)
+    for filename in os.listdir(resources_dir):
+        if filename.endswith('.naf'):
+            shutil.copy(os.path.join(resources_dir, filename), input_dir)
+    with open(input_dir / 'broken.naf', 'w') as fd:
+        fd.write('<NAF>')
+
+    serial_dir = str(tmp_path / 'serial')
+    parallel_dir = str(tmp_path / 'parallel')
+    Main.main([serial_dir, '-d', str(input_dir), '-c', fill_spans_config])
+    caplog.clear()
+    Main.main([parallel_dir, '-d', str(input_dir), '-c', fill_spans_config,
+               '-j', '2'])
+
+    filenames = sorted(os.listdir(serial_dir))
+    assert len(filenames) == 3
+    assert sorted(os.listdir(parallel_dir)) == filenames
+    for filename in filenames:
+        with open(os.path.join(serial_dir, filename)) as fd:
+            serial = fd.read()
+        with open(os.path.join(parallel_dir, filename)) as fd:
+            assert fd.read() == serial
+
+    # The error in the worker is logged by the main process
+    messages = [r.getMessage() for r in caplog.records]
+    assert any(m.startswith('broken.naf from') for m in messages)
+    assert any(
+        m.startswith('Converted 3 documents') and '1 documents failed' in m
+        for m in messages
+    )
+
+
+def test_jobs_error(tmp_path, naffile_coref, fill_spans_config):
+    # Stop at the first error instead of logging it
+    with open(fill_spans_config) as fd:
+        config = fd.read().replace('log_on_error: true', 'log_on_error: false')
+    config_file = str(tmp_path / 'config.yml')
+    with open(config_file, 'w') as fd:
+        fd.write(config)
+
+    input_dir = tmp_path / 'input'
+    os.makedirs(input_dir)
+    for copy in range(6):
+        shutil.copy(naffile_coref, input_dir / f'coref{copy}.naf')
+    broken_file = input_dir / 'coref1.naf'
+    with open(broken_file, 'w') as fd:
+        fd.write('<NAF>')
+
+    serial_dir = str(tmp_path / 'serial')
+    parallel_dir = str(tmp_path / 'parallel')
+    manifest_file = str(tmp_path / 'manifest.json')
+    with pytest.raises(Exception):
+        Main.main([serial_dir, '-d', str(input_dir), '-c', config_file])
+    args = [parallel_dir, '-d', str(input_dir), '-c', config_file,
+            '-j', '3', '-m', manifest_file]
+    with pytest.raises(Exception) as error:
+        Main.main(args)
+    # The workers are stopped, although the exception is still referenced
+    assert error.value is not None
+    assert multiprocessing.active_children() == []
+
+    # No output is written after the failing document
+    assert os.listdir(serial_dir) == ['coref0.conll']
+    assert os.listdir(parallel_dir) == os.listdir(serial_dir)
+
+    # Fix the broken document and resume
+    shutil.copy(naffile_coref, broken_file)
+    Main.main(args)
+    assert sorted(os.listdir(parallel_dir)) == [
+        f'coref{copy}.conll' for copy in range(6)
+    ]
+
+
+def test_concatenate(tmp_path, resources_dir, fill_spans_config):
+    input_dir = tmp_path / 'input'
+    os.makedirs(input_dir)
+    for filename in os.listdir(resources_dir):
+        if filename.endswith('.naf'):
+            shutil.copy(os.path.join(resources_dir, filename), input_dir)
+
+    output_dir = str(tmp_path / 'output')
+    output_file = str(tmp_path / 'corpus.conll')
+    Main.main([output_dir, '-d', str(input_dir), '-c', fill_spans_config])
+    Main.main([output_file, '-d', str(input_dir), '-c', fill_spans_config,
+               '--concatenate', '-j', '2'])
+
+    # The documents are concatenated in the same order as they are converted
+    expected = b''
+    for filename in sorted(os.listdir(output_dir)):
+        with open(os.path.join(output_dir, filename), 'rb') as fd:
+            expected += fd.read()
+    with open(output_file, 'rb') as fd:
+        assert fd.read() == expected
+
+    # The index contains byte offsets
+    with open(output_file + '.index') as fd:
+        index = [line.split('\t') for line in fd]
+    assert [int(offset) for _, _, _, offset, _ in index] == [
+        expected.index(f'#begin document ({ID})'.encode())
+        for ID, *_ in index
+    ]
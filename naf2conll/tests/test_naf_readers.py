@@ -1,4 +1,9 @@
-from naf2conll.naf_readers import NAFReader
+import itertools as it
+
+import pytest
+from KafNafParserPy import KafNafParser
+
+from naf2conll.naf_readers import NAFReader, NAFStreamReader
 
 
 def test_extract_coref_sets(nafobj):
@@ -42,3 +47,62 @@ def test_token_ids_from_term_ids(nafobj):
     ))
     expected_ids = list(map(Cwf.get_id, nafobj.get_tokens()))
     assert calculated_ids == expected_ids
+
+
+@pytest.mark.parametrize('filename', [
+    'coref.naf',
+    'no_coref.naf',
+    'not_consec_coref.naf',
+])
+def test_stream_reader(resources_dir, filename):
+    filename = resources_dir + filename
+    reader = NAFReader()
+    nafobj = KafNafParser(filename)
+    stream_reader = NAFStreamReader()
+    layers = stream_reader.parse(filename)
+    assert stream_reader.extract_sentences(layers) == \
+        reader.extract_sentences(nafobj)
+    assert list(stream_reader.extract_coref_sets(layers)) == \
+        list(reader.extract_coref_sets(nafobj))
+
+
+def test_stream_reader_kaf(tmpdir):
+    filename = str(tmpdir.join('document.kaf'))
+    with open(filename, 'w') as fd:
+        fd.write(
+            '<KAF><coreferences><coref coid="co1">'
+            '<span><target id="t2"/><target id="t1"/></span></coref>'
+            '</coreferences><text>'
+            '<wf wid="w1" sent="1">a</wf><wf wid="w2" sent="2">b</wf>'
+            '</text><terms>'
+            '<term tid="t1"><span><target id="w1"/></span></term>'
+            '<term tid="t2"><span><target id="w2"/></span></term>'
+            '</terms></KAF>'
+        )
+    reader = NAFStreamReader()
+    layers = reader.parse(filename)
+    assert reader.extract_sentences(layers) == [
+        [{'id': 'w1', 'word': 'a', 'sentence': 1}],
+        [{'id': 'w2', 'word': 'b', 'sentence': 2}],
+    ]
+    assert list(reader.extract_coref_sets(layers)) == [[['w2', 'w1']]]
+
+
+def test_term_index(nafobj, monkeypatch):
+    looked_up = []
+    get_term = nafobj.get_term
+
+    def counting_get_term(term_id):
+        looked_up.append(term_id)
+        return get_term(term_id)
+
+    monkeypatch.setattr(nafobj, 'get_term', counting_get_term)
+    coref_sets = list(NAFReader.extract_coref_sets(nafobj))
+    term_ids = [
+        term_id
+        for ref in nafobj.get_corefs()
+        for refspan in ref.get_spans()
+        for term_id in refspan.get_span_ids()
+    ]
+    assert sorted(looked_up) == sorted(set(term_ids))
+    assert sum(map(len, it.chain(*coref_sets))) == len(term_ids)
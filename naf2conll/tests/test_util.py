@@ -1,12 +1,38 @@
 import itertools as it
 
+import pytest
 from hypothesis import given
 from hypothesis.strategies import integers, lists
 
-from naf2conll.util import split_on_numbering
+from naf2conll.util import (
+    split_on_numbering,
+    number_runs,
+    ValidationError,
+)
 
 
 @given(lists(integers(min_value=1, max_value=1000)))
 def test_split_on_numbering(lengths):
     lists = [[i] * l for i, l in enumerate(lengths)]
     assert split_on_numbering(it.chain(*lists), lambda x: x) == lists
+
+
+@given(lists(integers(min_value=1, max_value=100)))
+def test_number_runs(lengths):
+    numbers = [str(i) for i, l in enumerate(lengths) for _ in range(l)]
+    runs = number_runs(numbers)
+    assert [numbers[start:stop] for start, stop, _ in runs] == \
+        split_on_numbering(numbers, int)
+    assert [number for _, _, number in runs] == list(range(len(lengths)))
+
+
+def test_number_runs_validation():
+    assert number_runs(['1', '01', '2'], start_number=1) == [
+        (0, 2, 1), (2, 3, 2)
+    ]
+    assert number_runs([1, 3, 2], validate=False) == [
+        (0, 1, 1), (1, 2, 3), (2, 3, 2)
+    ]
+    for numbers in [[1], [0, 2], [0, 1, 0]]:
+        with pytest.raises(ValidationError):
+            number_runs(numbers)
@@ -1,16 +1,121 @@
 from KafNafParserPy import *
 from xml.etree.ElementTree import ElementTree
+from lxml import etree
 from collections import defaultdict
+from multiprocessing import Pool
+import tempfile
+import shutil
 import sys
 import os
+import io
 
 
 
 version = "0.1"
-pid = 0
-sid = 0
 
-missed_rels = 0
+
+class cDocumentState():
+    '''
+    Class that captures the counters and layers of the conversion of one document, so documents can be converted at the same time
+    '''
+
+    def __init__(self):
+        '''
+        Initiates the counters of a new document
+        '''
+
+        self.pid = 0
+        self.sid = 0
+        self.offset = 0
+        self.missed_rels = 0
+        #elements of the NAF layers by name, added when first needed (see get_layer)
+        self.layers = {}
+        #cNafStreamWriter that the layers are written to after every sentence, if streaming
+        self.stream = None
+
+
+class cNafStreamWriter():
+    '''
+    Class that writes the layers of a NAF document sentence by sentence, so only about one sentence is kept in memory
+    Every layer is written to a temporary file by an incremental lxml writer. When the document is done, they are combined with the raw text and header into a NAF file in the same format as KafNafParser.dump
+    '''
+
+    def __init__(self):
+        '''
+        Initiates a writer without layers
+        '''
+
+        #(temporary file, writer) of every layer in the order in which the layers were added
+        self.layer_files = []
+        self.writers = {}
+
+    def write_layers(self, layers):
+        '''
+        Writes the items that were added to the layer elements and removes them from the elements
+        :param layers: dictionary of layer elements by name (see cDocumentState)
+        '''
+
+        for layer, node in layers.items():
+            writer = self.writers.get(layer)
+            if writer is None:
+                layer_file = tempfile.TemporaryFile()
+                writer = self.writers[layer] = write_layer(layer_file, layer)
+                next(writer)
+                self.layer_files.append((layer_file, writer))
+            for item in node:
+                writer.send(item)
+            del node[:]
+
+    def dump(self, nafobj, raw, filename):
+        '''
+        Writes the NAF file: the root, raw text and header of nafobj followed by the layers
+        :param raw: raw text of the document
+        '''
+
+        for layer_file, writer in self.layer_files:
+            writer.close()
+        root = nafobj.root
+        node_raw = etree.Element('raw')
+        node_raw.text = etree.CDATA(raw)
+        node_header = root.find('nafHeader')
+        etree.indent(node_header, level=1)
+        with open(filename, 'wb') as fd:
+            fd.write(b"<?xml version='1.0' encoding='UTF-8'?>\n")
+            #the start tag of the root is its serialization without children, without the closing '/>'
+            fd.write(etree.tostring(etree.Element(root.tag, root.attrib, nsmap=root.nsmap))[:-2] + b'>')
+            for node in [node_raw, node_header]:
+                fd.write(b'\n  ' + etree.tostring(node, encoding='UTF-8'))
+            for layer_file, writer in self.layer_files:
+                fd.write(b'\n  ')
+                layer_file.seek(0)
+                shutil.copyfileobj(layer_file, fd)
+            fd.write(b'\n</' + root.tag.encode() + b'>\n')
+
+    def close(self):
+        '''
+        Removes the temporary files
+        '''
+
+        for layer_file, writer in self.layer_files:
+            writer.close()
+            layer_file.close()
+
+
+def write_layer(layer_file, layer):
+    '''
+    Coroutine that writes the items it is sent to a NAF layer in a file with lxml's incremental writer, indented as by KafNafParser.dump
+    The layer is closed when the coroutine is closed
+    '''
+
+    with etree.xmlfile(layer_file, encoding='UTF-8') as xf:
+        with xf.element(layer):
+            try:
+                while True:
+                    item = yield
+                    etree.indent(item, level=2)
+                    xf.write('\n    ', item)
+            except GeneratorExit:
+                xf.write('\n  ')
 
 
 class cDependent():
@@ -18,6 +123,8 @@ class cDependent():
     Class that captures structure of dependents for multiword descriptions
     '''
 
+    __slots__ = ('from_id', 'to_id', 'rel', 'lemma_from', 'lemma_to')
+
     def __init__(self,from_id, to_id, rel):
         '''
         Initiates dependent
@@ -34,108 +141,157 @@ class cDependent():
 
 
 
-def get_tokens(alpino_node, word_count, token_dict = {}, highest_count = 0):
-    #identifier = word_count
-    for child in alpino_node.getchildren():
-        if child.get('word') is not None:
-            identifier = int(child.get('begin')) + word_count
+def traverse_alpino_tree(alpino_node, word_count):
+    '''
+    Collects the tokens, PropBank relations and index nodes of an Alpino tree in one iterative traversal (no recursion)
+    Nodes with a word are assumed to be leaves, as they are in Alpino
+    :param alpino_node: top node of the Alpino tree
+    :param word_count: number added to the begin of each word to get its identifier
+    :return: token dictionary, updated word count, PropBank dictionaries in the order in which they should be added to NAF, number of missed PropBank relations and index dictionary
+    '''
+    token_dict = {}
+    indeces = {}
+    pb_dicts = []
+    missed = 0
+    highest_count = 0
+    #term ids of all words in the order of the tree, so the words of a constituent are a slice of this list
+    leaves = []
+    #every entry: node, iterator over its children, its PropBank dictionary and the position of its first word in leaves
+    stack = [(alpino_node, iter(alpino_node), {}, 0)]
+    while stack:
+        node, children, pb_dict, first_leaf = stack[-1]
+        ch = next(children, None)
+        if ch is None:
+            #all children done: the node is finished
+            stack.pop()
+            highest_count += 1
+            if 'rel' in pb_dict:
+                pb_dicts.append(pb_dict)
+            else:
+                missed += len(pb_dict)
+            pb = node.get('pb')
+            if pb is not None and stack:
+                if node.get('word') is None:
+                    myconstituent = [leaves[first_leaf:]] if len(leaves) > first_leaf else []
+                else:
+                    myconstituent = [leaves[first_leaf:first_leaf + 1], node.get('begin')]
+                parent_pb_dict = stack[-1][2]
+                if not pb in parent_pb_dict:
+                    parent_pb_dict[pb] = [myconstituent]
+                else:
+                    parent_pb_dict[pb].append(myconstituent)
+            continue
+
+        first_leaf = len(leaves)
+        word = ch.get('word')
+        if word is not None:
+            identifier = int(ch.get('begin')) + word_count
             if identifier > highest_count:
                 highest_count = identifier
-            token_dict[identifier] = [child.get('word'), child.get('lemma'), child.get('pos'), child.get('postag')]
-        token_dict, highest_count = get_tokens(child, word_count, token_dict, highest_count)
-    return token_dict, highest_count + 1
+            token_dict[identifier] = [word, ch.get('lemma'), ch.get('pos'), ch.get('postag')]
+            leaves.append('t' + str(identifier))
+        if ch.get('index') is not None:
+            #stored as integer, later summed with word count
+            index_id = 'index_' + ch.get('index')
+            if index_id not in indeces:
+                if word is not None:
+                    indeces[index_id] = [int(ch.get('begin')) + word_count, word]
+                elif len(ch) > 0:
+                    head_word, local_id = identify_head(ch, indeces, word_count)
+                    indeces[index_id] = [local_id + word_count, head_word]
+        stack.append((ch, iter(ch), {}, first_leaf))
 
+    return token_dict, highest_count, pb_dicts, missed, indeces
 
-def get_constituent(alpino_node, word_count, words=[]):
-    
-    for child in alpino_node.getchildren():
-        if child.get('word') is not None:
-            if len(words) < 1:
-                words.append([])
-            identifier = int(child.get('begin')) + word_count
-            words[0].append('t' + str(identifier))
-            #FIXME: this is not the right way to identify the head (ignoring for now)
-            if child.get('rel') == 'hd' and len(words) < 2:
-                words.append('t' + str(identifier))
-        else:
-            words = get_constituent(child, word_count, words)
-    return words
 
-def create_span(target_ids):
+def get_layer(nafobj, state, layer):
+    '''
+    Gets the element of a NAF layer, which is appended to the document when it is first needed, as KafNafParser does
+    The layers are built with lxml directly instead of through KafNafParser objects, which is a lot faster
+    :param layer: name of the layer, e.g. 'text'
+    '''
 
-    span = Cspan()
-    span.create_from_ids(target_ids)
+    node = state.layers.get(layer)
+    if node is None:
+        node = state.layers[layer] = etree.SubElement(nafobj.root, layer)
+    return node
 
-    return span
 
-def add_role(pred, role, span):
-    
-    global sid
-    
-    sid += 1
-    s_id = 's' + str(sid)
+def add_span(node, target_ids):
 
-    my_role = Crole()
-    my_role.set_id(s_id)
-    my_role.set_sem_role(role)
-    rspan = create_span(span)
-    my_role.set_span(rspan)
-    pred.add_role(my_role)
+    span = etree.SubElement(node, 'span')
+    for target_id in target_ids:
+        etree.SubElement(span, 'target', id=target_id)
 
 
-def add_pb_obj_to_naf(nafobj, pbdict):
-    global pid
-    
-    pid += 1
-    p_id = 'p' + str(pid)
-    mypred = Cpredicate()
-    mypred.set_id(p_id)
-    pspan = create_span(pbdict.get('rel')[0][0])
-    mypred.set_span(pspan)
+def add_role(pred, role, span, state):
+
+    state.sid += 1
+    s_id = 's' + str(state.sid)
+
+    my_role = etree.SubElement(pred, 'role', {'id': s_id, 'semRole': role})
+    add_span(my_role, span)
+
+
+def add_pb_obj_to_naf(nafobj, pbdict, state):
+
+    state.pid += 1
+    p_id = 'p' + str(state.pid)
+    pspan = pbdict.get('rel')[0][0]
+    mypred = etree.SubElement(get_layer(nafobj, state, 'srl'), 'predicate', id=p_id)
+    add_span(mypred, pspan)
     for k, val in pbdict.items():
         if not k == 'rel':
             for v in val:
                 if len(v) > 0:
-                    add_role(mypred, k, v[0])
-    nafobj.add_predicate(mypred)
+                    add_role(mypred, k, v[0], state)
 
 
 
 
-def find_propbank_rels(elem, nafobj, word_count):
+def add_propbank_rels(nafobj, pb_dicts, missed, state):
 
-    global missed_rels
-    
-    pb_dict = {}
-    for ch in elem.getchildren():
-        pb = ch.get('pb')
-        if pb is not None:
-            myconstituent = []
-            if ch.get('word') is None:
-                myconstituent = get_constituent(ch, word_count, myconstituent)
-            else:
-                identifier = int(ch.get('begin')) + word_count
-                myconstituent = [['t' + str(identifier)], ch.get('begin')]
-            if not pb in pb_dict:
-                pb_dict[pb] = [myconstituent]
-            else:
-                pb_dict[pb].append(myconstituent)
-    
-        find_propbank_rels(ch, nafobj, word_count)
+    for pb_dict in pb_dicts:
+        add_pb_obj_to_naf(nafobj, pb_dict, state)
+    state.missed_rels += missed
 
-    if 'rel' in pb_dict:
-        add_pb_obj_to_naf(nafobj, pb_dict)
-    else:
-        missed_rels += len(pb_dict)
+
+def run_nested(steps):
+    '''
+    Runs a generator that yields a generator for every nested call it would otherwise make recursively and is sent its result
+    This way deep trees cannot exceed the recursion limit
+    :param steps: generator of the outermost call
+    :return: result of the outermost call
+    '''
+    stack = [steps]
+    result = None
+    while stack:
+        try:
+            nested = stack[-1].send(result)
+        except StopIteration as stop:
+            stack.pop()
+            result = stop.value
+        else:
+            stack.append(nested)
+            result = None
+    return result
 
 
 def identify_head_and_dependents(elem, word_count, deps, indeces):
 
+    return run_nested(head_and_dependents_steps(elem, word_count, deps, indeces))
+
+
+def head_and_dependents_steps(elem, word_count, deps, indeces):
+    '''
+    Generator version of identify_head_and_dependents for run_nested
+    '''
+
     head_node = None
     dep_word = None
     local_deps = defaultdict(list)
     equal_rel = False
-    for ch in elem.getchildren():
+    for ch in elem:
         dep_rel = ch.get('rel')
         if dep_rel in ['hd','cmp','mwp','rhd','crd','dp','nucl','cnj','whd'] and not equal_rel:
 
@@ -145,7 +301,7 @@ def identify_head_and_dependents(elem, word_count, deps, indeces):
                     head_node = my_head_node[0]
                     head_word = my_head_node[1]
                 else:
-                    head_node, head_rel, head_word = identify_head_and_dependents(ch, word_count, deps, indeces)
+                    head_node, head_rel, head_word = yield head_and_dependents_steps(ch, word_count, deps, indeces)
             else:
                 head_word = ch.get('word')
                 head_node = int(ch.get('begin')) + word_count
@@ -158,8 +314,8 @@ def identify_head_and_dependents(elem, word_count, deps, indeces):
         else:
             #if this is a node, then analyze local tree
             if ch.get('word') is None:
-                if len(ch.getchildren()) > 0:
-                    dependent_id, dep_head_rel, dep_word = identify_head_and_dependents(ch, word_count, deps, indeces)
+                if len(ch) > 0:
+                    dependent_id, dep_head_rel, dep_word = yield head_and_dependents_steps(ch, word_count, deps, indeces)
                     if not ch.get('index') is None:
                         indeces['index_' + ch.get('index')] = [dependent_id, dep_word]
                 elif ch.get('index') is not None:
@@ -183,9 +339,9 @@ def identify_head_and_dependents(elem, word_count, deps, indeces):
 
     #example found where head was indeed missing (grammar error)
     if head_node is None:
-        for ch in elem.getchildren():
+        for ch in elem:
             print(ch.get('rel'), 'grandchildren trick (should only be employed when head is truly missing)', ch.get('id'))
-            for gch in ch.getchildren():
+            for gch in ch:
                 if gch.get('rel') in ['hd','rhd','whd']:
                     #otherwise function get head
                     head_word = gch.get('word')
@@ -224,12 +380,13 @@ def remove_duplicates(deps):
 
     unique_deps = defaultdict(list)
     for dep_id, rels in deps.items():
-        found_pairs = []
+        #keeps the first relation with the same head and relation
+        found_pairs = set()
         for rel in rels:
-            rel_description = str(rel.from_id) + rel.rel
+            rel_description = (rel.from_id, rel.rel)
             if not rel_description in found_pairs:
                 unique_deps[dep_id].append(rel)
-                found_pairs.append(rel_description)
+                found_pairs.add(rel_description)
     return unique_deps
 
 
@@ -240,123 +397,88 @@ def identify_head(elem, indeces, word_count):
     :return: head_word as string and identifier as integer
     '''
 
-    for ch in elem.getchildren():
-        if ch.get('rel') in ['hd','cmp','mwp','rhd','crd','dp','nucl','cnj','whd']:
-            word = ch.get('word')
-            local_id = int(ch.get('begin'))
-            if word is None:
-                if ch.get('index') is not None:
-                    index_id = 'index_' + ch.get('index')
-                    if index_id in indeces:
-                        known_info = indeces.get(index_id)
-                        word = known_info[1]
-                        local_id = known_info[0] - word_count
-            if word is None:
-                word, local_id = identify_head(ch, indeces, word_count)
-
-            return word, local_id
-    #A bit of a hack, but only example found so far of no head being found meant that the head was indeed missing...
-  #  for ch in elem.getchildren():
-  #      for gch in ch.getchildren():
-  #          word, local_id = identify_head(gch)
-  #          return word, local_id
-    print(elem.get('id'))
-    print('Error: no head was found or word was None')
-
-
-def collect_indeces(elem, indeces, word_count):
-    '''
-    Function that collects all index information for description
-    :param elem: input xml for Alpino
-    :return:
-    '''
-    for ch in elem.getchildren():
-        if ch.get('index') is not None:
-            #stored as integer, later summed with word count
-            local_id = int(ch.get('begin')) + word_count
-            word = ch.get('word')
-            index_id = 'index_' + ch.get('index')
-            if index_id not in indeces:
-                if word is not None:
-                    indeces[index_id] = [local_id, word]
-                elif len(ch.getchildren()) > 0:
-                    word, local_id = identify_head(ch, indeces, word_count)
-                    indeces[index_id] = [local_id + word_count, word]
-
-        collect_indeces(ch, indeces, word_count)
+    #follows the heads down the tree until one with a (known) word is found
+    while True:
+        for ch in elem:
+            if ch.get('rel') in ['hd','cmp','mwp','rhd','crd','dp','nucl','cnj','whd']:
+                word = ch.get('word')
+                local_id = int(ch.get('begin'))
+                if word is None:
+                    if ch.get('index') is not None:
+                        index_id = 'index_' + ch.get('index')
+                        if index_id in indeces:
+                            known_info = indeces.get(index_id)
+                            word = known_info[1]
+                            local_id = known_info[0] - word_count
+                if word is None:
+                    elem = ch
+                    break
+
+                return word, local_id
+        else:
+            #A bit of a hack, but only example found so far of no head being found meant that the head was indeed missing...
+            print(elem.get('id'))
+            print('Error: no head was found or word was None')
+            return None
 
 
 
-def add_dependencies_to_naf(elem, nafobj, word_count):
+def add_dependencies_to_naf(elem, nafobj, word_count, indeces, state):
 
     deps = defaultdict(list)
-    indeces = {}
-    collect_indeces(elem, indeces, word_count)
-    for ch in elem.getchildren():
-        if ch.get('rel') == '--' and len(ch.getchildren()) > 0:
+    for ch in elem:
+        if ch.get('rel') == '--' and len(ch) > 0:
             identify_head_and_dependents(ch,word_count,deps,indeces)
 
     deps = remove_duplicates(deps)
     for dependent_id, head_rels in sorted(deps.items()):
         for rel_info in head_rels:
-            naf_dependency = Cdependency()
             try:
                 comment = ' '+rel_info.rel+'('+rel_info.lemma_from+','+rel_info.lemma_to+') '
             except:
                 print(rel_info.rel, rel_info.lemma_from, rel_info.lemma_to)
-            naf_dependency.set_comment(comment)
-            naf_dependency.set_from('t' + str(rel_info.from_id))
-            naf_dependency.set_to('t' + str(dependent_id))
-            naf_dependency.set_function(rel_info.rel)
-            nafobj.add_dependency(naf_dependency)
+            #'--' is not allowed in XML comments
+            naf_comment = etree.Comment(comment.replace('--','- -'))
+            naf_dependency = etree.SubElement(get_layer(nafobj, state, 'deps'), 'dep', {'from': 't' + str(rel_info.from_id), 'to': 't' + str(dependent_id), 'rfunc': rel_info.rel})
+            naf_dependency.append(naf_comment)
 
 
-def create_token_and_term_layer(token_dict, token_info, nafobj):
+def create_token_and_term_layer(token_dict, token_info, nafobj, state):
 
-    global offset
-    
+    if not token_dict:
+        return
+    text_layer = get_layer(nafobj, state, 'text')
+    term_layer = get_layer(nafobj, state, 'terms')
     for idnr, val in sorted(token_dict.items()):
-        if offset != 0:
-            offset += 1
+        if state.offset != 0:
+            state.offset += 1
         word_id = 'w' + str(idnr)
-        tok = Cwf(type="NAF")
-        tok.set_id(word_id)
-        tok.set_para(token_info[0])
-        tok.set_sent(token_info[1])
-        tok.set_text(val[0])
-        tok.set_offset(str(offset))
         length = len(val[0])
-        tok.set_length(str(length))
-        offset += length
-        nafobj.add_wf(tok)
+        tok = etree.SubElement(text_layer, 'wf', {'id': word_id, 'para': token_info[0], 'sent': token_info[1], 'offset': str(state.offset), 'length': str(length)})
+        tok.text = etree.CDATA(val[0])
+        state.offset += length
         term_id = 't' + str(idnr)
-        term = Cterm()
-        term.set_id(term_id)
-        term.set_lemma(val[1])
-        term.set_pos(val[2])
-        term.set_morphofeat(val[3])
-        span = create_span([word_id])
-        term.set_span(span)
-        nafobj.add_term(term)
+        term = etree.SubElement(term_layer, 'term', {'id': term_id, 'lemma': val[1], 'pos': val[2], 'morphofeat': val[3]})
+        etree.SubElement(etree.SubElement(term, 'span'), 'target', id=word_id)
 
 
 
 
-def convert2naf_file(inputfile, nafobj, token_info, raw):
+def convert2naf_file(inputfile, nafobj, token_info, raw, state):
 
     myinput = ElementTree().parse(inputfile)
-    token_dict = None
     word_count = token_info[2]
-    for elem in myinput.getchildren():
+    for elem in myinput:
         if elem.tag == 'node':
-            token_dict = {}
-            token_dict, updated_word_count = get_tokens(elem, word_count, token_dict)
-            create_token_and_term_layer(token_dict, token_info, nafobj)
+            token_dict, updated_word_count, pb_dicts, missed, indeces = traverse_alpino_tree(elem, word_count)
+            create_token_and_term_layer(token_dict, token_info, nafobj, state)
             #code from Ruben to create constituent and dependency layers
-            find_propbank_rels(elem, nafobj, word_count)
-            add_dependencies_to_naf(elem, nafobj, word_count)
+            add_propbank_rels(nafobj, pb_dicts, missed, state)
+            add_dependencies_to_naf(elem, nafobj, word_count, indeces, state)
+            if state.stream is not None:
+                state.stream.write_layers(state.layers)
         elif elem.tag == 'sentence':
-            raw += ' ' + elem.text
+            raw.write(' ' + elem.text)
 
     return updated_word_count, raw
 
@@ -403,103 +525,185 @@ def make_sure_input_file_exists(filename, paragraph, sentence, dir, f):
         else:
             os.rename(dir + f, dir + cleanedfn)
 
-def collect_file_info(inputdir):
+def parse_file_name(f):
+    '''
+    Parses the name of a SoNaR Alpino file, e.g. WR-P-P-H-0000000001.p.12.s.3.xml
+    :param f: file name
+    :return: (document name, 'head' or 'p', paragraph, sentence) or None if the name has too few parts
+    '''
+
+    parts = f.split('.')
+    if len(parts) <= 4:
+        return None
+    paragraph = int(parts[2])
+    sentence_desc = parts[4]
+    if '_' in sentence_desc:
+        sentence = float(sentence_desc.replace('_','.'))
+    elif len(parts) == 7:
+        sentence = float(parts[4] + '.' + parts[5])
+    else:
+        sentence = int(parts[4])
+    return parts[0], parts[1], paragraph, sentence
+
+
+def collect_file_info(inputdir, read_only = False):
+    '''
+    Collects the Alpino files of every document in a directory
+    :param inputdir: directory with the Alpino files
+    :param read_only: do not rename files whose sentence number is written differently, but read them under their own name
+    :return: dictionary mapping every document name to a dictionary mapping paragraphs to a list of (sentence, file name) pairs, with the head paragraphs under 'head'; all are ordered
+    '''
 
-    my_files = {}
     inputdir += '/'
-  #  print(inputdir)
-    for f in os.listdir(inputdir):
-        parts = f.split('.')
-        if len(parts) > 4:
-            filename = parts[0]
-            paragraph = int(parts[2])
-            sentence_desc = parts[4]
-            if '_' in sentence_desc:
-                sentence = float(sentence_desc.replace('_','.'))
-            elif len(parts) == 7:
-                sentence = float(parts[4] + '.' + parts[5])
-            else:
-                sentence = int(parts[4])
-            make_sure_input_file_exists(filename, paragraph, sentence, inputdir, f)
-            if filename in my_files:
-                file_info = my_files.get(filename)
-            else:
-                file_info = {}
-            if parts[1] == 'head':
-                if 'head' in file_info:
-                    head_paragraph = file_info.get('head')
-                else:
-                    head_paragraph = {}
-                if paragraph in head_paragraph:
-                    head_paragraph[paragraph].insert(int(sentence)-1, sentence)
-                else:
-                    head_paragraph[paragraph] = [sentence]
-                file_info['head'] = head_paragraph
-            elif paragraph in file_info:
-                file_info[paragraph].insert(int(sentence)-1, sentence)
-            else:
-                file_info[paragraph] = [sentence]
-            my_files[filename] = file_info
+    #every file name is parsed once and the sentences are appended in the order of the directory
+    unordered_files = {}
+    with os.scandir(inputdir) as entries:
+        for entry in entries:
+            f = entry.name
+            key = parse_file_name(f)
+            if key is None:
+                continue
+            filename, kind, paragraph, sentence = key
+            if not read_only:
+                make_sure_input_file_exists(filename, paragraph, sentence, inputdir, f)
+                #files are read under their cleaned name
+                f = filename + '.' + kind + '.' + str(paragraph) + '.s.' + str(sentence) + '.xml'
+            file_info = unordered_files.get(filename)
+            if file_info is None:
+                file_info = unordered_files[filename] = {}
+            if kind == 'head':
+                file_info = file_info.setdefault('head', {})
+            sentences = file_info.get(paragraph)
+            if sentences is None:
+                sentences = file_info[paragraph] = []
+            sentences.append((sentence, f))
+
+    #then the documents, paragraphs and sentences are sorted once
+    my_files = {}
+    for filename in sorted(unordered_files):
+        my_files[filename] = order_paragraphs(unordered_files[filename])
     return my_files
 
 
-def create_and_process_file(inputdir, file_info, raw, prefix, old_sentence, nafobj, word_count, offset):
+def order_paragraphs(file_info):
+    '''
+    Sorts the paragraphs (head paragraphs first) and the (sentence, file name) pairs of each paragraph of a document
+    '''
+
+    ordered = {}
+    if 'head' in file_info:
+        ordered['head'] = order_paragraphs(file_info.pop('head'))
+    for paragraph in sorted(file_info):
+        sentences = file_info[paragraph]
+        sentences.sort()
+        ordered[paragraph] = sentences
+    return ordered
+
+
+def create_and_process_file(inputdir, file_info, raw, old_sentence, nafobj, word_count, offset, state):
 
-    for para, sentences in sorted(file_info.items()):
+    #paragraphs and sentences are ordered by collect_file_info
+    for para, sentences in file_info.items():
     #add two newlines and an additional offset for new paragraphs
-        if raw != '':
-            raw += '\n\n'
+        if raw.tell() != 0:
+            raw.write('\n\n')
             offset += 1
-        for sentence in sorted(sentences):
-            filename = prefix + str(para) + '.s.' + str(sentence) + '.xml'
+        for sentence, filename in sentences:
             #print(filename)
             doc_sentence = old_sentence + sentence
             token_info = [str(para), str(doc_sentence), word_count]
-            word_count, raw = convert2naf_file(inputdir + filename, nafobj, token_info, raw)
+            word_count, raw = convert2naf_file(inputdir + filename, nafobj, token_info, raw, state)
         old_sentence = doc_sentence
     return old_sentence, raw, word_count, offset
 
-def convert2naf(inputdir, outputdir = None):
+def convert_document(inputdir, outputdir, k, v, stream = False):
+    '''
+    Converts the Alpino files of one document to a NAF file
+    :param inputdir: directory with the Alpino files
+    :param outputdir: directory of the NAF file
+    :param k: name of the document
+    :param v: paragraphs and sentences of the document as collected by collect_file_info
+    :param stream: write the layers after every sentence (see cNafStreamWriter) instead of keeping the whole document in memory
+    :return: number of PropBank relations that were not added because their predicate was missing
+    '''
 
-    global offset, pid, sid
-    
-    my_files = collect_file_info(inputdir)
-    for k, v in my_files.items():
-        print(k)
-        raw = ''
-        word_count = 1
-        offset = 0
-        pid = 0
-        sid = 0
-        nafobj = KafNafParser(type="NAF")
-        set_metadata(nafobj, k)
-        old_sentence = 0
-        #if exists, create head first
-        if 'head' in v:
-            my_head_dict = v.get('head')
-            prefix = k + '.head.'
-            old_sentence, raw, word_count, offset = create_and_process_file(inputdir, my_head_dict, raw, prefix, old_sentence, nafobj, word_count, offset)
-            del v['head']
-        prefix = k + '.p.'
-        old_sentence, raw, word_count, offset = create_and_process_file(inputdir, v, raw, prefix, old_sentence, nafobj, word_count, offset)
-
-        
-        print(k + ',' + str(pid) + ',' + str(sid))
-        nafobj.set_raw(raw)
+    print(k)
+    state = cDocumentState()
+    if stream:
+        state.stream = cNafStreamWriter()
+    try:
+        return convert_document_with_state(inputdir, outputdir, k, v, state)
+    finally:
+        if stream:
+            state.stream.close()
+
+
+def convert_document_with_state(inputdir, outputdir, k, v, state):
+
+    #the raw text is collected in a buffer instead of by concatenating strings
+    raw = io.StringIO()
+    word_count = 1
+    nafobj = KafNafParser(type="NAF")
+    set_metadata(nafobj, k)
+    old_sentence = 0
+    #if exists, create head first
+    if 'head' in v:
+        my_head_dict = v.get('head')
+        old_sentence, raw, word_count, state.offset = create_and_process_file(inputdir, my_head_dict, raw, old_sentence, nafobj, word_count, state.offset, state)
+        del v['head']
+    old_sentence, raw, word_count, state.offset = create_and_process_file(inputdir, v, raw, old_sentence, nafobj, word_count, state.offset, state)
+
+
+    print(k + ',' + str(state.pid) + ',' + str(state.sid))
+    if state.stream is not None:
+        state.stream.dump(nafobj, raw.getvalue(), outputdir + k + '.naf')
+    else:
+        nafobj.set_raw(raw.getvalue())
         nafobj.dump(outputdir + k + '.naf')
+    return state.missed_rels
+
+
+def convert_document_in_worker(arguments):
+
+    return convert_document(*arguments)
+
+
+def convert2naf(inputdir, outputdir = None, jobs = 1, read_only = False, stream = False):
+    '''
+    Converts all documents in a directory of Alpino files to NAF
+    :param jobs: number of documents converted in parallel by separate processes
+    :param read_only: do not rename any input files (see collect_file_info)
+    :param stream: write every document sentence by sentence (see convert_document)
+    :return: total number of PropBank relations that were not added because their predicate was missing
+    '''
+
+    my_files = collect_file_info(inputdir, read_only)
+    documents = [(inputdir, outputdir, k, v, stream) for k, v in my_files.items()]
+    if jobs > 1:
+        #every document is converted by one worker, which reads all its sentence files
+        with Pool(jobs) as pool:
+            missed_rels = sum(pool.imap(convert_document_in_worker, documents))
+    else:
+        missed_rels = sum(map(convert_document_in_worker, documents))
+    return missed_rels
+
 
-   
 
 def main(argv=None):
 
     if argv is None:
         argv = sys.argv
+    read_only = '--read-only' in argv
+    stream = '--stream' in argv
+    argv = [arg for arg in argv if arg not in ['--read-only', '--stream']]
     if len(argv) < 2:
-        print('Usage: python sonar2naf.py sonardir (nafdir)')
+        print('Usage: python sonar2naf.py sonardir (nafdir) (jobs) (--read-only) (--stream)')
     elif len(argv) < 3:
-        convert2naf(argv[1])
+        convert2naf(argv[1], read_only = read_only, stream = stream)
+    elif len(argv) < 4:
+        convert2naf(argv[1], argv[2], read_only = read_only, stream = stream)
     else:
-        convert2naf(argv[1], argv[2])
+        convert2naf(argv[1], argv[2], int(argv[3]), read_only, stream)
 
 
 if __name__ == '__main__':